@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from stt.model_registry import estimate_model_memory, get_model_registry
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_engine_memory(engine: Any, max_depth: int = 3) -> int:
+    """
+    估算引擎实例持有的模型内存字节数
+
+    递归查找引擎属性中的torch模块（例如BERT模型、embedding模型）并累加参数大小。
+    放在STT模型注册表中的模型不挂在引擎属性上，由EnginePool按 model_key 另行计入。
+
+    Args:
+        engine: 引擎实例
+        max_depth: 属性递归的最大深度
+
+    Returns:
+        估算的字节数
+    """
+    visited: Set[int] = set()
+
+    def _walk(obj: Any, depth: int) -> int:
+        if obj is None or id(obj) in visited or depth > max_depth:
+            return 0
+        visited.add(id(obj))
+        if hasattr(obj, "parameters") and callable(getattr(obj, "parameters")):
+            return estimate_model_memory(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, dict, list, tuple, set)):
+            return 0
+        if not hasattr(obj, "__dict__"):
+            return 0
+        return sum(_walk(value, depth + 1) for value in vars(obj).values())
+
+    return _walk(engine, 0)
+
+
+class EnginePool:
+    """
+    引擎实例池：按 (引擎类别, 归一化配置) 缓存STT/NLU/TTS引擎实例
+
+    按请求切换引擎时只需一次字典查找，不再重复加载模型。
+    超出数量或内存上限时按LRU淘汰未固定的实例。
+
+    get_or_create / acquire 为调用方登记一次租用，请求结束后调用 release 归还；
+    被淘汰时仍有请求在用的实例先移出池，等最后一个租用归还后再关闭并卸载模型。
+    """
+
+    def __init__(self, max_engines: int = 6, max_memory_mb: Optional[float] = None):
+        """
+        初始化EnginePool
+
+        Args:
+            max_engines: 最多缓存的引擎实例数（不含固定实例）
+            max_memory_mb: 所有缓存实例的估算内存上限（MB），None表示不限制
+        """
+        self.max_engines = max_engines
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 正在创建中的引擎：同一键的并发未命中共享一次加载
+        self._pending: Dict[str, asyncio.Task] = {}
+        # 每个引擎实例（按id）当前的租用数
+        self._leases: Dict[int, int] = {}
+        # 已被淘汰、仍有租用的实例，归还最后一个租用时关闭
+        self._draining: Dict[int, Dict[str, Any]] = {}
+        # 进行中的异步关闭任务（引擎提供 aclose 时），保留引用直到完成
+        self._closing_tasks: Set[asyncio.Task] = set()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, config: Dict) -> str:
+        """
+        生成归一化的池键，配置字典的键顺序不影响结果
+        """
+        return json.dumps({"kind": kind, "config": config}, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def make_label(key: str, config: Dict) -> str:
+        """
+        生成简短可读的实例标签（引擎名 + 池键摘要），用于日志和指标
+        """
+        return f"{config.get('engine')}#{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}"
+
+    def put(self, kind: str, config: Dict, engine: Any, pinned: bool = False) -> None:
+        """
+        直接放入一个已创建的引擎实例
+
+        Args:
+            kind: 引擎类别，例如 "stt"、"nlu"、"tts"
+            config: 创建该引擎使用的配置
+            engine: 引擎实例
+            pinned: 固定实例不参与LRU淘汰（用于默认引擎）
+        """
+        key = self.make_key(kind, config)
+        with self._lock:
+            self._entries[key] = self._make_entry(kind, engine, pinned, self.make_label(key, config))
+            self._entries.move_to_end(key)
+            retired = self._evict_if_needed(protected_key=key)
+        self._retire(retired)
+
+    @staticmethod
+    def _make_entry(kind: str, engine: Any, pinned: bool, label: str) -> Dict[str, Any]:
+        return {
+            "kind": kind,
+            "engine": engine,
+            "label": label,
+            "memory_bytes": estimate_engine_memory(engine),
+            # STT模型注册表中的模型键，模型内存按该键计入
+            "model_key": getattr(engine, "model_key", None),
+            "pinned": pinned,
+        }
+
+    async def get_or_create(self, kind: str, config: Dict, creator: Callable[[Dict], Any]) -> Any:
+        """
+        获取与配置对应的引擎实例并登记一次租用，不存在时在线程池中调用creator创建并缓存
+
+        创建引擎可能需要加载模型，不在事件循环线程中执行，也不持有池锁；
+        同一配置的并发请求等待同一次创建。使用完毕后必须调用 release 归还。
+
+        Args:
+            kind: 引擎类别
+            config: 引擎配置
+            creator: 接收配置并返回引擎实例的函数（通常为工厂的create_engine）
+
+        Returns:
+            引擎实例
+        """
+        key = self.make_key(kind, config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self.acquire(entry["engine"])
+
+            task = self._pending.get(key)
+            if task is None:
+                self.misses += 1
+                task = asyncio.ensure_future(self._create(key, kind, config, creator))
+                self._pending[key] = task
+            else:
+                self.hits += 1
+
+        # shield: 某个等待方被取消时不中断其他请求共享的创建过程
+        return self.acquire(await asyncio.shield(task))
+
+    async def _create(self, key: str, kind: str, config: Dict, creator: Callable[[Dict], Any]) -> Any:
+        logger.info(f"引擎池未命中，创建新的{kind}引擎: {config.get('engine')}")
+        try:
+            engine = await asyncio.to_thread(creator, config)
+            with self._lock:
+                self._entries[key] = self._make_entry(kind, engine, False, self.make_label(key, config))
+                # 新实例本身超出内存上限时也不淘汰它，否则会把已关闭的实例交给调用方
+                retired = self._evict_if_needed(protected_key=key)
+            self._retire(retired)
+            return engine
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def acquire(self, engine: Any) -> Any:
+        """
+        登记一次对引擎实例的租用（不在池中的实例同样计数，归还时无需区分）
+
+        Returns:
+            传入的引擎实例
+        """
+        with self._lock:
+            self._leases[id(engine)] = self._leases.get(id(engine), 0) + 1
+        return engine
+
+    def release(self, engine: Any) -> None:
+        """
+        归还一次租用；实例已被淘汰且不再有租用时关闭它
+        """
+        with self._lock:
+            count = self._leases.get(id(engine), 0) - 1
+            if count > 0:
+                self._leases[id(engine)] = count
+                return
+            self._leases.pop(id(engine), None)
+            entry = self._draining.pop(id(engine), None)
+        if entry is not None:
+            self._retire([entry])
+
+    def engines(self, kind: Optional[str] = None) -> List[Any]:
+        """
+        列出池中的引擎实例
+
+        Args:
+            kind: 只返回该类别的引擎，None表示全部
+        """
+        with self._lock:
+            return [entry["engine"] for entry in self._entries.values() if kind is None or entry["kind"] == kind]
+
+    def labeled_engines(self, kind: Optional[str] = None) -> List[Tuple[str, Any]]:
+        """
+        列出池中的引擎实例及其标签 [(标签, 引擎), ...]
+
+        Args:
+            kind: 只返回该类别的引擎，None表示全部
+        """
+        with self._lock:
+            return [(entry["label"], entry["engine"]) for entry in self._entries.values()
+                    if kind is None or entry["kind"] == kind]
+
+    def _evict_if_needed(self, protected_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        按LRU顺序淘汰未固定的实例，直到满足数量和内存上限（需持有池锁）
+
+        Args:
+            protected_key: 不参与淘汰的键（刚放入的实例）
+
+        Returns:
+            可以立即关闭的实例（没有租用）；仍有租用的实例转入等待归还
+        """
+        def over_limit() -> bool:
+            unpinned = sum(1 for entry in self._entries.values() if not entry["pinned"])
+            if unpinned > self.max_engines:
+                return True
+            if self.max_memory_bytes is not None and self.memory_bytes() > self.max_memory_bytes:
+                return True
+            return False
+
+        retired = []
+        while over_limit():
+            victim_key = next((k for k, entry in self._entries.items()
+                               if not entry["pinned"] and k != protected_key), None)
+            if victim_key is None:
+                break
+            victim = self._entries.pop(victim_key)
+            self.evictions += 1
+            logger.info(
+                f"引擎池淘汰{victim['kind']}引擎: {type(victim['engine']).__name__}, "
+                f"释放约 {self._entry_memory_bytes(victim) / (1024 * 1024):.1f}MB"
+            )
+            if self._leases.get(id(victim["engine"]), 0) > 0:
+                self._draining[id(victim["engine"])] = victim
+            else:
+                retired.append(victim)
+        return retired
+
+    def _retire(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        关闭已淘汰且没有租用的实例，并卸载不再使用的STT模型（不持有池锁时调用）
+        """
+        for entry in entries:
+            # 释放引擎持有的外部资源（例如TTS合成进程）
+            self._close_engine(entry["engine"])
+            with self._lock:
+                self._release_model(entry["model_key"])
+
+    def _close_engine(self, engine: Any) -> None:
+        """
+        释放引擎持有的外部资源：优先调用异步的 aclose（在事件循环中以后台任务执行），否则调用 close
+        """
+        aclose = getattr(engine, 'aclose', None)
+        if callable(aclose):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is None:
+                try:
+                    asyncio.run(aclose())
+                except Exception as e:
+                    logger.warning(f"关闭引擎失败: {str(e)}")
+                return
+            task = loop.create_task(self._await_close(aclose))
+            self._closing_tasks.add(task)
+            task.add_done_callback(self._closing_tasks.discard)
+            return
+        close = getattr(engine, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"关闭引擎失败: {str(e)}")
+
+    @staticmethod
+    async def _await_close(aclose: Callable[[], Any]) -> None:
+        try:
+            await aclose()
+        except Exception as e:
+            logger.warning(f"关闭引擎失败: {str(e)}")
+
+    async def aclose(self) -> None:
+        """
+        关闭池中所有引擎（包括固定的默认引擎和等待归还的实例）持有的外部资源，用于服务退出
+        """
+        with self._lock:
+            engines = [entry["engine"] for entry in list(self._entries.values()) + list(self._draining.values())]
+            self._draining.clear()
+        for engine in engines:
+            self._close_engine(engine)
+        # 等待异步关闭（包括此前淘汰时启动的）全部完成
+        if self._closing_tasks:
+            await asyncio.gather(*list(self._closing_tasks), return_exceptions=True)
+
+    def _release_model(self, model_key: Optional[Hashable]) -> None:
+        """
+        池中（包括等待归还的实例）没有其他引擎使用该模型键时，从STT模型注册表中卸载模型
+        """
+        if model_key is None:
+            return
+        if any(entry["model_key"] == model_key
+               for entry in list(self._entries.values()) + list(self._draining.values())):
+            return
+        if get_model_registry().unload(model_key) is not None:
+            logger.info(f"已卸载不再使用的STT模型: {model_key}")
+
+    @staticmethod
+    def _entry_memory_bytes(entry: Dict[str, Any]) -> int:
+        model_key = entry["model_key"]
+        model_bytes = get_model_registry().memory_bytes(model_key) if model_key is not None else 0
+        return entry["memory_bytes"] + model_bytes
+
+    def memory_bytes(self) -> int:
+        """
+        当前所有缓存实例的估算内存总量
+
+        STT模型在首次识别时才加载，注册表中的模型内存在统计时读取；多个引擎共享的模型只计一次。
+        """
+        registry = get_model_registry()
+        model_keys = {entry["model_key"] for entry in self._entries.values() if entry["model_key"] is not None}
+        return (sum(entry["memory_bytes"] for entry in self._entries.values())
+                + sum(registry.memory_bytes(model_key) for model_key in model_keys))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取引擎池统计信息
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_engines": self.max_engines,
+                "memory_bytes": self.memory_bytes(),
+                "max_memory_bytes": self.max_memory_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "pending": len(self._pending),
+                "draining": len(self._draining),
+                "engines": [
+                    {
+                        "kind": entry["kind"],
+                        "class": type(entry["engine"]).__name__,
+                        "label": entry["label"],
+                        "memory_bytes": self._entry_memory_bytes(entry),
+                        "pinned": entry["pinned"],
+                    }
+                    for entry in self._entries.values()
+                ],
+            }
@@ -1,12 +1,17 @@
+import asyncio
 import json
 import logging
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+import uuid
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 import uvicorn
 
 from .orchestrator import NLPServiceOrchestrator
+from tts.audio_store import TTSAudioStore, encode_base64_reference, guess_media_type
+from runtime.metrics import CONTENT_TYPE_LATEST, get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,17 @@ class TextCommandPayload(BaseModel):
     text_input: str
     settings: Optional[Dict[str, Any]] = {}
 
+# 批量文本命令的请求模型
+class TextBatchPayload(BaseModel):
+    text_inputs: List[str]
+    settings: Optional[Dict[str, Any]] = {}
+    stream: bool = False  # True时以NDJSON逐行流式返回
+
+# 流式语音合成的请求模型
+class TTSStreamPayload(BaseModel):
+    text: str
+    settings: Optional[Dict[str, Any]] = {}
+
 # 全局变量，存储编排器实例
 orchestrator: Optional[NLPServiceOrchestrator] = None
 
@@ -43,6 +59,50 @@ async def startup_event():
     logger.info("正在初始化NLP服务编排器...")
     orchestrator = NLPServiceOrchestrator()
     logger.info("NLP服务编排器初始化完成")
+    
+    # 在后台预热TTS缓存，不阻塞服务启动
+    prewarm_config = (orchestrator.config.get('tts_cache', {}) or {}).get('prewarm', {}) or {}
+    if prewarm_config.get('enabled', False):
+        app.state.tts_prewarm_task = asyncio.create_task(orchestrator.prewarm_tts_cache())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    服务关闭时释放编排器持有的资源
+    """
+    if orchestrator is not None:
+        await orchestrator.close()
+
+def build_result_response(result: Dict[str, Any], settings: Dict[str, Any]):
+    """
+    按TTS交付方式构造响应：multipart时返回 multipart/mixed，
+    第一部分为JSON结果，第二部分为原始音频；其余方式直接返回JSON结果
+    """
+    if orchestrator.resolve_tts_delivery(settings) != 'multipart':
+        return result
+    
+    audio_bytes = None
+    if result.get('tts_delivery') == 'multipart':
+        # 音频随本次响应一次性交付，不再保留在暂存区
+        audio_bytes = orchestrator.tts_audio_store.pop(result['tts_output_reference'])
+        result.pop('tts_audio_url', None)
+    
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Content-Disposition: form-data; name=\"result\"\r\n\r\n".encode("utf-8")
+        + json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\r\n"
+    ]
+    if audio_bytes is not None:
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: {guess_media_type(audio_bytes)}\r\n"
+            "Content-Disposition: form-data; name=\"tts_audio\"; filename=\"tts_audio.wav\"\r\n\r\n".encode("utf-8")
+            + audio_bytes + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return Response(content=b"".join(parts), media_type=f"multipart/mixed; boundary={boundary}")
 
 @app.post("/process_audio")
 async def process_audio(
@@ -73,7 +133,7 @@ async def process_audio(
         # 使用编排器处理音频
         result = await orchestrator.handle_audio_input(audio_data, settings)
         
-        return result
+        return build_result_response(result, settings)
     except json.JSONDecodeError:
         logger.error("无效的settings_json格式")
         raise HTTPException(status_code=400, detail="无效的settings_json格式")
@@ -81,6 +141,66 @@ async def process_audio(
         logger.error(f"处理音频文件时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理音频文件时出错: {str(e)}")
 
+@app.websocket("/ws/stream_audio")
+async def stream_audio(websocket: WebSocket):
+    """
+    流式语音识别：边录音边上传，边识别边返回
+    
+    协议：
+        1. 客户端先发送JSON文本帧: {"settings": {...}, "sample_rate": 16000}
+        2. 随后持续发送二进制帧: 16位小端单声道PCM音频块
+        3. 录音结束时发送文本帧: {"type": "end"}
+    
+    服务端推送JSON文本帧：
+        {"type": "partial", "segment", "text"}   当前语音段的中间识别结果
+        {"type": "final", "segment", "text", "start", "end"}   语音段的最终识别结果
+        {"type": "result", "segment", ...}   该段的NLU/TTS结果，格式与 /process_audio 相同
+        {"type": "error", "error_message"}
+        {"type": "done", "transcript"}   所有语音段处理完毕
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+    
+    async def send_event(event: Dict[str, Any]) -> None:
+        async with send_lock:
+            await websocket.send_text(json.dumps(event, ensure_ascii=False))
+    
+    session = None
+    try:
+        init_message = json.loads(await websocket.receive_text())
+        settings = init_message.get("settings") or {}
+        logger.info(f"流式识别会话开始，settings: {settings}")
+        session = await orchestrator.create_audio_stream_session(
+            settings, send_event, sample_rate=int(init_message.get("sample_rate", 16000)))
+        
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                await session.feed(message["bytes"])
+            elif message.get("text") is not None and json.loads(message["text"]).get("type") == "end":
+                await session.finish()
+                await send_event({"type": "done", "transcript": session.transcript})
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("流式识别客户端已断开连接")
+    except json.JSONDecodeError:
+        logger.error("流式识别会话收到无效的JSON消息")
+        await send_event({"type": "error", "error_message": "无效的JSON消息"})
+        await websocket.close(code=1003)
+    except Exception as e:
+        logger.error(f"流式识别会话出错: {str(e)}")
+        try:
+            await send_event({"type": "error", "error_message": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if session is not None:
+            await session.close()
+
 @app.post("/process_text")
 async def process_text(payload: TextCommandPayload):
     """
@@ -96,11 +216,165 @@ async def process_text(payload: TextCommandPayload):
         # 使用编排器处理文本
         result = await orchestrator.handle_text_input(payload.text_input, payload.settings)
         
-        return result
+        return build_result_response(result, payload.settings or {})
     except Exception as e:
         logger.error(f"处理文本输入时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理文本输入时出错: {str(e)}")
 
+@app.post("/process_text_batch")
+async def process_text_batch(payload: TextBatchPayload):
+    """
+    批量处理文本输入（共享同一组settings），NLU一次批量推理
+    
+    Args:
+        payload: 包含文本列表、设置和是否流式返回的负载
+        
+    Returns:
+        按输入顺序排列的结果列表；stream为True时返回NDJSON流，每行一个结果
+    """
+    if not payload.text_inputs:
+        raise HTTPException(status_code=400, detail="text_inputs不能为空")
+    if len(payload.text_inputs) > orchestrator.max_text_batch_items:
+        raise HTTPException(status_code=400,
+                            detail=f"text_inputs数量超过上限 {orchestrator.max_text_batch_items}")
+    settings = payload.settings or {}
+    
+    if payload.stream:
+        async def ndjson_lines():
+            try:
+                async for result in orchestrator.stream_text_batch(payload.text_inputs, settings):
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+            except Exception as e:
+                logger.error(f"流式批量处理文本时出错: {str(e)}")
+                yield json.dumps({"status": "error", "error_message": str(e)}, ensure_ascii=False) + "\n"
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    
+    try:
+        results = await orchestrator.handle_text_batch(payload.text_inputs, settings)
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"批量处理文本输入时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"批量处理文本输入时出错: {str(e)}")
+
+@app.post("/tts/stream")
+async def stream_tts(payload: TTSStreamPayload):
+    """
+    逐句合成并以分块传输返回音频，首句合成完成即开始输出
+    
+    Args:
+        payload: 包含要合成的文本和设置的负载
+        
+    Returns:
+        分块传输的WAV音频流
+    """
+    if not payload.text or not payload.text.strip():
+        raise HTTPException(status_code=400, detail="text不能为空")
+    
+    async def audio_chunks():
+        try:
+            async for chunk in orchestrator.stream_tts(payload.text, payload.settings or {}):
+                yield chunk
+        except Exception as e:
+            # 响应头已经发出，只能记录错误并结束音频流
+            logger.error(f"流式语音合成时出错: {str(e)}")
+    return StreamingResponse(audio_chunks(), media_type="audio/wav")
+
+@app.get("/tts/{audio_id}/events")
+async def tts_audio_events(audio_id: str, inline: bool = False):
+    """
+    以服务器推送事件(SSE)通知流水线模式的TTS音频合成结果
+    
+    Args:
+        audio_id: 结果中的 tts_output_reference
+        inline: 为True时在ready事件中附带 "base64://DATA" 格式的音频
+        
+    Returns:
+        text/event-stream，推送一个 ready 或 error 事件后结束
+    """
+    store = orchestrator.tts_audio_store
+    
+    def sse(event: str, data: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    async def events():
+        audio_bytes = await store.wait_for(audio_id, orchestrator.tts_pipelined_wait_seconds)
+        if audio_bytes is None:
+            if store.is_pending(audio_id):
+                error_message = "音频仍在合成中"
+            else:
+                error_message = store.error(audio_id) or "音频不存在或已过期"
+            yield sse("error", {"tts_output_reference": audio_id, "error_message": error_message})
+            return
+        data = {
+            "tts_output_reference": audio_id,
+            "tts_audio_url": f"/tts/{audio_id}",
+            "media_type": guess_media_type(audio_bytes),
+            "size": len(audio_bytes),
+        }
+        if inline:
+            data["audio"] = encode_base64_reference(audio_bytes)
+        yield sse("ready", data)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/tts/{audio_id}")
+async def get_tts_audio(audio_id: str):
+    """
+    按ID流式下载暂存在内存中的TTS音频（tts_delivery 为 reference 或 pipelined 时使用）
+    
+    Args:
+        audio_id: 结果中的 tts_output_reference
+        
+    Returns:
+        分块传输的原始音频
+    """
+    store = orchestrator.tts_audio_store
+    # 流水线模式下音频可能仍在合成中，等待合成完成
+    audio_bytes = await store.wait_for(audio_id, orchestrator.tts_pipelined_wait_seconds)
+    if audio_bytes is None:
+        if store.is_pending(audio_id):
+            raise HTTPException(status_code=504, detail="音频仍在合成中")
+        if store.error(audio_id):
+            raise HTTPException(status_code=500, detail=f"语音合成失败: {store.error(audio_id)}")
+        raise HTTPException(status_code=404, detail="音频不存在或已过期")
+    return StreamingResponse(
+        TTSAudioStore.iter_chunks(audio_bytes),
+        media_type=guess_media_type(audio_bytes),
+        headers={"Content-Length": str(len(audio_bytes))}
+    )
+
+@app.post("/admin/rag/reload")
+async def reload_rag_knowledge_base(force: bool = False):
+    """
+    热更新RAG知识库，无需重启服务
+    
+    Args:
+        force: 知识库文件未变化时也强制重建索引
+        
+    Returns:
+        各RAG检索器的重载结果
+    """
+    try:
+        results = await orchestrator.reload_rag_knowledge_base(force=force)
+        return {"results": results}
+    except Exception as e:
+        logger.error(f"重载RAG知识库时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"重载RAG知识库时出错: {str(e)}")
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus指标端点：各阶段/各引擎耗时直方图、RAG回退与阈值拒绝计数、
+    模型加载耗时、执行器排队等待和缓存命中率
+    
+    Returns:
+        Prometheus文本格式的指标
+    """
+    return Response(content=get_metrics_registry().render(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """
@@ -2,10 +2,13 @@ import os
 import json
 import yaml
 import logging
-from typing import Dict, Union, Optional
+from typing import AsyncIterator, Dict, List, Set, Union, Optional, Tuple
 import sys
 from pathlib import Path
+import asyncio
 import base64
+import time
+from contextlib import asynccontextmanager
 
 # 添加父目录到系统路径，以便导入其他模块
 sys.path.append(str(Path(__file__).parent.parent))
@@ -16,14 +19,32 @@ from interfaces.tts_interface import TTSInterface
 from stt.factory import STTFactory
 from nlu.factory import NLUFactory
 from tts.factory import TTSFactory
+from app.engine_pool import EnginePool
+from runtime.inference_executor import configure_inference_executor, get_inference_executor
+from stt.streaming import StreamingTranscriber, EventCallback
+from stt.audio_io import SAMPLE_RATE, decode_audio_bytes
+from stt.vad import EnergyVAD, TrimResult
+from tts.tts_cache import TTSCache
+from tts.audio_store import TTSAudioStore, encode_base64_reference
+from tts.wav_stream import WavStreamMerger
+from runtime.metrics import get_metrics_registry, cache_metrics, CollectedMetric
 
 logger = logging.getLogger(__name__)
 
+# 各阶段耗时与失败次数（stage: vad / stt / nlu / nlu_batch / tts）
+_metrics = get_metrics_registry()
+STAGE_DURATION = _metrics.histogram("nlp_stage_duration_seconds", "各处理阶段耗时（秒）", ("stage", "engine"))
+STAGE_ERRORS = _metrics.counter("nlp_stage_errors_total", "各处理阶段失败次数", ("stage", "engine"))
+REQUEST_DURATION = _metrics.histogram("nlp_request_duration_seconds", "请求端到端耗时（秒）", ("input_type",))
+
 class NLPServiceOrchestrator:
     """
     核心编排器类：负责协调STT、NLU和TTS服务的工作流。
     """
     
+    # TTS音频的交付方式
+    TTS_DELIVERY_MODES = ('base64', 'reference', 'multipart', 'pipelined')
+    
     def __init__(self, config_path: Optional[str] = None):
         """
         初始化NLPServiceOrchestrator，加载配置并初始化各个引擎。
@@ -36,12 +57,75 @@ class NLPServiceOrchestrator:
         self._fix_config_paths()
         logger.info("配置加载完成")
         
+        # 阻塞的模型推理统一提交到专用执行器，不占用事件循环
+        self.inference_executor = configure_inference_executor(self.config.get('inference_executor', {}))
+        
+        # 引擎实例池：按请求切换引擎时复用已创建的实例
+        pool_config = self.config.get('engine_pool', {}) or {}
+        self.engine_pool = EnginePool(
+            max_engines=pool_config.get('max_engines', 6),
+            max_memory_mb=pool_config.get('max_memory_mb')
+        )
+        
+        # 批量文本接口单次请求的最大条数
+        self.max_text_batch_items = (self.config.get('text_batch', {}) or {}).get('max_items', 256)
+        
+        # STT前的静音裁剪
+        vad_config = self.config.get('stt_vad', {}) or {}
+        self.vad_enabled = vad_config.get('enabled', False)
+        self.vad = EnergyVAD(
+            frame_ms=vad_config.get('frame_ms', 30.0),
+            noise_margin_db=vad_config.get('noise_margin_db', 12.0),
+            min_threshold_db=vad_config.get('min_threshold_db', -65.0)
+        )
+        self.vad_padding_ms = vad_config.get('padding_ms', 200.0)
+        self.vad_min_speech_ms = vad_config.get('min_speech_ms', 200.0)
+        
+        # TTS缓存：模板化的响应文本只合成一次
+        tts_cache_config = self.config.get('tts_cache', {}) or {}
+        self.tts_cache: Optional[TTSCache] = None
+        if tts_cache_config.get('enabled', True):
+            self.tts_cache = TTSCache(
+                max_entries=tts_cache_config.get('max_entries', 512),
+                max_memory_mb=tts_cache_config.get('max_memory_mb', 64),
+                disk_dir=tts_cache_config.get('disk_dir'),
+                max_disk_mb=tts_cache_config.get('max_disk_mb', 256)
+            )
+        
+        # TTS音频交付方式：base64内嵌在JSON中，或暂存在内存中按ID下载 / 随multipart响应返回
+        tts_delivery_config = self.config.get('tts_delivery', {}) or {}
+        self.default_tts_delivery = tts_delivery_config.get('mode', 'base64')
+        if self.default_tts_delivery not in self.TTS_DELIVERY_MODES:
+            logger.warning(f"未知的TTS交付方式 '{self.default_tts_delivery}'，使用base64")
+            self.default_tts_delivery = 'base64'
+        self.tts_audio_store = TTSAudioStore(
+            max_entries=tts_delivery_config.get('max_entries', 256),
+            max_memory_mb=tts_delivery_config.get('max_memory_mb', 64),
+            ttl_seconds=tts_delivery_config.get('ttl_seconds', 300)
+        )
+        # 流水线模式下下载方等待音频合成完成的最长时间（秒）
+        self.tts_pipelined_wait_seconds = tts_delivery_config.get('pipelined_wait_seconds', 30)
+        # 流水线模式下在后台执行的TTS任务（保留引用，避免任务被回收）
+        self._background_tts_tasks: Set[asyncio.Task] = set()
+        
         # 初始化STT、NLU和TTS引擎
         self.stt_engine = self._init_stt_engine()
         self.nlu_engine = self._init_nlu_engine()
         self.tts_engine = self._init_tts_engine()
         
+        # 默认引擎固定在池中，不参与淘汰
+        self.engine_pool.put('stt', self._build_stt_config(), self.stt_engine, pinned=True)
+        self.engine_pool.put('nlu', self._build_nlu_config(), self.nlu_engine, pinned=True)
+        self.engine_pool.put('tts', self._build_tts_config(), self.tts_engine, pinned=True)
+        
         logger.info("所有引擎初始化完成")
+        
+        # /metrics 导出时采集缓存命中率、执行器排队深度等已有统计
+        get_metrics_registry().register_collector(self._collect_metrics)
+        
+        # 预热STT模型，避免首个请求承担模型加载开销
+        if self.config.get('stt', {}).get('warmup', True):
+            self._warmup_stt_engine(self.stt_engine)
     
     def _load_config(self, config_path: Optional[str] = None) -> Dict:
         """
@@ -89,9 +173,75 @@ class NLPServiceOrchestrator:
         # RAG知识库
         if 'rag_data_jsonl_path' in self.config:
             self.config['rag_data_jsonl_path'] = to_abs(self.config['rag_data_jsonl_path'])
+        # DeepSeek结果缓存持久化文件
+        response_cache_config = self.config.get('deepseek_config', {}).get('response_cache') or {}
+        if response_cache_config.get('persist_path'):
+            response_cache_config['persist_path'] = to_abs(response_cache_config['persist_path'])
         # RAG embedding
         if 'rag_embedding_config' in self.config and 'local_embedding_target_dir' in self.config['rag_embedding_config']:
             self.config['rag_embedding_config']['local_embedding_target_dir'] = to_abs(self.config['rag_embedding_config']['local_embedding_target_dir'])
+        if 'rag_embedding_config' in self.config and self.config['rag_embedding_config'].get('index_dir'):
+            self.config['rag_embedding_config']['index_dir'] = to_abs(self.config['rag_embedding_config']['index_dir'])
+        # TTS磁盘缓存
+        if self.config.get('tts_cache', {}) and self.config['tts_cache'].get('disk_dir'):
+            self.config['tts_cache']['disk_dir'] = to_abs(self.config['tts_cache']['disk_dir'])
+    
+    def _build_stt_config(self, engine_type: Optional[str] = None) -> Dict:
+        """
+        构建STT引擎配置
+        
+        Args:
+            engine_type: 覆盖配置中的引擎类型，None表示使用默认引擎
+            
+        Returns:
+            STT引擎配置字典
+        """
+        stt_config = dict(self.config.get('stt', {'engine': 'placeholder'}))
+        if engine_type:
+            stt_config['engine'] = engine_type
+        return stt_config
+    
+    def _build_nlu_config(self, engine_type: Optional[str] = None) -> Dict:
+        """
+        构建NLU引擎配置，并按引擎类型合并顶层专用配置
+        
+        Args:
+            engine_type: 覆盖配置中的引擎类型，None表示使用默认引擎
+            
+        Returns:
+            NLU引擎配置字典
+        """
+        nlu_config = dict(self.config.get('nlu', {'engine': 'placeholder'}))
+        if engine_type:
+            nlu_config['engine'] = engine_type
+        # 合并顶层配置
+        if nlu_config.get('engine') == 'nlu_orchestrator':
+            nlu_config['bert_nlu_config'] = self.config.get('bert_nlu_config', {})
+            nlu_config['rag_data_jsonl_path'] = self.config.get('rag_data_jsonl_path')
+            nlu_config['rag_embedding_config'] = self.config.get('rag_embedding_config', {})
+            nlu_config['rag_similarity_threshold'] = self.config.get('rag_similarity_threshold', 250)
+        elif nlu_config.get('engine') == 'deepseek':
+            # 合并deepseek配置
+            deepseek_config = self.config.get('deepseek_config', {})
+            for key, value in deepseek_config.items():
+                if key not in nlu_config:
+                    nlu_config[key] = value
+        return nlu_config
+    
+    def _build_tts_config(self, engine_type: Optional[str] = None) -> Dict:
+        """
+        构建TTS引擎配置
+        
+        Args:
+            engine_type: 覆盖配置中的引擎类型，None表示使用默认引擎
+            
+        Returns:
+            TTS引擎配置字典
+        """
+        tts_config = dict(self.config.get('tts', {'engine': 'placeholder'}))
+        if engine_type:
+            tts_config['engine'] = engine_type
+        return tts_config
     
     def _init_stt_engine(self) -> STTInterface:
         """
@@ -101,7 +251,7 @@ class NLPServiceOrchestrator:
             STT引擎实例
         """
         try:
-            stt_config = self.config.get('stt', {'engine': 'placeholder'})
+            stt_config = self._build_stt_config()
             stt_factory = STTFactory()
             return stt_factory.create_engine(stt_config)
         except Exception as e:
@@ -109,6 +259,18 @@ class NLPServiceOrchestrator:
             # 如果失败，使用STTFactory中的默认引擎
             return STTFactory().create_engine({'engine': 'placeholder'})
     
+    def _warmup_stt_engine(self, engine: STTInterface) -> None:
+        """
+        预热STT引擎，失败时仅记录日志，不影响服务启动
+        
+        Args:
+            engine: STT引擎实例
+        """
+        try:
+            engine.warmup()
+        except Exception as e:
+            logger.warning(f"STT引擎预热失败: {str(e)}")
+    
     def _init_nlu_engine(self) -> NLUInterface:
         """
         初始化NLU引擎
@@ -117,19 +279,7 @@ class NLPServiceOrchestrator:
             NLU引擎实例
         """
         try:
-            nlu_config = self.config.get('nlu', {'engine': 'placeholder'}).copy()
-            # 合并顶层配置
-            if nlu_config.get('engine') == 'nlu_orchestrator':
-                nlu_config['bert_nlu_config'] = self.config.get('bert_nlu_config', {})
-                nlu_config['rag_data_jsonl_path'] = self.config.get('rag_data_jsonl_path')
-                nlu_config['rag_embedding_config'] = self.config.get('rag_embedding_config', {})
-                nlu_config['rag_similarity_threshold'] = self.config.get('rag_similarity_threshold', 250)
-            elif nlu_config.get('engine') == 'deepseek':
-                # 合并deepseek配置
-                deepseek_config = self.config.get('deepseek_config', {})
-                for key, value in deepseek_config.items():
-                    if key not in nlu_config:
-                        nlu_config[key] = value
+            nlu_config = self._build_nlu_config()
             nlu_factory = NLUFactory()
             return nlu_factory.create_engine(nlu_config)
         except Exception as e:
@@ -144,7 +294,7 @@ class NLPServiceOrchestrator:
             TTS引擎实例
         """
         try:
-            tts_config = self.config.get('tts', {'engine': 'placeholder'})
+            tts_config = self._build_tts_config()
             tts_factory = TTSFactory()
             return tts_factory.create_engine(tts_config)
         except Exception as e:
@@ -152,132 +302,556 @@ class NLPServiceOrchestrator:
             # 如果失败，使用TTSFactory中的默认引擎
             return TTSFactory().create_engine({'engine': 'placeholder'})
     
-    async def _perform_stt(self, audio_data: bytes) -> str:
+    async def _resolve_engines(self, settings: Dict,
+                         kinds: Tuple[str, ...] = ('stt', 'nlu', 'tts')) -> Dict[str, Union[STTInterface, NLUInterface, TTSInterface]]:
+        """
+        根据请求settings从引擎池中租用本次请求使用的引擎，不修改共享的默认引擎
+        
+        返回的每个引擎都登记了一次租用，使用完毕后必须调用 _release_engines 归还
+        （通常通过 _leased_engines 上下文管理器）。
+        
+        Args:
+            settings: 请求设置，可包含 stt_engine / nlu_engine / tts_engine
+            kinds: 需要解析的引擎类别
+            
+        Returns:
+            包含 'stt'、'nlu'、'tts' 三个引擎实例的字典
+        """
+        engines = {
+            'stt': self.stt_engine,
+            'nlu': self.nlu_engine,
+            'tts': self.tts_engine,
+        }
+        creators = {
+            'stt': (self._build_stt_config, STTFactory().create_engine),
+            'nlu': (self._build_nlu_config, NLUFactory().create_engine),
+            'tts': (self._build_tts_config, TTSFactory().create_engine),
+        }
+        leased = {}
+        try:
+            for kind, default_engine in engines.items():
+                engine_type = settings.get(f'{kind}_engine') if kind in kinds else None
+                if engine_type:
+                    build_config, create_engine = creators[kind]
+                    leased[kind] = await self.engine_pool.get_or_create(kind, build_config(engine_type), create_engine)
+                else:
+                    leased[kind] = self.engine_pool.acquire(default_engine)
+        except BaseException:
+            self._release_engines(leased)
+            raise
+        return leased
+    
+    def _release_engines(self, engines: Dict[str, Union[STTInterface, NLUInterface, TTSInterface]]) -> None:
+        """
+        归还 _resolve_engines 租用的引擎
+        """
+        for engine in engines.values():
+            self.engine_pool.release(engine)
+    
+    @asynccontextmanager
+    async def _leased_engines(self, settings: Dict,
+                              kinds: Tuple[str, ...] = ('stt', 'nlu', 'tts')) -> AsyncIterator[Dict]:
+        """
+        在上下文范围内租用本次请求的引擎，退出时自动归还
+        """
+        engines = await self._resolve_engines(settings, kinds)
+        try:
+            yield engines
+        finally:
+            self._release_engines(engines)
+    
+    def _collect_metrics(self) -> List[CollectedMetric]:
+        """
+        指标采集器：把各组件 stats() 中的缓存命中、排队深度等数据转换为Prometheus指标
+        """
+        # 引擎私有的缓存带 engine 标签（池中实例的标签），多个NLU引擎的同名缓存不会互相覆盖；
+        # 进程共享的缓存 engine 标签为空
+        caches: List[Tuple[Dict[str, str], Dict]] = []
+        if self.tts_cache is not None:
+            caches.append(({'cache': 'tts_audio', 'engine': ''}, self.tts_cache.stats()))
+        seen = []
+        for label, engine in self.engine_pool.labeled_engines('nlu'):
+            if any(engine is e for e in seen):
+                continue
+            seen.append(engine)
+            rag_system = getattr(engine, 'rag_system', None)
+            if rag_system is not None and hasattr(rag_system, 'cache_stats'):
+                for name, stats in rag_system.cache_stats().items():
+                    caches.append(({'cache': f"rag_{name}", 'engine': label}, stats))
+            response_cache = getattr(engine, 'response_cache', None)
+            if response_cache is not None:
+                caches.append(({'cache': 'deepseek_response', 'engine': label}, response_cache.stats()))
+        
+        executor_stats = self.inference_executor.stats()
+        pool_stats = self.engine_pool.stats()
+        caches.append(({'cache': 'engine_pool', 'engine': ''}, pool_stats))
+        return cache_metrics(caches) + [
+            ("nlp_executor_queue_depth", "gauge", "推理执行器当前排队数",
+             [({"engine": engine}, float(stats["queue_depth"])) for engine, stats in executor_stats.items()]),
+            ("nlp_executor_running", "gauge", "推理执行器当前运行数",
+             [({"engine": engine}, float(stats["running"])) for engine, stats in executor_stats.items()]),
+            ("nlp_engine_pool_evictions_total", "counter", "引擎池淘汰次数",
+             [({}, float(pool_stats.get("evictions", 0)))]),
+            ("nlp_tts_pipelined_pending", "gauge", "流水线模式下仍在合成的TTS音频数",
+             [({}, float(self.tts_audio_store.stats()["pending"]))]),
+        ]
+    
+    async def reload_rag_knowledge_base(self, force: bool = False) -> List[Dict]:
+        """
+        热更新RAG知识库：默认NLU引擎和引擎池中所有带RAG检索器的引擎都会增量重建索引，
+        重建期间查询继续使用旧索引
+        
+        Args:
+            force: 知识库文件内容未变化时也强制重建
+            
+        Returns:
+            每个检索器的重载结果
+        """
+        retrievers = []
+        for engine in [self.nlu_engine] + self.engine_pool.engines('nlu'):
+            rag_system = getattr(engine, 'rag_system', None)
+            if rag_system is not None and all(rag_system is not r for r in retrievers):
+                retrievers.append(rag_system)
+        
+        results = []
+        for rag_system in retrievers:
+            # 增量embedding是阻塞计算，放到推理执行器中执行
+            result = await get_inference_executor().run("rag_reload", rag_system.reload_knowledge_base, force)
+            result['knowledge_base_path'] = str(rag_system.knowledge_base_path)
+            results.append(result)
+        if not results:
+            logger.warning("没有可重载的RAG检索器（当前NLU引擎未启用RAG）")
+        return results
+    
+    async def close(self) -> None:
+        """
+        服务退出时释放各引擎持有的外部资源（例如TTS合成工作进程、LLM的HTTP连接池），并把NLU结果缓存写盘
+        """
+        await self.engine_pool.aclose()
+        logger.info("NLP服务编排器已关闭")
+    
+    async def _perform_stt(self, audio_data: bytes, stt_engine: Optional[STTInterface] = None,
+                           trim_result: Optional[TrimResult] = None) -> str:
         """
         执行语音转文字
         
         Args:
             audio_data: 音频数据
+            stt_engine: 本次请求使用的STT引擎，None表示默认引擎
+            trim_result: 已裁剪静音的音频，提供时直接识别波形
             
         Returns:
             识别出的文本
         """
+        engine = stt_engine or self.stt_engine
+        engine_name = type(engine).__name__
         try:
-            return await self.stt_engine.transcribe(audio_data)
+            with STAGE_DURATION.time(stage="stt", engine=engine_name):
+                if trim_result is not None:
+                    return await engine.transcribe_waveform(trim_result.audio)
+                return await engine.transcribe(audio_data)
         except Exception as e:
+            STAGE_ERRORS.inc(stage="stt", engine=engine_name)
             logger.error(f"STT转换失败: {str(e)}")
             return ""
     
-    async def _perform_nlu(self, text: str) -> Dict:
+    async def _trim_silence(self, audio_data: bytes) -> Optional[TrimResult]:
+        """
+        解码音频并裁剪首尾静音（在推理执行器中执行）
+        
+        Args:
+            audio_data: 音频数据
+            
+        Returns:
+            TrimResult；未启用VAD或解码失败时返回None，由STT引擎直接处理原始字节
+        """
+        if not self.vad_enabled:
+            return None
+        
+        def decode_and_trim() -> TrimResult:
+            waveform = decode_audio_bytes(audio_data)
+            return self.vad.trim(waveform, padding_ms=self.vad_padding_ms, min_speech_ms=self.vad_min_speech_ms)
+        
+        try:
+            with STAGE_DURATION.time(stage="vad", engine="energy_vad"):
+                trim_result = await get_inference_executor().run("audio_decode", decode_and_trim)
+        except Exception as e:
+            STAGE_ERRORS.inc(stage="vad", engine="energy_vad")
+            logger.warning(f"音频解码失败，跳过静音裁剪: {str(e)}")
+            return None
+        logger.info(
+            f"静音裁剪: 原始时长 {trim_result.original_duration:.2f}s, "
+            f"语音时长 {trim_result.trimmed_duration:.2f}s, 检测到语音: {trim_result.has_speech}"
+        )
+        return trim_result
+    
+    async def _perform_nlu(self, text: str, nlu_engine: Optional[NLUInterface] = None) -> Dict:
         """
         执行自然语言理解
         
         Args:
             text: 输入文本
+            nlu_engine: 本次请求使用的NLU引擎，None表示默认引擎
             
         Returns:
             NLU处理结果字典，包含五元组和响应消息
         """
+        engine = nlu_engine or self.nlu_engine
+        engine_name = type(engine).__name__
         try:
-            nlu_result = await self.nlu_engine.understand(text)
-            
-            # 确保结果中包含五元组字段
-            for field in ["ACTION", "DEVICE_TYPE", "DEVICE_ID", "LOCATION", "PARAMETER"]:
-                if field not in nlu_result:
-                    nlu_result[field] = None if field != "DEVICE_ID" else "0"
-            
-            # 生成响应消息并添加到结果中
-            response_message = self._generate_response_message(nlu_result)
-            nlu_result["response_message_for_tts"] = response_message
-            
-            return nlu_result
+            with STAGE_DURATION.time(stage="nlu", engine=engine_name):
+                nlu_result = await engine.understand(text)
+            return self._finalize_nlu_result(nlu_result)
         except Exception as e:
+            STAGE_ERRORS.inc(stage="nlu", engine=engine_name)
             logger.error(f"NLU处理失败: {str(e)}")
-            return {
-                'ACTION': 'UNKNOWN', 
-                'DEVICE_TYPE': None,
-                'DEVICE_ID': "0",
-                'LOCATION': None,
-                'PARAMETER': None,
-                'response_message_for_tts': '抱歉，我没能理解您的意思'
-            }
+            return self._nlu_failure_result()
     
-    def _convert_file_to_base64(self, file_path: str) -> Optional[str]:
+    async def _perform_nlu_batch(self, texts: List[str], nlu_engine: Optional[NLUInterface] = None) -> List[Dict]:
         """
-        将音频文件转换为base64编码
+        批量执行自然语言理解，批量推理失败时逐条回退
         
         Args:
-            file_path: 音频文件路径
+            texts: 输入文本列表
+            nlu_engine: 本次请求使用的NLU引擎，None表示默认引擎
             
         Returns:
-            base64编码的字符串，格式为 "base64://DATA"
-            如果转换失败则返回None
+            与输入等长的NLU结果列表
         """
+        engine = nlu_engine or self.nlu_engine
+        engine_name = type(engine).__name__
         try:
-            # 尝试多种路径拼接方式，确保能找到文件
-            possible_paths = [
-                # 1. 使用原始路径（可能是绝对路径）
-                file_path,
-                # 2. 相对于project_root
-                os.path.join(self.project_root, file_path),
-                # 3. 相对于nlp_service目录（可能是TTS引擎返回的）
-                os.path.join(self.project_root, "nlp_service", file_path)
-            ]
+            with STAGE_DURATION.time(stage="nlu_batch", engine=engine_name):
+                nlu_results = await engine.understand_batch(texts)
+            return [self._finalize_nlu_result(nlu_result) for nlu_result in nlu_results]
+        except Exception as e:
+            STAGE_ERRORS.inc(stage="nlu_batch", engine=engine_name)
+            logger.error(f"批量NLU处理失败，逐条重试: {str(e)}")
+            return [await self._perform_nlu(text, engine) for text in texts]
+    
+    def _finalize_nlu_result(self, nlu_result: Dict) -> Dict:
+        """
+        补全五元组字段并生成响应消息
+        """
+        # 确保结果中包含五元组字段
+        for field in ["ACTION", "DEVICE_TYPE", "DEVICE_ID", "LOCATION", "PARAMETER"]:
+            if field not in nlu_result:
+                nlu_result[field] = None if field != "DEVICE_ID" else "0"
+        
+        # 生成响应消息并添加到结果中
+        response_message = self._generate_response_message(nlu_result)
+        nlu_result["response_message_for_tts"] = response_message
+        
+        return nlu_result
+    
+    @staticmethod
+    def _nlu_failure_result() -> Dict:
+        return {
+            'ACTION': 'UNKNOWN', 
+            'DEVICE_TYPE': None,
+            'DEVICE_ID': "0",
+            'LOCATION': None,
+            'PARAMETER': None,
+            'response_message_for_tts': '抱歉，我没能理解您的意思'
+        }
+    
+    def _resolve_audio_path(self, file_path: str) -> Optional[str]:
+        """
+        查找TTS引擎返回的音频文件的实际路径
+        
+        Args:
+            file_path: 音频文件路径
             
-            # 找到第一个存在的文件路径
-            abs_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    abs_path = path
-                    logger.info(f"找到音频文件路径: {abs_path}")
-                    break
-                else:
-                    logger.debug(f"尝试路径不存在: {path}")
+        Returns:
+            第一个存在的路径，找不到时返回None
+        """
+        # 尝试多种路径拼接方式，确保能找到文件
+        possible_paths = [
+            # 1. 使用原始路径（可能是绝对路径）
+            file_path,
+            # 2. 相对于project_root
+            os.path.join(self.project_root, file_path),
+            # 3. 相对于nlp_service目录（可能是TTS引擎返回的）
+            os.path.join(self.project_root, "nlp_service", file_path)
+        ]
+        
+        for path in possible_paths:
+            if os.path.exists(path):
+                logger.info(f"找到音频文件路径: {path}")
+                return path
+            logger.debug(f"尝试路径不存在: {path}")
+        
+        logger.error(f"所有尝试路径均不存在: {possible_paths}")
+        return None
+    
+    def _read_tts_output(self, file_path: str) -> Optional[bytes]:
+        """
+        读取TTS引擎生成的音频文件
+        
+        Args:
+            file_path: 音频文件路径
             
-            # 如果没有找到有效路径
+        Returns:
+            音频字节，读取失败时返回None
+        """
+        try:
+            abs_path = self._resolve_audio_path(file_path)
             if not abs_path:
-                logger.error(f"所有尝试路径均不存在: {possible_paths}")
                 return None
-                
-            # 读取文件内容并转换为base64
             with open(abs_path, "rb") as f:
-                audio_bytes = f.read()
-                base64_data = base64.b64encode(audio_bytes).decode("utf-8")
-                return f"base64://{base64_data}"
-                
+                return f.read()
         except Exception as e:
-            logger.error(f"转换音频文件到base64失败: {str(e)}")
+            logger.error(f"读取音频文件失败: {str(e)}")
             return None
     
-    async def _perform_tts(self, text_to_speak: str) -> Union[str, bytes, None]:
+    async def _perform_tts(self, text_to_speak: str, tts_engine: Optional[TTSInterface] = None) -> Union[str, bytes, None]:
         """
-        执行文字转语音
+        执行文字转语音，相同文本和音色参数的结果从TTS缓存中直接返回
         
         Args:
             text_to_speak: 要转换为语音的文本
+            tts_engine: 本次请求使用的TTS引擎，None表示默认引擎
             
         Returns:
-            TTS音频的URL、Base64编码的字节数据，或None
+            原始音频字节；引擎返回URL或base64引用时原样返回；失败时返回None
         """
         try:
-            result = await self.tts_engine.synthesize(text_to_speak)
+            engine = tts_engine or self.tts_engine
+            cache_key = None
+            if self.tts_cache is not None and text_to_speak:
+                cache_key = TTSCache.make_key(text_to_speak, getattr(engine, 'config', None) or {})
+                cached = self.tts_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"TTS缓存命中: {text_to_speak}")
+                    return cached
+            
+            # 只统计实际合成的耗时，缓存命中体现在缓存命中率指标中
+            with STAGE_DURATION.time(stage="tts", engine=type(engine).__name__):
+                result = await engine.synthesize(text_to_speak)
             
             # 检查结果类型
             if isinstance(result, str):
-                # 如果是路径，则转换为base64
-                if os.path.exists(os.path.join(self.project_root, result)) or os.path.exists(result):
-                    logger.info(f"将音频文件路径转换为base64: {result}")
-                    return self._convert_file_to_base64(result)
                 # 如果已经是URL或base64格式，直接返回
-                elif result.startswith(('http://', 'https://', 'base64://')):
+                if result.startswith(('http://', 'https://', 'base64://')):
                     return result
-                    
-            # 返回原始结果
+                # 兼容返回文件路径的引擎：读取为音频字节
+                logger.info(f"读取TTS引擎输出的音频文件: {result}")
+                result = self._read_tts_output(result)
+            
+            if isinstance(result, (bytes, bytearray)):
+                audio_bytes = bytes(result)
+                if cache_key is not None:
+                    self.tts_cache.put(cache_key, audio_bytes)
+                return audio_bytes
             return result
         except Exception as e:
+            STAGE_ERRORS.inc(stage="tts", engine=type(tts_engine or self.tts_engine).__name__)
             logger.error(f"TTS转换失败: {str(e)}")
             return None
     
+    async def stream_tts(self, text: str, settings: Dict) -> AsyncIterator[bytes]:
+        """
+        逐句合成并产出一条连续的WAV音频流，首句合成完成即可开始播放
+        
+        Args:
+            text: 要转换为语音的文本（例如较长的大模型回复）
+            settings: 请求设置，可包含 tts_engine
+            
+        Yields:
+            WAV音频流的字节块（首块包含长度未知的WAV头）
+        """
+        async with self._leased_engines(settings, kinds=('tts',)) as engines:
+            tts_engine = engines['tts']
+            lookahead = (self.config.get('tts_streaming', {}) or {}).get('lookahead', 2)
+            merger = WavStreamMerger()
+            
+            # 整段文本已缓存（例如预热过的常用回复）时直接输出
+            if self.tts_cache is not None and text:
+                cached = self.tts_cache.get(TTSCache.make_key(text, getattr(tts_engine, 'config', None) or {}))
+                if cached is not None:
+                    logger.info(f"TTS缓存命中: {text}")
+                    yield merger.feed(cached)
+                    return
+            
+            # 逐句合成经过 _perform_tts：每句先查TTS缓存，合成结果写回缓存
+            async def synthesize_segment(segment: str) -> Union[str, bytes, None]:
+                return await self._perform_tts(segment, tts_engine)
+            
+            async for audio_bytes in tts_engine.synthesize_stream(text, lookahead=lookahead, synthesize_fn=synthesize_segment):
+                yield merger.feed(audio_bytes)
+    
+    def resolve_tts_delivery(self, settings: Dict) -> str:
+        """
+        获取本次请求的TTS音频交付方式
+        
+        Args:
+            settings: 请求设置，可包含 tts_delivery
+            
+        Returns:
+            以下之一：
+            - 'base64'：音频以 base64:// 引用内嵌在结果中
+            - 'reference'：结果只带音频ID和下载地址 GET /tts/{id}
+            - 'multipart'：结果JSON与原始音频在同一个 multipart/mixed 响应中返回
+            - 'pipelined'：先返回五元组结果（tts_status 为 pending、带 tts_events_url），
+              音频在后台合成完成后通过 GET /tts/{id} 或 GET /tts/{id}/events 获取
+        """
+        delivery = settings.get('tts_delivery') or self.default_tts_delivery
+        if delivery not in self.TTS_DELIVERY_MODES:
+            logger.warning(f"未知的TTS交付方式 '{delivery}'，使用 {self.default_tts_delivery}")
+            return self.default_tts_delivery
+        return delivery
+    
+    def _deliver_tts_audio(self, audio: Union[str, bytes, None], tts_delivery: str) -> Optional[str]:
+        """
+        按交付方式生成 tts_output_reference
+        
+        Args:
+            audio: _perform_tts 的结果
+            tts_delivery: 'base64' 返回 "base64://DATA"；
+                          'reference' / 'multipart' 把音频暂存在内存中并返回音频ID
+        """
+        if audio is None or isinstance(audio, str):
+            return audio
+        if tts_delivery == 'base64':
+            return encode_base64_reference(audio)
+        return self.tts_audio_store.put(audio)
+    
+    def _start_pipelined_tts(self, text_to_speak: str, tts_engine: TTSInterface) -> str:
+        """
+        预留音频ID并在后台执行TTS，不等待合成完成（流水线模式）
+        
+        Args:
+            text_to_speak: 要转换为语音的文本
+            tts_engine: 本次请求使用的TTS引擎
+            
+        Returns:
+            音频ID，合成完成后可通过 GET /tts/{id} 或 GET /tts/{id}/events 获取
+        """
+        audio_id = self.tts_audio_store.reserve()
+        # 后台任务可能在请求返回后才执行完，单独租用TTS引擎
+        self.engine_pool.acquire(tts_engine)
+        
+        async def synthesize() -> None:
+            try:
+                audio = await self._perform_tts(text_to_speak, tts_engine)
+                if isinstance(audio, str) and audio.startswith('base64://'):
+                    audio = base64.b64decode(audio[len('base64://'):])
+                if isinstance(audio, (bytes, bytearray)):
+                    self.tts_audio_store.resolve(audio_id, bytes(audio))
+                    logger.info(f"流水线TTS完成: {audio_id}")
+                else:
+                    self.tts_audio_store.fail(audio_id, "TTS引擎未返回音频数据")
+            except asyncio.CancelledError:
+                self.tts_audio_store.fail(audio_id, "TTS任务已取消")
+                raise
+            except Exception as e:
+                logger.error(f"流水线TTS失败: {str(e)}")
+                self.tts_audio_store.fail(audio_id, str(e))
+            finally:
+                self.engine_pool.release(tts_engine)
+        
+        task = asyncio.create_task(synthesize())
+        self._background_tts_tasks.add(task)
+        task.add_done_callback(self._background_tts_tasks.discard)
+        return audio_id
+    
+    def _load_prewarm_texts(self) -> List[str]:
+        """
+        读取RAG知识库中的指令文本，作为TTS缓存预热的词表来源
+        """
+        kb_path = self.config.get('rag_data_jsonl_path')
+        texts = []
+        if not kb_path or not os.path.exists(kb_path):
+            logger.warning(f"知识库文件不存在，无法预热TTS缓存: {kb_path}")
+            return texts
+        with open(kb_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    text = json.loads(line).get('text')
+                except json.JSONDecodeError:
+                    continue
+                if text:
+                    texts.append(text)
+        return texts
+    
+    async def prewarm_tts_cache(self) -> Dict:
+        """
+        预热TTS缓存：用本地NLU解析知识库中的指令，收集动作、位置、设备词表，
+        合成知识库中实际出现的响应以及 动作×位置×设备 的模板组合
+        
+        Returns:
+            预热结果摘要
+        """
+        prewarm_config = (self.config.get('tts_cache', {}) or {}).get('prewarm', {}) or {}
+        max_phrases = prewarm_config.get('max_phrases', 500)
+        summary = {'status': 'skipped', 'phrases': 0, 'synthesized': 0, 'cached': 0}
+        if self.tts_cache is None:
+            return summary
+        # 只使用本地模型解析知识库，不调用在线大模型
+        nlu_engine_type = self.config.get('nlu', {}).get('engine')
+        if nlu_engine_type not in ('nlu_orchestrator', 'fine_tuned_bert'):
+            logger.info(f"NLU引擎 {nlu_engine_type} 不是本地模型，跳过TTS缓存预热")
+            return summary
+        
+        start = time.perf_counter()
+        try:
+            texts = self._load_prewarm_texts()
+            nlu_results = []
+            batch_size = self.max_text_batch_items
+            for offset in range(0, len(texts), batch_size):
+                nlu_results.extend(await self._perform_nlu_batch(texts[offset: offset + batch_size]))
+        except Exception as e:
+            logger.error(f"TTS缓存预热失败: {str(e)}")
+            summary['status'] = 'error'
+            return summary
+        
+        # 先放知识库中实际出现的响应，再补充模板组合
+        phrases: Dict[str, None] = {}
+        actions, locations, device_types = {}, {None: None}, {}
+        for nlu_result in nlu_results:
+            message = nlu_result.get('response_message_for_tts')
+            if message:
+                phrases[message] = None
+            if nlu_result.get('ACTION') and nlu_result.get('ACTION') != 'UNKNOWN':
+                actions[nlu_result['ACTION']] = None
+            if nlu_result.get('LOCATION'):
+                locations[nlu_result['LOCATION']] = None
+            if nlu_result.get('DEVICE_TYPE'):
+                device_types[nlu_result['DEVICE_TYPE']] = None
+        phrases[self._generate_response_message({})] = None
+        for action in actions:
+            for location in locations:
+                for device_type in device_types:
+                    phrases[self._generate_response_message({
+                        'ACTION': action, 'LOCATION': location, 'DEVICE_TYPE': device_type, 'DEVICE_ID': '0'
+                    })] = None
+        
+        selected = list(phrases)[:max_phrases]
+        if len(phrases) > max_phrases:
+            logger.info(f"TTS预热短语共 {len(phrases)} 条，只合成前 {max_phrases} 条")
+        synthesized = 0
+        cached = 0
+        for phrase in selected:
+            key = TTSCache.make_key(phrase, getattr(self.tts_engine, 'config', None) or {})
+            if self.tts_cache.contains(key):
+                cached += 1
+                continue
+            if await self._perform_tts(phrase) is not None:
+                synthesized += 1
+        
+        summary = {
+            'status': 'ok',
+            'phrases': len(selected),
+            'synthesized': synthesized,
+            'cached': cached,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"TTS缓存预热完成: {summary}")
+        return summary
+    
     def _generate_response_message(self, nlu_result: Dict) -> str:
         """
         基于NLU五元组结果生成响应消息
@@ -320,142 +894,204 @@ class NLPServiceOrchestrator:
         """
         处理音频输入，执行STT、NLU和可选的TTS操作，支持根据settings动态切换引擎。
         """
-        try:
-            # 动态切换STT引擎
-            if 'stt_engine' in settings:
-                stt_config = self.config.get('stt', {}).copy()
-                stt_config['engine'] = settings['stt_engine']
-                self.stt_engine = STTFactory().create_engine(stt_config)
-            # 动态切换NLU引擎
-            if 'nlu_engine' in settings:
-                nlu_config = self.config.get('nlu', {}).copy()
-                nlu_config['engine'] = settings['nlu_engine']
-                if nlu_config['engine'] == 'nlu_orchestrator':
-                    nlu_config['bert_nlu_config'] = self.config.get('bert_nlu_config', {})
-                    nlu_config['rag_data_jsonl_path'] = self.config.get('rag_data_jsonl_path')
-                    nlu_config['rag_embedding_config'] = self.config.get('rag_embedding_config', {})
-                    nlu_config['rag_similarity_threshold'] = self.config.get('rag_similarity_threshold', 250)
-                self.nlu_engine = NLUFactory().create_engine(nlu_config)
-            # 动态切换TTS引擎
-            if 'tts_engine' in settings:
-                tts_config = self.config.get('tts', {}).copy()
-                tts_config['engine'] = settings['tts_engine']
-                self.tts_engine = TTSFactory().create_engine(tts_config)
-            
-            # 获取TTS启用状态，默认启用
-            tts_enabled = settings.get('tts_enabled', True)
-            logger.info(f"TTS启用状态: {tts_enabled}")
-            
-            # 执行STT
-            transcribed_text = await self._perform_stt(audio_data)
-            logger.info(f"STT结果: {transcribed_text}")
-            
-            # 执行NLU（返回带有response_message_for_tts的结果）
-            nlu_result = await self._perform_nlu(transcribed_text)
-            logger.info(f"NLU结果: {nlu_result}")
-            
-            # 使用NLU结果中的响应消息进行TTS，仅当tts_enabled为True时执行
-            response_message = nlu_result.get("response_message_for_tts", "")
-            tts_output_reference = None
-            if tts_enabled:
-                logger.info("TTS已启用，正在生成语音")
-                tts_output_reference = await self._perform_tts(response_message)
-            else:
-                logger.info("TTS已禁用，跳过语音生成")
-            
-            # 准备前端需要的五元组格式
-            five_tuple = {
-                "action": nlu_result.get("ACTION"),
-                "entity": nlu_result.get("DEVICE_TYPE"),
-                "device_id": nlu_result.get("DEVICE_ID", "0"),
-                "location": nlu_result.get("LOCATION"),
-                "parameter": nlu_result.get("PARAMETER")
-            }
+        with REQUEST_DURATION.time(input_type="audio"):
+            try:
+                # 按settings从引擎池租用本次请求的引擎，处理结束后归还
+                async with self._leased_engines(settings) as engines:
+                    # 获取TTS启用状态，默认启用
+                    tts_enabled = settings.get('tts_enabled', True)
+                    tts_delivery = self.resolve_tts_delivery(settings)
+                    logger.info(f"TTS启用状态: {tts_enabled}")
+                    
+                    # 裁剪首尾静音后再送入STT
+                    trim_result = await self._trim_silence(audio_data)
+                    stt_trim_result = trim_result
+                    if trim_result is not None and not trim_result.has_speech:
+                        # VAD可能误判电平很低的录音：仍然用原始音频执行STT，不直接返回错误
+                        logger.info("VAD未检测到语音，使用原始音频执行STT")
+                        stt_trim_result = None
+                    
+                    # 执行STT
+                    transcribed_text = await self._perform_stt(audio_data, engines['stt'], stt_trim_result)
+                    logger.info(f"STT结果: {transcribed_text}")
+                    
+                    # 执行NLU（返回带有response_message_for_tts的结果）
+                    nlu_result = await self._perform_nlu(transcribed_text, engines['nlu'])
+                    logger.info(f"NLU结果: {nlu_result}")
+                    
+                    # 执行可选的TTS并返回包含五元组的结果
+                    result = await self._complete_result('audio', transcribed_text, nlu_result, engines['tts'], tts_enabled, tts_delivery)
+                    if trim_result is not None:
+                        result.update(trim_result.to_dict())
+                    return result
+            except Exception as e:
+                logger.error(f"处理音频输入失败: {str(e)}")
+                return {
+                    'input_type': 'audio',
+                    'transcribed_text': None,
+                    'nlu_result': None,
+                    'response_message_for_tts': None,
+                    'tts_output_reference': None,
+                    'status': 'error',
+                    'error_message': str(e)
+                }
+    
+    async def create_audio_stream_session(self, settings: Dict, send_event: EventCallback,
+                                    sample_rate: int = SAMPLE_RATE) -> StreamingTranscriber:
+        """
+        创建一个流式语音识别会话：每段语音识别结束后立即执行NLU和可选的TTS，
+        结果以 {"type": "result", "segment": n, ...} 事件推送
+        
+        Args:
+            settings: 请求设置，与 /process_audio 相同
+            send_event: 向客户端推送事件的回调
+            sample_rate: 客户端PCM音频的采样率
             
-            # 返回包含五元组的结果
-            return {
-                'input_type': 'audio',
-                'transcribed_text': transcribed_text,
-                'nlu_result': five_tuple,  
-                'response_message_for_tts': response_message,
-                'tts_output_reference': tts_output_reference,
-                'status': 'success',
-                'error_message': None
-            }
-        except Exception as e:
-            logger.error(f"处理音频输入失败: {str(e)}")
-            return {
-                'input_type': 'audio',
-                'transcribed_text': None,
-                'nlu_result': None,
-                'response_message_for_tts': None,
-                'tts_output_reference': None,
-                'status': 'error',
-                'error_message': str(e)
-            }
+        Returns:
+            StreamingTranscriber会话（会话关闭时归还租用的引擎）
+        """
+        engines = await self._resolve_engines(settings)
+        tts_enabled = settings.get('tts_enabled', True)
+        tts_delivery = self.resolve_tts_delivery(settings)
+        
+        async def on_final(transcribed_text: str, segment: int) -> None:
+            nlu_result = await self._perform_nlu(transcribed_text, engines['nlu'])
+            logger.info(f"流式语音段 {segment} NLU结果: {nlu_result}")
+            result = await self._complete_result('audio', transcribed_text, nlu_result, engines['tts'], tts_enabled, tts_delivery)
+            await send_event({'type': 'result', 'segment': segment, **result})
+        
+        try:
+            return StreamingTranscriber(
+                engines['stt'],
+                self.config.get('stt_streaming', {}),
+                on_event=send_event,
+                on_final=on_final,
+                on_close=lambda: self._release_engines(engines),
+                sample_rate=sample_rate
+            )
+        except Exception:
+            # 会话未创建成功（例如需要重采样但未安装scipy），立即归还租用的引擎
+            self._release_engines(engines)
+            raise
     
     async def handle_text_input(self, text_input: str, settings: Dict) -> Dict:
         """
         处理文本输入，执行NLU和可选的TTS操作，支持根据settings动态切换引擎。
         """
-        try:
-            if 'nlu_engine' in settings:
-                nlu_config = self.config.get('nlu', {}).copy()
-                nlu_config['engine'] = settings['nlu_engine']
-                if nlu_config['engine'] == 'nlu_orchestrator':
-                    nlu_config['bert_nlu_config'] = self.config.get('bert_nlu_config', {})
-                    nlu_config['rag_data_jsonl_path'] = self.config.get('rag_data_jsonl_path')
-                    nlu_config['rag_embedding_config'] = self.config.get('rag_embedding_config', {})
-                    nlu_config['rag_similarity_threshold'] = self.config.get('rag_similarity_threshold', 250)
-                self.nlu_engine = NLUFactory().create_engine(nlu_config)
-                
-            if 'tts_engine' in settings:
-                tts_config = self.config.get('tts', {}).copy()
-                tts_config['engine'] = settings['tts_engine']
-                self.tts_engine = TTSFactory().create_engine(tts_config)
+        with REQUEST_DURATION.time(input_type="text"):
+            try:
+                # 按settings从引擎池租用本次请求的引擎（文本输入不需要STT），处理结束后归还
+                async with self._leased_engines(settings, kinds=('nlu', 'tts')) as engines:
+                    # 获取TTS启用状态，默认启用
+                    tts_enabled = settings.get('tts_enabled', True)
+                    tts_delivery = self.resolve_tts_delivery(settings)
+                    logger.info(f"TTS启用状态: {tts_enabled}")
+                    
+                    # 执行NLU
+                    nlu_result = await self._perform_nlu(text_input, engines['nlu'])
+                    logger.info(f"NLU结果: {nlu_result}")
+                    
+                    return await self._complete_result('text', text_input, nlu_result, engines['tts'], tts_enabled, tts_delivery)
+            except Exception as e:
+                logger.error(f"处理文本输入失败: {str(e)}")
+                return self._text_error_result(text_input, e)
+    
+    async def _complete_result(self, input_type: str, text_input: str, nlu_result: Dict,
+                               tts_engine: TTSInterface, tts_enabled: bool,
+                               tts_delivery: str = 'base64') -> Dict:
+        """
+        根据NLU结果执行可选的TTS，并组装返回给后端的响应
+        
+        Args:
+            input_type: 'audio' 或 'text'
+            text_input: 识别出的文本或用户输入的文本
+            nlu_result: _perform_nlu 的结果
+            tts_engine: 本次请求使用的TTS引擎
+            tts_enabled: 是否执行TTS
+            tts_delivery: TTS音频的交付方式，见 _deliver_tts_audio；
+                          'pipelined' 时不等待TTS，五元组立即返回，音频随后通过ID获取
+        """
+        # 使用NLU结果中的响应消息进行TTS，仅当tts_enabled为True时执行
+        response_message = nlu_result.get("response_message_for_tts", "")
+        tts_output_reference = None
+        if tts_enabled and tts_delivery == 'pipelined':
+            logger.info("TTS已启用（流水线模式），在后台生成语音")
+            tts_output_reference = self._start_pipelined_tts(response_message, tts_engine)
+        elif tts_enabled:
+            logger.info("TTS已启用，正在生成语音")
+            tts_audio = await self._perform_tts(response_message, tts_engine)
+            tts_output_reference = self._deliver_tts_audio(tts_audio, tts_delivery)
+        else:
+            logger.info("TTS已禁用，跳过语音生成")
+        
+        five_tuple = {
+            "action": nlu_result.get("ACTION"),
+            "entity": nlu_result.get("DEVICE_TYPE"),
+            "device_id": nlu_result.get("DEVICE_ID", "0"),
+            "location": nlu_result.get("LOCATION"),
+            "parameter": nlu_result.get("PARAMETER")
+        }
+        
+        result = {
+            'input_type': input_type,
+            'transcribed_text': text_input,
+            'nlu_result': five_tuple,  
+            'response_message_for_tts': response_message,
+            'tts_output_reference': tts_output_reference,
+            'status': 'success',
+            'error_message': None
+        }
+        if tts_delivery != 'base64' and tts_output_reference and not tts_output_reference.startswith(('http://', 'https://', 'base64://')):
+            result['tts_delivery'] = tts_delivery
+            result['tts_audio_url'] = f"/tts/{tts_output_reference}"
+            if tts_delivery == 'pipelined':
+                result['tts_status'] = 'pending'
+                result['tts_events_url'] = f"/tts/{tts_output_reference}/events"
+        return result
+    
+    @staticmethod
+    def _text_error_result(text_input: str, error: Exception) -> Dict:
+        return {
+            'input_type': 'text',
+            'transcribed_text': text_input,
+            'nlu_result': None,
+            'response_message_for_tts': None,
+            'tts_output_reference': None,
+            'status': 'error',
+            'error_message': str(error)
+        }
+    
+    async def stream_text_batch(self, text_inputs: List[str], settings: Dict) -> AsyncIterator[Dict]:
+        """
+        批量处理文本输入：所有文本一次批量NLU，然后按输入顺序逐条执行可选的TTS并立即产出结果
+        
+        Args:
+            text_inputs: 文本列表，共享同一组settings
+            settings: 请求设置
             
-            # 获取TTS启用状态，默认启用
+        Yields:
+            与handle_text_input相同格式的结果，额外带有 'index' 字段
+        """
+        if len(text_inputs) > self.max_text_batch_items:
+            raise ValueError(f"批量文本数量 {len(text_inputs)} 超过上限 {self.max_text_batch_items}")
+        
+        async with self._leased_engines(settings, kinds=('nlu', 'tts')) as engines:
             tts_enabled = settings.get('tts_enabled', True)
-            logger.info(f"TTS启用状态: {tts_enabled}")
-            
-            # 执行NLU
-            nlu_result = await self._perform_nlu(text_input)
-            logger.info(f"NLU结果: {nlu_result}")
-            
-            # 使用NLU结果中的响应消息进行TTS，仅当tts_enabled为True时执行
-            response_message = nlu_result.get("response_message_for_tts", "")
-            tts_output_reference = None
-            if tts_enabled:
-                logger.info("TTS已启用，正在生成语音")
-                tts_output_reference = await self._perform_tts(response_message)
-            else:
-                logger.info("TTS已禁用，跳过语音生成")
-            
-            five_tuple = {
-                "action": nlu_result.get("ACTION"),
-                "entity": nlu_result.get("DEVICE_TYPE"),
-                "device_id": nlu_result.get("DEVICE_ID", "0"),
-                "location": nlu_result.get("LOCATION"),
-                "parameter": nlu_result.get("PARAMETER")
-            }
+            tts_delivery = self.resolve_tts_delivery(settings)
+            logger.info(f"批量文本处理: {len(text_inputs)} 条, TTS启用状态: {tts_enabled}")
             
-            return {
-                'input_type': 'text',
-                'transcribed_text': text_input,
-                'nlu_result': five_tuple,  
-                'response_message_for_tts': response_message,
-                'tts_output_reference': tts_output_reference,
-                'status': 'success',
-                'error_message': None
-            }
-        except Exception as e:
-            logger.error(f"处理文本输入失败: {str(e)}")
-            return {
-                'input_type': 'text',
-                'transcribed_text': text_input,
-                'nlu_result': None,
-                'response_message_for_tts': None,
-                'tts_output_reference': None,
-                'status': 'error',
-                'error_message': str(e)
-            } 
\ No newline at end of file
+            nlu_results = await self._perform_nlu_batch(text_inputs, engines['nlu'])
+            for index, (text_input, nlu_result) in enumerate(zip(text_inputs, nlu_results)):
+                try:
+                    result = await self._complete_result('text', text_input, nlu_result, engines['tts'], tts_enabled, tts_delivery)
+                except Exception as e:
+                    logger.error(f"处理批量文本第 {index} 条失败: {str(e)}")
+                    result = self._text_error_result(text_input, e)
+                result['index'] = index
+                yield result
+    
+    async def handle_text_batch(self, text_inputs: List[str], settings: Dict) -> List[Dict]:
+        """
+        批量处理文本输入，返回与输入顺序一致的结果列表
+        """
+        return [result async for result in self.stream_text_batch(text_inputs, settings)] 
\ No newline at end of file
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, List
 
 class NLUInterface(ABC):
     """
@@ -17,4 +18,18 @@ class NLUInterface(ABC):
         Returns:
             包含理解结果的字典
         """
-        pass 
\ No newline at end of file
+        pass
+
+    async def understand_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        批量理解多条文本，结果顺序与输入一致
+
+        默认实现并发调用understand；支持批量推理的引擎可以重写为一次前向计算。
+        
+        Args:
+            texts: 输入文本列表
+            
+        Returns:
+            与输入等长的理解结果列表
+        """
+        return list(await asyncio.gather(*(self.understand(text) for text in texts)))
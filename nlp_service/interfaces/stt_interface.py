@@ -28,6 +28,28 @@ class STTInterface(ABC):
         """
         pass
     
+    async def transcribe_waveform(self, waveform) -> str:
+        """
+        将已解码的16kHz单声道float32波形转换为文本
+        
+        默认实现将波形编码为WAV后调用transcribe；支持直接处理波形的引擎应重写此方法，
+        省去编码和再次解码。
+        
+        Args:
+            waveform: float32波形数组，取值范围[-1, 1]
+            
+        Returns:
+            转换后的文本
+        """
+        from stt.audio_io import float32_to_wav_bytes
+        return await self.transcribe(float32_to_wav_bytes(waveform))
+    
+    def warmup(self) -> None:
+        """
+        预热引擎（加载模型、执行一次空推理），默认不做任何操作
+        """
+        pass
+    
     @abstractmethod
     def get_supported_formats(self) -> list:
         """
@@ -1,5 +1,39 @@
+import asyncio
+import re
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Union
+
+# 分句标点：中文句末/句中标点、英文句末标点和换行（英文句点后紧跟数字时是小数点，不切分）
+_SENTENCE_DELIMITERS = re.compile(r"((?:[。！？；!?;\n]|\.(?!\d))+|[，、,：:](?=.{8,}))")
+
+
+def split_text_for_tts(text: str, min_chars: int = 4) -> List[str]:
+    """
+    按中文标点把文本切分为适合逐句合成的片段
+
+    Args:
+        text: 要合成的文本
+        min_chars: 短于该长度的片段并入下一段，避免合成过碎
+
+    Returns:
+        片段列表（保留标点，以便合成时保留停顿）
+    """
+    pieces = _SENTENCE_DELIMITERS.split(text or "")
+    segments: List[str] = []
+    current = ""
+    # split保留分隔符：偶数位是正文，奇数位是标点
+    for i in range(0, len(pieces), 2):
+        current += pieces[i] + (pieces[i + 1] if i + 1 < len(pieces) else "")
+        if len(current.strip()) >= min_chars:
+            segments.append(current.strip())
+            current = ""
+    if current.strip():
+        if segments and len(current.strip()) < min_chars:
+            segments[-1] += current.strip()
+        else:
+            segments.append(current.strip())
+    return segments
+
 
 class TTSInterface(ABC):
     """
@@ -16,8 +50,42 @@ class TTSInterface(ABC):
             
         Returns:
             可以是以下之一：
+            - 原始音频数据的字节流（推荐，编排器直接在内存中交付）
             - 生成的音频文件的路径或URL
-            - 音频数据的字节流（可能是Base64编码的）
             - None（如果转换失败）
         """
-        pass 
\ No newline at end of file
+        pass 
+
+    async def synthesize_stream(self, text: str, lookahead: int = 2,
+                                synthesize_fn: Optional[Callable[[str], Awaitable[Union[str, bytes, None]]]] = None
+                                ) -> AsyncIterator[bytes]:
+        """
+        逐句合成语音，每句合成完成后立即产出，首段音频的等待时间与文本总长度无关
+
+        默认实现按标点分句并调用synthesize，同时预先合成后面 lookahead 句；
+        支持原生流式合成的引擎可以重写此方法。
+
+        Args:
+            text: 要转换为语音的文本
+            lookahead: 当前句之后并发合成的句数
+            synthesize_fn: 逐句合成使用的函数，默认为 self.synthesize（编排器传入带TTS缓存的合成函数）
+
+        Yields:
+            每句的音频字节（按原文顺序）
+        """
+        synthesize = synthesize_fn or self.synthesize
+        segments = split_text_for_tts(text)
+        pending: List[asyncio.Task] = []
+        next_index = 0
+        try:
+            while next_index < len(segments) or pending:
+                while next_index < len(segments) and len(pending) <= lookahead:
+                    pending.append(asyncio.ensure_future(synthesize(segments[next_index])))
+                    next_index += 1
+                audio = await pending.pop(0)
+                if isinstance(audio, (bytes, bytearray)) and audio:
+                    yield bytes(audio)
+        finally:
+            # 客户端中途断开时取消尚未完成的合成
+            for task in pending:
+                task.cancel()
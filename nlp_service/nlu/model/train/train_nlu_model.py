@@ -18,7 +18,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = "hfl/chinese-bert-wwm-ext"  # 预训练BERT模型
-MAX_SEQ_LENGTH = 128                     # 最大序列长度
+MAX_SEQ_LENGTH = 128                     # 最大序列长度（仅用于截断）
+PAD_TO_MULTIPLE_OF = 8                   # 动态填充时长度取整的倍数
 
 # SCRIPT_PATH 指向当前脚本 (train_nlu_model.py)
 SCRIPT_PATH = Path(__file__).resolve()
@@ -110,10 +111,10 @@ logger.info(f"加载tokenizer: {MODEL_NAME}...")
 tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
 
 def tokenize_and_align_labels(examples):
+    # 这里不做填充，由DataCollatorForTokenClassification按批次动态填充到实际长度
     tokenized_inputs = tokenizer(
         examples["text"],
         truncation=True,
-        padding="max_length", 
         max_length=MAX_SEQ_LENGTH,
         is_split_into_words=False 
     )
@@ -169,7 +170,7 @@ except Exception as e:
     exit()
 
 
-data_collator = DataCollatorForTokenClassification(tokenizer=tokenizer)
+data_collator = DataCollatorForTokenClassification(tokenizer=tokenizer, pad_to_multiple_of=PAD_TO_MULTIPLE_OF)
 
 # --- 4. 定义评估指标 ---
 def compute_metrics(eval_prediction):
@@ -235,6 +236,7 @@ training_args = TrainingArguments(
     metric_for_best_model="f1" if do_eval else None,
     greater_is_better=True if do_eval else None,
     report_to="none", 
+    group_by_length=True, # 按序列长度分桶组批，减少填充
     # optim="adamw_torch_fused" # For PyTorch >= 2.0, can provide speedup
     # fp16=torch.cuda.is_available(), # 如果有GPU且支持，可以开启FP16加速训练，但可能需要调整其他参数
 )
@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import os
 import sys
 import json
 import re
+import httpx
 import torch
 from pathlib import Path
 from typing import Dict, Optional, Any, List
@@ -14,6 +16,8 @@ import tempfile
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from interfaces.nlu_interface import NLUInterface
+from runtime.inference_executor import get_inference_executor
+from nlu.response_cache import NLUResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -33,16 +37,53 @@ class DeepSeekNLUProcessor(NLUInterface):
                 temperature (float, optional): 生成参数，控制随机性，默认为0.7
                 model (str, optional): 使用的模型名称，默认为'deepseek-chat'
                 model_path (str, optional): 用于BIO标记的本地模型路径
+                request_timeout (float, optional): 单次LLM调用超时时间（秒），默认为15
+                max_retries (int, optional): LLM调用失败重试次数，默认为1
+                max_concurrency (int, optional): 同时进行的LLM调用上限，默认为8
+                max_connections (int, optional): HTTP连接池大小，默认为16
+                response_cache (dict, optional): 结果缓存配置:
+                    enabled (bool): 是否启用，默认为True
+                    max_entries (int): 最大缓存条目数，默认为1024
+                    ttl_seconds (float): 条目存活时间（秒），默认为86400
+                    persist_path (str): 持久化文件路径，默认不持久化
+        
+        base_url 可以指向任意OpenAI兼容的服务（包括本地mock服务）进行测试。
         """
         self.config = config
         logger.info("初始化DeepSeekNLUProcessor...")
         
+        self.request_timeout = float(config.get("request_timeout", 15))
+        self.max_retries = int(config.get("max_retries", 1))
+        max_connections = int(config.get("max_connections", 16))
+        
+        # 复用连接的异步HTTP客户端，避免每次请求重新建立TLS连接
+        self.http_async_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=self.request_timeout
+        )
+        # 限制同时进行的LLM调用数
+        self.llm_semaphore = asyncio.Semaphore(int(config.get("max_concurrency", 8)))
+        
+        # 重复的家居指令直接命中缓存，不再消耗LLM调用
+        cache_config = config.get("response_cache") or {}
+        self.response_cache: Optional[NLUResponseCache] = None
+        if cache_config.get("enabled", True):
+            self.response_cache = NLUResponseCache(
+                max_entries=cache_config.get("max_entries", 1024),
+                ttl_seconds=cache_config.get("ttl_seconds", 86400),
+                persist_path=cache_config.get("persist_path")
+            )
+        
         # 初始化DeepSeek模型
         self.llm = ChatOpenAI(
             temperature=config.get("temperature", 0.7),
             model=config.get("model", "deepseek-chat"),
             api_key=config.get("api_key", "sk-070151a6fcd14bed867ac165a2fce23a"),  # 默认使用配置中的API密钥
-            base_url=config.get("base_url", "https://api.deepseek.com")
+            base_url=config.get("base_url", "https://api.deepseek.com"),
+            timeout=self.request_timeout,
+            max_retries=self.max_retries,
+            http_async_client=self.http_async_client
         )
         
         # 定义提示模板
@@ -52,7 +93,8 @@ class DeepSeekNLUProcessor(NLUInterface):
         你应该输出JSON格式，元素要求如下：
         {{
         "output":"对于这个问题的智能回答",
-        "operation":"具体做了什么操作对什么家具(中文)(如果有多个操作不能省略动词)(制冷制热后面要加模式)"
+        "operation":"具体做了什么操作对什么家具(中文)(如果有多个操作不能省略动词)(制冷制热后面要加模式)",
+        "action_class":"operation中主要动作的分类数字: 0-打开/启动/开启类, 1-关闭/停止类, 2-调成/设置类, 3-调高类, 4-降低类"
         }}
         """
         
@@ -98,8 +140,24 @@ class DeepSeekNLUProcessor(NLUInterface):
                 "operation": ""
             }
     
-    def _classify_action(self, action_text: str) -> int:
-        """使用LLM智能分类动作"""
+    async def _ainvoke(self, prompt) -> Any:
+        """带并发限制的异步LLM调用"""
+        # 超时与重试交给客户端：每次尝试限时 request_timeout，最多重试 max_retries 次（含退避等待），
+        # 外层不再另设期限，避免在退避后的重试即将成功时被提前取消
+        async with self.llm_semaphore:
+            return await self.llm.ainvoke(prompt)
+    
+    @staticmethod
+    def _parse_action_class(value: Any) -> Optional[int]:
+        """解析合并请求中返回的动作分类，无效时返回None"""
+        try:
+            action_class = int(str(value).strip())
+        except (TypeError, ValueError):
+            return None
+        return action_class if 0 <= action_class <= 4 else None
+    
+    async def _classify_action(self, action_text: str) -> int:
+        """使用LLM智能分类动作（仅在主请求未返回有效分类时调用）"""
         classification_prompt = f"""
         请将以下家居控制动作分类：
         动作: {action_text}
@@ -113,9 +171,9 @@ class DeepSeekNLUProcessor(NLUInterface):
         只需返回单个数字(0,1,2,3,4)，不要包含其他任何内容。
         """
         try:
-            response = self.llm.invoke(classification_prompt)
+            response = await self._ainvoke(classification_prompt)
             return int(response.content.strip())
-        except:
+        except Exception:
             return 0  # 默认值
     
     def _bio_tag_operation(self, operation_text: str) -> List[Dict]:
@@ -155,9 +213,11 @@ class DeepSeekNLUProcessor(NLUInterface):
             logger.error(f"BIO标记处理失败: {e}")
             return []
     
-    def _extract_entities_from_operation(self, operation_text: str) -> Dict[str, Any]:
+    async def _extract_entities_from_operation(self, operation_text: str,
+                                               action_class_hint: Optional[int] = None) -> Dict[str, Any]:
         """从操作文本中提取五元组实体"""
-        entities = self._bio_tag_operation(operation_text)
+        # BERT推理在推理执行器中进行，不阻塞事件循环
+        entities = await get_inference_executor().run("deepseek_bio", self._bio_tag_operation, operation_text)
         
         # 初始化结果
         result = {
@@ -174,7 +234,9 @@ class DeepSeekNLUProcessor(NLUInterface):
             entity_text = entity["text"]
             
             if entity_type == "ACTION":
-                action_class = self._classify_action(entity_text)
+                # 优先使用主请求中一并返回的分类，省去第二次LLM往返
+                action_class = action_class_hint if action_class_hint is not None \
+                    else await self._classify_action(entity_text)
                 if action_class == 0:
                     result["ACTION"] = "turn_on"
                 elif action_class == 1:
@@ -210,12 +272,18 @@ class DeepSeekNLUProcessor(NLUInterface):
         """
         logger.info(f"DeepSeek处理文本: '{text}'")
         
+        if self.response_cache is not None:
+            cached_result = self.response_cache.get(text)
+            if cached_result is not None:
+                logger.info(f"DeepSeek结果缓存命中: '{text}'")
+                return cached_result
+        
         try:
             # 使用提示模板格式化查询
             formatted_prompt = self.prompt.format(question=text)
             
-            # 调用DeepSeek API
-            response = self.llm.invoke(formatted_prompt)
+            # 异步调用DeepSeek API
+            response = await self._ainvoke(formatted_prompt)
             
             # 解析JSON响应
             deepseek_result = self._clean_json_response(response.content)
@@ -224,7 +292,8 @@ class DeepSeekNLUProcessor(NLUInterface):
             operation_text = deepseek_result.get("operation", "")
             
             # 提取五元组实体
-            five_tuple_result = self._extract_entities_from_operation(operation_text)
+            action_class_hint = self._parse_action_class(deepseek_result.get("action_class"))
+            five_tuple_result = await self._extract_entities_from_operation(operation_text, action_class_hint)
             
             # 如果没有识别出动作和设备类型，尝试使用启发式规则
             if not five_tuple_result["ACTION"] or not five_tuple_result["DEVICE_TYPE"]:
@@ -247,10 +316,12 @@ class DeepSeekNLUProcessor(NLUInterface):
             five_tuple_result["deepseek_operation"] = operation_text
             
             logger.info(f"DeepSeek处理结果: {five_tuple_result}")
+            if self.response_cache is not None:
+                self.response_cache.put(text, five_tuple_result)
             return five_tuple_result
             
         except Exception as e:
-            logger.error(f"DeepSeek处理失败: {e}")
+            logger.error(f"DeepSeek处理失败: {e!r}")
             return {
                 "ACTION": None,
                 "DEVICE_TYPE": None,
@@ -259,6 +330,15 @@ class DeepSeekNLUProcessor(NLUInterface):
                 "PARAMETER": None,
                 "error": str(e)
             }
+    
+    async def aclose(self) -> None:
+        """
+        服务退出或引擎被淘汰时释放资源：把结果缓存写盘（put时的写盘有间隔限制，最近的条目可能尚未持久化），
+        并关闭复用连接的HTTP客户端
+        """
+        if self.response_cache is not None:
+            await self.response_cache.apersist()
+        await self.http_async_client.aclose()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
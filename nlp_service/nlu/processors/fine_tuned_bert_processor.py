@@ -6,7 +6,16 @@ import torch
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 import re
+import time
 from huggingface_hub import snapshot_download
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from runtime.micro_batcher import MicroBatcher
+from runtime.inference_executor import get_inference_executor
+from runtime.metrics import MODEL_LOAD_SECONDS
+
 logger = logging.getLogger(__name__)
 try:
     from interfaces.nlu_interface import NLUInterface
@@ -49,6 +58,12 @@ class BertNLUProcessor(NLUInterface):
                                                  通常使用 model_hub_id 即可。
                 device (str, optional): "cuda" 或 "cpu". 默认自动检测.
                 force_download (bool, optional): 是否强制重新下载模型，即使本地已存在。默认为 False.
+                max_seq_length (int, optional): 截断长度上限。默认为 128.
+                pad_to_multiple_of (int, optional): 动态填充时长度取整的倍数，同时用于长度分桶。默认为 8.
+                batching (dict, optional): 动态微批处理配置:
+                    enabled (bool): 是否合并并发请求为一次前向计算。默认为 False.
+                    max_batch_size (int): 单批最大条数。默认为 16.
+                    max_wait_ms (float): 收集一批的最长等待时间（毫秒）。默认为 5.
         """
         self.config = config
 
@@ -123,11 +138,13 @@ class BertNLUProcessor(NLUInterface):
 
         try:
             # 始终从 model_load_path_str (即 self.local_model_path) 加载
+            load_start = time.perf_counter()
             self.tokenizer = AutoTokenizer.from_pretrained(model_load_path_str)
             self.model = AutoModelForTokenClassification.from_pretrained(model_load_path_str)
 
             # 确保模型加载到正确设备
             self.model.to(self.device)
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start, model="bert_nlu")
             logger.info(f"模型已加载到设备: {self.device}")
             self.model.eval()
 
@@ -151,6 +168,18 @@ class BertNLUProcessor(NLUInterface):
         except Exception as e:
             logger.error(f"加载模型或tokenizer失败: {e}", exc_info=True)
             raise
+
+        # 动态微批处理：并发请求合并为一次BERT前向计算
+        batching_config = config.get("batching") or {}
+        self.batcher: Optional[MicroBatcher] = None
+        if batching_config.get("enabled", False):
+            self.batcher = MicroBatcher(
+                self._predict_batch_async,
+                max_batch_size=batching_config.get("max_batch_size", 16),
+                max_wait_ms=batching_config.get("max_wait_ms", 5.0),
+                name="bert_nlu_batcher"
+            )
+            logger.info(f"已启用BERT动态微批处理: {batching_config}")
         logger.info(f"BertNLUProcessor 已成功初始化 (模型来源: '{model_load_path_str}')")
 
     def _convert_chinese_int_segment(self, cn_int_str: str) -> Optional[int]:
@@ -354,16 +383,42 @@ class BertNLUProcessor(NLUInterface):
                 entities[current_entity_type].append("".join(current_entity_text_list))
         return entities
 
-    async def understand(self, text: str) -> Dict[str, Any]:
-        logger.info(f"BertNLUProcessor.understand 接收到文本: '{text}'")
-        if not text or not text.strip():
-            logger.warning("输入文本为空。")
-            return {"DEVICE_TYPE": None, "DEVICE_ID": "0", "LOCATION": None, "ACTION": None, "PARAMETER": None}
+    def _length_bucket(self, text: str) -> int:
+        """按 pad_to_multiple_of 对序列长度（含[CLS]/[SEP]）取整，作为长度分桶的键"""
+        multiple = self.config.get("pad_to_multiple_of", 8) or 1
+        max_length = self.config.get("max_seq_length", 128)
+        seq_len = min(len(text) + 2, max_length)
+        return -(-seq_len // multiple)
+
+    def _predict_batch(self, texts: List[str]) -> List[Tuple[List[str], List[str]]]:
+        """
+        按长度分桶后对一批文本执行BERT前向计算，并逐条还原字级别的token与BIO标签
 
+        Args:
+            texts: 非空文本列表
+
+        Returns:
+            与输入等长的列表，每项为 (active_tokens, active_bio_tags)
+        """
+        buckets: Dict[int, List[int]] = {}
+        for index, text in enumerate(texts):
+            buckets.setdefault(self._length_bucket(text), []).append(index)
+
+        results: List[Optional[Tuple[List[str], List[str]]]] = [None] * len(texts)
+        for indices in buckets.values():
+            bucket_results = self._predict_bucket([texts[i] for i in indices])
+            for i, result in zip(indices, bucket_results):
+                results[i] = result
+        return results  # type: ignore[return-value]
+
+    def _predict_bucket(self, texts: List[str]) -> List[Tuple[List[str], List[str]]]:
+        """对长度相近的一组文本执行一次BERT前向计算"""
+        # 只填充到本组最长序列（按pad_to_multiple_of取整），而不是固定的max_length
         inputs = self.tokenizer(
-            text, return_tensors="pt", truncation=True,
+            texts, return_tensors="pt", truncation=True,
             max_length=self.config.get("max_seq_length", 128),
-            padding="max_length", is_split_into_words=False
+            padding="longest", pad_to_multiple_of=self.config.get("pad_to_multiple_of", 8),
+            is_split_into_words=False
         )
         input_ids_tensor = inputs["input_ids"].to(self.device)
         attention_mask_tensor = inputs["attention_mask"].to(self.device)
@@ -371,24 +426,65 @@ class BertNLUProcessor(NLUInterface):
         with torch.no_grad():
             logits = self.model(input_ids=input_ids_tensor, attention_mask=attention_mask_tensor).logits
 
-        predicted_ids_per_token = torch.argmax(logits, dim=2).squeeze().cpu().tolist()
-        raw_tokens = self.tokenizer.convert_ids_to_tokens(input_ids_tensor.squeeze().cpu().tolist())
-        
-        active_tokens: List[str] = []
-        active_bio_tags: List[str] = []
-        word_ids = inputs.word_ids(batch_index=0) 
-        previous_word_idx = None
-
-        for i, token_prediction_id in enumerate(predicted_ids_per_token):
-            if i >= len(word_ids): break
-            current_word_idx = word_ids[i]
-            if current_word_idx is None: continue
-            if current_word_idx != previous_word_idx:
-                if raw_tokens[i] not in [self.tokenizer.cls_token, self.tokenizer.sep_token, self.tokenizer.pad_token]:
-                    active_tokens.append(raw_tokens[i])
-                    active_bio_tags.append(self.id2slot.get(token_prediction_id, "O"))
-            previous_word_idx = current_word_idx
-        
+        predicted_ids_batch = torch.argmax(logits, dim=2).cpu().tolist()
+        input_ids_batch = inputs["input_ids"].tolist()
+        special_tokens = {self.tokenizer.cls_token, self.tokenizer.sep_token, self.tokenizer.pad_token}
+
+        results: List[Tuple[List[str], List[str]]] = []
+        for batch_index, predicted_ids_per_token in enumerate(predicted_ids_batch):
+            raw_tokens = self.tokenizer.convert_ids_to_tokens(input_ids_batch[batch_index])
+            word_ids = inputs.word_ids(batch_index=batch_index)
+
+            active_tokens: List[str] = []
+            active_bio_tags: List[str] = []
+            previous_word_idx = None
+            for i, token_prediction_id in enumerate(predicted_ids_per_token):
+                if i >= len(word_ids): break
+                current_word_idx = word_ids[i]
+                if current_word_idx is None: continue
+                if current_word_idx != previous_word_idx:
+                    if raw_tokens[i] not in special_tokens:
+                        active_tokens.append(raw_tokens[i])
+                        active_bio_tags.append(self.id2slot.get(token_prediction_id, "O"))
+                previous_word_idx = current_word_idx
+            results.append((active_tokens, active_bio_tags))
+        return results
+
+    async def _predict_batch_async(self, texts: List[str]) -> List[Tuple[List[str], List[str]]]:
+        """异步批处理入口：前向计算提交到推理执行器，不阻塞事件循环"""
+        return await get_inference_executor().run("bert_nlu", self._predict_batch, texts)
+
+    async def understand(self, text: str) -> Dict[str, Any]:
+        logger.info(f"BertNLUProcessor.understand 接收到文本: '{text}'")
+        if not text or not text.strip():
+            logger.warning("输入文本为空。")
+            return {"DEVICE_TYPE": None, "DEVICE_ID": "0", "LOCATION": None, "ACTION": None, "PARAMETER": None}
+
+        if self.batcher is not None:
+            active_tokens, active_bio_tags = await self.batcher.submit(text)
+        else:
+            active_tokens, active_bio_tags = (await self._predict_batch_async([text]))[0]
+
+        return self._build_result(text, active_tokens, active_bio_tags)
+
+    async def understand_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """批量理解：所有非空文本按长度分桶后一起前向计算，结果顺序与输入一致"""
+        logger.info(f"BertNLUProcessor.understand_batch 接收到 {len(texts)} 条文本")
+        results: List[Dict[str, Any]] = [
+            {"DEVICE_TYPE": None, "DEVICE_ID": "0", "LOCATION": None, "ACTION": None, "PARAMETER": None}
+            for _ in texts
+        ]
+        valid_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not valid_indices:
+            return results
+
+        predictions = await self._predict_batch_async([texts[i] for i in valid_indices])
+        for i, (active_tokens, active_bio_tags) in zip(valid_indices, predictions):
+            results[i] = self._build_result(texts[i], active_tokens, active_bio_tags)
+        return results
+
+    def _build_result(self, text: str, active_tokens: List[str], active_bio_tags: List[str]) -> Dict[str, Any]:
+        """根据单条文本的BIO标注结果抽取并标准化五元组"""
         logger.debug(f"原始文本 '{text}' 的 Active Tokens: {active_tokens}")
         logger.debug(f"对应的 Active BIO Tags: {active_bio_tags}")
 
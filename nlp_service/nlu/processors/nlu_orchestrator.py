@@ -12,9 +12,20 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from interfaces.nlu_interface import NLUInterface
 from nlu.processors.fine_tuned_bert_processor import BertNLUProcessor 
 from nlu.processors.retrieval_rag import StandardCommandRetriever 
+from runtime.metrics import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
+_metrics = get_metrics_registry()
+NLU_COMPONENT_DURATION = _metrics.histogram(
+    "nlp_nlu_component_duration_seconds", "Duration of NLU components (BERT inference, RAG retrieval)", ("component",))
+NLU_REQUESTS = _metrics.counter("nlp_nlu_requests_total", "Utterances handled by the NLU orchestrator")
+RAG_FALLBACKS = _metrics.counter(
+    "nlp_rag_fallback_total", "Utterances whose direct BERT result was not actionable and fell back to RAG")
+RAG_THRESHOLD_REJECTIONS = _metrics.counter(
+    "nlp_rag_threshold_rejections_total", "RAG matches rejected because the best score exceeded the similarity threshold")
+NLU_RESOLUTIONS = _metrics.counter("nlp_nlu_resolution_total", "How each utterance was finally resolved", ("path",))
+
 class SmartHomeNLUOrchestrator(NLUInterface):
     def __init__(self, 
                  bert_nlu_config: Dict, 
@@ -67,93 +78,151 @@ class SmartHomeNLUOrchestrator(NLUInterface):
             
         return False
 
+    def _rag_available(self) -> bool:
+        return bool(self.rag_system and self.rag_system.vector_store and self.rag_system.embedding_model)
+
+    def _rag_unavailable_result(self, direct_nlu_output: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info("Direct NLU insufficient, and RAG system is unavailable.")
+        NLU_RESOLUTIONS.inc(path="rag_unavailable")
+        return {"error": "Direct NLU insufficient, RAG system unavailable.", 
+                "original_nlu": direct_nlu_output,
+                "ACTION": None,
+                "DEVICE_TYPE": None,
+                "DEVICE_ID": "0",
+                "LOCATION": None,
+                "PARAMETER": None}
+
     async def understand(self, text: str) -> Dict[str, Any]: 
         logger.info(f"Orchestrator received text: '{text}'")
+        NLU_REQUESTS.inc()
         
-        direct_nlu_output = await self.bert_nlu_processor.understand(text)
+        with NLU_COMPONENT_DURATION.time(component="bert"):
+            direct_nlu_output = await self.bert_nlu_processor.understand(text)
         logger.debug(f"Direct (BertNLUProcessor) output: {direct_nlu_output}")
 
         if self._is_direct_nlu_actionable(direct_nlu_output):
             logger.info("Direct NLU result is considered actionable.")
+            NLU_RESOLUTIONS.inc(path="direct")
             return direct_nlu_output
         
         logger.info("Direct NLU result insufficient (missing ACTION or DEVICE_TYPE), attempting RAG...")
-        if self.rag_system and self.rag_system.vector_store and self.rag_system.embedding_model:
-            retrieved_commands_with_scores = self.rag_system.retrieve_similar_commands(text, top_k=2)
+        RAG_FALLBACKS.inc()
+        if not self._rag_available():
+            return self._rag_unavailable_result(direct_nlu_output)
+        with NLU_COMPONENT_DURATION.time(component="rag_retrieval"):
+            retrieved_commands_with_scores = await self.rag_system.aretrieve_similar_commands(text, top_k=2)
+        return await self._resolve_with_rag(direct_nlu_output, retrieved_commands_with_scores)
 
-            if retrieved_commands_with_scores:
-                for cmd_text, score, record in retrieved_commands_with_scores: 
-                    print(f"  Retrieved: '{cmd_text}' (Score: {score:.4f}), Original Record Text: {record.get('text')}")
-                    
-                # 选分数最小的那个
-                best_tuple = min(retrieved_commands_with_scores, key=lambda x: x[1])
-                best_standard_command_text, rag_score, original_rag_kb_record = best_tuple
-                logger.info(f"RAG retrieved most similar standard command: '{best_standard_command_text}' (Score: {rag_score:.4f})")
+    async def understand_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Batched understand: one BERT pass over all texts, then one batched RAG retrieval
+        (a single embedding call) for the texts whose direct NLU result is not actionable.
+        """
+        logger.info(f"Orchestrator received batch of {len(texts)} texts")
+        NLU_REQUESTS.inc(len(texts))
+        with NLU_COMPONENT_DURATION.time(component="bert_batch"):
+            direct_nlu_outputs = await self.bert_nlu_processor.understand_batch(texts)
 
-                if rag_score <= self.rag_similarity_threshold: 
-                    logger.info(f"RAG result score {rag_score:.4f} <= threshold {self.rag_similarity_threshold}, attempting NLU on this standard command.")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        needs_rag: List[int] = []
+        for i, direct_nlu_output in enumerate(direct_nlu_outputs):
+            if self._is_direct_nlu_actionable(direct_nlu_output):
+                NLU_RESOLUTIONS.inc(path="direct")
+                results[i] = direct_nlu_output
+                continue
+            RAG_FALLBACKS.inc()
+            if self._rag_available():
+                needs_rag.append(i)
+            else:
+                results[i] = self._rag_unavailable_result(direct_nlu_output)
+
+        if needs_rag:
+            logger.info(f"{len(needs_rag)} of {len(texts)} texts need RAG, retrieving in one batch...")
+            with NLU_COMPONENT_DURATION.time(component="rag_retrieval_batch"):
+                retrieved_batch = await self.rag_system.aretrieve_similar_commands_batch(
+                    [texts[i] for i in needs_rag], top_k=2)
+            # Re-running NLU on the retrieved standard commands goes through the BERT micro-batcher when enabled
+            resolved = await asyncio.gather(*(
+                self._resolve_with_rag(direct_nlu_outputs[i], retrieved)
+                for i, retrieved in zip(needs_rag, retrieved_batch)
+            ))
+            for i, result in zip(needs_rag, resolved):
+                results[i] = result
+        return results  # type: ignore[return-value]
+
+    async def _resolve_with_rag(self, direct_nlu_output: Dict[str, Any],
+                                retrieved_commands_with_scores: List) -> Dict[str, Any]:
+        """Turns RAG retrieval results for one utterance into the final NLU result."""
+        if retrieved_commands_with_scores:
+            for cmd_text, score, record in retrieved_commands_with_scores: 
+                logger.debug(f"Retrieved: '{cmd_text}' (Score: {score:.4f}), Original Record Text: {record.get('text')}")
+                
+            # 选分数最小的那个
+            best_tuple = min(retrieved_commands_with_scores, key=lambda x: x[1])
+            best_standard_command_text, rag_score, original_rag_kb_record = best_tuple
+            logger.info(f"RAG retrieved most similar standard command: '{best_standard_command_text}' (Score: {rag_score:.4f})")
+
+            if rag_score <= self.rag_similarity_threshold: 
+                logger.info(f"RAG result score {rag_score:.4f} <= threshold {self.rag_similarity_threshold}, attempting NLU on this standard command.")
+                
+                if "predefined_nlu_output" in original_rag_kb_record and \
+                   isinstance(original_rag_kb_record["predefined_nlu_output"], dict):
+                    logger.info("Using RAG's predefined NLU output.")
+                    rag_nlu_output = original_rag_kb_record["predefined_nlu_output"].copy()
+                    
+                    if direct_nlu_output.get("LOCATION") and not rag_nlu_output.get("LOCATION"):
+                        rag_nlu_output["LOCATION"] = direct_nlu_output.get("LOCATION")
                     
-                    if "predefined_nlu_output" in original_rag_kb_record and \
-                       isinstance(original_rag_kb_record["predefined_nlu_output"], dict):
-                        logger.info("Using RAG's predefined NLU output.")
-                        rag_nlu_output = original_rag_kb_record["predefined_nlu_output"].copy()
-                        
-                        if direct_nlu_output.get("LOCATION") and not rag_nlu_output.get("LOCATION"):
-                            rag_nlu_output["LOCATION"] = direct_nlu_output.get("LOCATION")
-                        
-                        original_direct_id = direct_nlu_output.get("DEVICE_ID", "0")
-                        rag_predefined_id = rag_nlu_output.get("DEVICE_ID", "0")
-                        if original_direct_id != "0" and (rag_predefined_id == "0" or not rag_predefined_id) :
-                            rag_nlu_output["DEVICE_ID"] = original_direct_id
-                        
-                        for key_field in ["DEVICE_TYPE", "DEVICE_ID", "LOCATION", "ACTION", "PARAMETER"]:
-                            if key_field not in rag_nlu_output:
-                                rag_nlu_output[key_field] = None if key_field != "DEVICE_ID" else "0"
-                        if rag_nlu_output.get("ACTION") in ["turn_on", "turn_off"] and rag_nlu_output.get("PARAMETER") is None:
-                             rag_nlu_output["PARAMETER"] = 0.0
-
-
-                        return rag_nlu_output
-
-                    logger.info(f"Re-running NLU on RAG standard command: '{best_standard_command_text}'")
+                    original_direct_id = direct_nlu_output.get("DEVICE_ID", "0")
+                    rag_predefined_id = rag_nlu_output.get("DEVICE_ID", "0")
+                    if original_direct_id != "0" and (rag_predefined_id == "0" or not rag_predefined_id) :
+                        rag_nlu_output["DEVICE_ID"] = original_direct_id
+                    
+                    for key_field in ["DEVICE_TYPE", "DEVICE_ID", "LOCATION", "ACTION", "PARAMETER"]:
+                        if key_field not in rag_nlu_output:
+                            rag_nlu_output[key_field] = None if key_field != "DEVICE_ID" else "0"
+                    if rag_nlu_output.get("ACTION") in ["turn_on", "turn_off"] and rag_nlu_output.get("PARAMETER") is None:
+                         rag_nlu_output["PARAMETER"] = 0.0
+
+
+                    NLU_RESOLUTIONS.inc(path="rag_predefined")
+                    return rag_nlu_output
+
+                logger.info(f"Re-running NLU on RAG standard command: '{best_standard_command_text}'")
+                with NLU_COMPONENT_DURATION.time(component="bert"):
                     rag_refined_nlu_output = await self.bert_nlu_processor.understand(best_standard_command_text)
-                    logger.debug(f"NLU output for RAG's standard command: {rag_refined_nlu_output}")
-
-                    if self._is_direct_nlu_actionable(rag_refined_nlu_output):
-                        logger.info("Using RAG-assisted NLU result.")
-                        final_output = rag_refined_nlu_output.copy()
-                        
-                        if direct_nlu_output.get("LOCATION") and not final_output.get("LOCATION"):
-                            final_output["LOCATION"] = direct_nlu_output.get("LOCATION")
-                        
-                        original_direct_id_for_merge = direct_nlu_output.get("DEVICE_ID", "0")
-                        rag_refined_id_for_merge = final_output.get("DEVICE_ID", "0")
-                        if original_direct_id_for_merge != "0" and \
-                           (rag_refined_id_for_merge == "0" or not rag_refined_id_for_merge) :
-                            final_output["DEVICE_ID"] = original_direct_id_for_merge
-                        
-                        if direct_nlu_output.get("DEVICE_TYPE") and not final_output.get("DEVICE_TYPE"):
-                             final_output["DEVICE_TYPE"] = direct_nlu_output.get("DEVICE_TYPE")
-                        
-                        logger.info(f"Merged final NLU result after RAG: {final_output}")
-                        return final_output
-                    else:
-                        logger.warning("RAG-assisted NLU result still insufficient.")
-                        return {"error": "Failed to fully parse command even with RAG.", 
-                                "original_nlu": direct_nlu_output, 
-                                "rag_attempted_command": best_standard_command}
+                logger.debug(f"NLU output for RAG's standard command: {rag_refined_nlu_output}")
+
+                if self._is_direct_nlu_actionable(rag_refined_nlu_output):
+                    logger.info("Using RAG-assisted NLU result.")
+                    final_output = rag_refined_nlu_output.copy()
+                    
+                    if direct_nlu_output.get("LOCATION") and not final_output.get("LOCATION"):
+                        final_output["LOCATION"] = direct_nlu_output.get("LOCATION")
+                    
+                    original_direct_id_for_merge = direct_nlu_output.get("DEVICE_ID", "0")
+                    rag_refined_id_for_merge = final_output.get("DEVICE_ID", "0")
+                    if original_direct_id_for_merge != "0" and \
+                       (rag_refined_id_for_merge == "0" or not rag_refined_id_for_merge) :
+                        final_output["DEVICE_ID"] = original_direct_id_for_merge
+                    
+                    if direct_nlu_output.get("DEVICE_TYPE") and not final_output.get("DEVICE_TYPE"):
+                         final_output["DEVICE_TYPE"] = direct_nlu_output.get("DEVICE_TYPE")
+                    
+                    logger.info(f"Merged final NLU result after RAG: {final_output}")
+                    NLU_RESOLUTIONS.inc(path="rag_refined")
+                    return final_output
                 else:
-                    logger.info(f"RAG retrieved score {rag_score:.4f} > threshold {self.rag_similarity_threshold}. RAG result not adopted.")
-                    return {"error": "Direct NLU insufficient, RAG match below threshold.", 
-                            "original_nlu": direct_nlu_output,
-                            "ACTION": None,
-                            "DEVICE_TYPE": None,
-                            "DEVICE_ID": "0",
-                            "LOCATION": None,
-                            "PARAMETER": None}
+                    logger.warning("RAG-assisted NLU result still insufficient.")
+                    NLU_RESOLUTIONS.inc(path="rag_insufficient")
+                    return {"error": "Failed to fully parse command even with RAG.", 
+                            "original_nlu": direct_nlu_output, 
+                            "rag_attempted_command": best_standard_command_text}
             else:
-                logger.info("RAG found no similar standard commands.")
-                return {"error": "Direct NLU insufficient, RAG found no matches.", 
+                logger.info(f"RAG retrieved score {rag_score:.4f} > threshold {self.rag_similarity_threshold}. RAG result not adopted.")
+                RAG_THRESHOLD_REJECTIONS.inc()
+                NLU_RESOLUTIONS.inc(path="rag_threshold_rejected")
+                return {"error": "Direct NLU insufficient, RAG match below threshold.", 
                         "original_nlu": direct_nlu_output,
                         "ACTION": None,
                         "DEVICE_TYPE": None,
@@ -161,8 +230,9 @@ class SmartHomeNLUOrchestrator(NLUInterface):
                         "LOCATION": None,
                         "PARAMETER": None}
         else:
-            logger.info("Direct NLU insufficient, and RAG system is unavailable.")
-            return {"error": "Direct NLU insufficient, RAG system unavailable.", 
+            logger.info("RAG found no similar standard commands.")
+            NLU_RESOLUTIONS.inc(path="rag_no_match")
+            return {"error": "Direct NLU insufficient, RAG found no matches.", 
                     "original_nlu": direct_nlu_output,
                     "ACTION": None,
                     "DEVICE_TYPE": None,
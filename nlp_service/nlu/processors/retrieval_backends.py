@@ -0,0 +1,142 @@
+# retrieval_backends.py
+import logging
+import uuid
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from langchain_community.vectorstores import Chroma
+except ImportError:
+    Chroma = None # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class ChromaRetrievalBackend:
+    """
+    Vector search backed by an in-memory Chroma collection.
+    Scores are Chroma's squared L2 distances (lower is better).
+    Chroma keeps its own copy of the vectors, so a memory-mapped matrix passed to build()
+    is read once and not used as the backing array.
+    """
+    name = "chroma"
+
+    def __init__(self, embedding_model: Any):
+        if Chroma is None:
+            raise ImportError("langchain_community is required for the 'chroma' retrieval backend.")
+        self.embedding_model = embedding_model
+        self.store: Optional[Chroma] = None
+
+    def build(self, texts: List[str], embeddings: np.ndarray) -> None:
+        # Precomputed embeddings are added directly, so Chroma does not re-embed anything.
+        # A unique collection name keeps separate retrievers from sharing Chroma's in-process client state.
+        self.store = Chroma(
+            collection_name=f"rag_commands_{uuid.uuid4().hex[:8]}",
+            embedding_function=self.embedding_model
+        )
+        self.store._collection.add(
+            ids=[str(i) for i in range(len(texts))],
+            embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+            documents=list(texts),
+            metadatas=[{"kb_index": i} for i in range(len(texts))]
+        )
+
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        if self.store is None:
+            return []
+        docs_with_scores = self.store.similarity_search_by_vector_with_relevance_scores(
+            np.asarray(query_embedding, dtype=np.float32).tolist(), k=top_k
+        )
+        return [(int(doc.metadata.get("kb_index", -1)), float(score)) for doc, score in docs_with_scores]
+
+    def close(self) -> None:
+        """Drops the collection from Chroma's in-process client."""
+        if self.store is not None:
+            try:
+                self.store.delete_collection()
+            except Exception as e:
+                logger.warning(f"Failed to delete Chroma collection: {e}")
+            self.store = None
+
+
+class NumpyRetrievalBackend:
+    """
+    Exact brute-force search over one contiguous NumPy matrix.
+
+    With float32 the embedding matrix is used as given, so a memory-mapped matrix loaded
+    from the persisted index stays the backing array and is not copied. Only the row norms
+    are kept in memory, and scores are ||q||^2 + ||x||^2 - 2 q.x.
+    With float16 the rows are stored L2-normalized in a half-precision copy, and scores are
+    reconstructed as ||q||^2 + ||x||^2 - 2||q||||x||cos.
+    Both are squared L2 distances, on the same scale as the Chroma backend and
+    rag_similarity_threshold. Top-k needs a single matrix-vector product plus argpartition.
+    """
+    name = "numpy"
+
+    def __init__(self, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported numpy backend dtype '{dtype}', expected 'float32' or 'float16'.")
+        self.dtype = np.dtype(dtype)
+        self.matrix: Optional[np.ndarray] = None
+        self.norms: Optional[np.ndarray] = None
+        self.normalized = self.dtype != np.float32
+
+    def build(self, texts: List[str], embeddings: np.ndarray) -> None:
+        if not self.normalized:
+            # np.asarray returns a view of a float32 C-contiguous (memory-mapped) matrix, not a copy
+            self.matrix = np.asarray(embeddings, dtype=np.float32)
+            if not self.matrix.flags.c_contiguous:
+                self.matrix = np.ascontiguousarray(self.matrix)
+            self.norms = np.linalg.norm(self.matrix, axis=1).astype(np.float32)
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1)
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        self.matrix = np.ascontiguousarray(embeddings / safe_norms[:, None], dtype=self.dtype)
+        self.norms = norms.astype(np.float32)
+
+    def search(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        if self.matrix is None or self.matrix.shape[0] == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query_norm = float(np.linalg.norm(query))
+
+        if self.normalized:
+            unit_query = query / query_norm if query_norm > 0 else query
+            cosine = (self.matrix @ unit_query.astype(self.dtype)).astype(np.float32)
+            dots = query_norm * self.norms * cosine
+        else:
+            dots = self.matrix @ query
+        scores = query_norm * query_norm + self.norms * self.norms - 2.0 * dots
+
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            candidates = np.argpartition(scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        ordered = candidates[np.argsort(scores[candidates])]
+        return [(int(i), float(max(scores[i], 0.0))) for i in ordered]
+
+    def memory_bytes(self) -> int:
+        if self.matrix is None:
+            return 0
+        return int(self.matrix.nbytes + self.norms.nbytes)
+
+    def close(self) -> None:
+        self.matrix = None
+        self.norms = None
+
+
+def create_retrieval_backend(name: str, embedding_model: Any, config: Optional[dict] = None):
+    """
+    Creates a retrieval backend by name ("chroma" or "numpy").
+    """
+    config = config or {}
+    if name == "numpy":
+        return NumpyRetrievalBackend(dtype=config.get("numpy_dtype", "float32"))
+    if name == "chroma":
+        return ChromaRetrievalBackend(embedding_model)
+    raise ValueError(f"Unknown retrieval backend '{name}', expected 'chroma' or 'numpy'.")
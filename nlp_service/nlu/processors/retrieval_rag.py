@@ -1,10 +1,25 @@
 # retrieval_rag.py
+import hashlib
 import json
 import logging
+import os
+import threading
+import time
+import numpy as np
 from typing import Dict, List, Optional, Tuple, TYPE_CHECKING # TYPE_CHECKING for Document
 from pathlib import Path
 from huggingface_hub import snapshot_download
 from langchain_community.embeddings import HuggingFaceEmbeddings
+import sys
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from runtime.inference_executor import get_inference_executor
+from nlu.processors.retrieval_backends import create_retrieval_backend
+from nlu.text_utils import normalize_utterance
+from runtime.lru_cache import LRUCache
+from runtime.metrics import MODEL_LOAD_SECONDS
 
 # --- Optional Library Imports with Fallbacks ---
 try:
@@ -30,6 +45,30 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+class RAGIndexSnapshot:
+    """
+    One fully built RAG index: knowledge base records, their embeddings and the search backend.
+    Snapshots are never mutated; a reload builds a new one and swaps it in with a single
+    attribute assignment, so in-flight queries keep a consistent view.
+    """
+    def __init__(self,
+                 knowledge_base: List[Dict],
+                 documents: List["Document"],
+                 embeddings: np.ndarray,
+                 backend,
+                 knowledge_base_hash: str,
+                 embedded_count: int = 0,
+                 embeddings_path: Optional[Path] = None):
+        self.knowledge_base = knowledge_base
+        self.documents = documents
+        self.embeddings = embeddings
+        self.backend = backend
+        self.knowledge_base_hash = knowledge_base_hash
+        self.embedded_count = embedded_count # Texts embedded while building this snapshot (0 when loaded from disk)
+        self.embeddings_path = embeddings_path # Persisted matrix file backing this snapshot, if any
+        self.record_hashes = [StandardCommandRetriever.record_hash(record) for record in knowledge_base]
+
+
 class StandardCommandRetriever:
     """
     Retrieves standard command texts from a knowledge base (e.g., data.jsonl)
@@ -53,13 +92,51 @@ class StandardCommandRetriever:
                 embedding_model_hub_id (str, optional): Hugging Face Hub ID for the embedding model.
                                                          Uses DEFAULT_EMBEDDING_MODEL_HUB_ID if not provided.
                 force_download_embedding (bool, optional): Whether to force re-download of the embedding model. Defaults to False.
+                index_dir (str, optional): Directory for the persisted embedding index. The index is
+                                           reused across restarts and rebuilt only when the knowledge
+                                           base content or the embedding model ID changes.
+                                           Defaults to "<knowledge base dir>/rag_index".
+                backend (str, optional): Vector search backend, "chroma" or "numpy" (exact brute-force
+                                         search over one contiguous matrix). Defaults to "chroma".
+                numpy_dtype (str, optional): Matrix dtype for the numpy backend, "float32" or "float16".
+                hot_reload_interval_seconds (float, optional): Poll the knowledge base file at this interval
+                                              and reload it incrementally when it changes. 0 disables the watcher.
+                query_cache (Dict, optional): Bounded caches keyed on the normalized query:
+                                              embedding_max_entries, result_max_entries, ttl_seconds.
+                                              Cached results are invalidated when the knowledge base changes.
             device (str): Device to run the embedding model on ("auto", "cuda" or "cpu").
         """
         
-        self.knowledge_base: List[Dict] = [] # Stores original records from knowledge_base_path
-        self.documents_for_vectorstore: List[Document] = [] # Stores Langchain Document objects
-        self.vector_store: Optional[Chroma] = None
+        self.knowledge_base_path = Path(knowledge_base_path)
+        self._index: Optional[RAGIndexSnapshot] = None # Current index, replaced atomically on reload
+        self._retired_index: Optional[RAGIndexSnapshot] = None # Previous index, released on the next reload
+        self._reload_lock = threading.Lock()
+        self._kb_file_signature: Optional[Tuple[int, int]] = None
+        self._watcher_thread: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        self.hot_reload_interval_seconds: float = config.get("hot_reload_interval_seconds", 0) or 0
+        self.backend_name: str = config.get("backend", "chroma")
+        self.backend_config: Dict = config
         self.embedding_model: Optional[HuggingFaceEmbeddings] = None
+        self.embedding_model_id: str = config.get("embedding_model_hub_id", self.DEFAULT_EMBEDDING_MODEL_HUB_ID)
+        index_dir = config.get("index_dir") or str(Path(knowledge_base_path).resolve().parent / "rag_index")
+        self.index_dir = Path(index_dir)
+
+        # Repeated vague phrases ("好冷", "太暗了") skip both the query embedding and the search
+        query_cache_config = config.get("query_cache") or {}
+        cache_ttl = query_cache_config.get("ttl_seconds")
+        self.embedding_cache = LRUCache(
+            max_entries=query_cache_config.get("embedding_max_entries", 1024),
+            ttl_seconds=cache_ttl,
+            name="rag_query_embedding",
+            size_fn=lambda value: int(value.nbytes)
+        )
+        self.result_cache = LRUCache(
+            max_entries=query_cache_config.get("result_max_entries", 1024),
+            ttl_seconds=cache_ttl,
+            name="rag_query_result",
+            size_fn=self._estimate_result_bytes
+        )
         
         # 处理设备参数
         if device.lower() == "auto":
@@ -68,7 +145,7 @@ class StandardCommandRetriever:
             logger.info(f"设置为自动选择设备，将使用: {device}")
         logger.info(f"RAG检索器初始化使用设备: {device}")
 
-        if SentenceTransformer is None or Chroma is None or Document is None:
+        if SentenceTransformer is None or Document is None or (self.backend_name == "chroma" and Chroma is None):
             logger.error("StandardCommandRetriever initialization failed: Missing essential libraries (sentence_transformers, langchain_community, langchain_core.documents/langchain.schema).")
             return
 
@@ -122,10 +199,12 @@ class StandardCommandRetriever:
         
         logger.info(f"Loading SentenceTransformer model: '{actual_embedding_model_load_path}' to device '{device}'...")
         try:
+            load_start = time.perf_counter()
             self.embedding_model = HuggingFaceEmbeddings(
                 model_name=actual_embedding_model_load_path,
                 model_kwargs={'device': device}
             )
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - load_start, model="rag_embedding")
         except Exception as e:
             logger.error(f"Failed to load SentenceTransformer model from '{actual_embedding_model_load_path}': {e}", exc_info=True)
             self.embedding_model = None # Mark as failed
@@ -133,51 +212,324 @@ class StandardCommandRetriever:
 
         # --- Load Knowledge Base ---
         logger.info(f"Loading RAG knowledge base (standard commands) from '{knowledge_base_path}'...")
-        kb_path_obj = Path(knowledge_base_path)
-        if not kb_path_obj.exists():
-            logger.error(f"RAG knowledge base file (e.g., rag_knowledge.jsonl) not found at: {knowledge_base_path}")
+        loaded = self._read_knowledge_base()
+        if loaded is None:
             return # Critical failure
-        
+        records, documents, kb_hash = loaded
+        if not documents:
+            logger.warning("RAG knowledge base is empty or no valid entries found for vectorization.")
+            return # Critical failure if no documents to build upon
+
+        self._index = self._build_vector_space(records, documents, kb_hash)
+        if self._index is not None:
+            # Matrices left behind by earlier knowledge base versions are not referenced by the manifest any more
+            self._remove_unused_index_files()
+        if self._index is not None and self.hot_reload_interval_seconds > 0:
+            self.start_watcher()
+
+    # --- Current index views (read from one snapshot so they are always consistent) ---
+    @property
+    def knowledge_base(self) -> List[Dict]:
+        return self._index.knowledge_base if self._index else []
+
+    @property
+    def documents_for_vectorstore(self) -> List["Document"]:
+        return self._index.documents if self._index else []
+
+    @property
+    def vector_store(self):
+        return self._index.backend if self._index else None
+
+    @property
+    def knowledge_base_hash(self) -> Optional[str]:
+        return self._index.knowledge_base_hash if self._index else None
+
+    @staticmethod
+    def record_hash(record: Dict) -> str:
+        """Content hash of one knowledge base record, used to diff the file on reload."""
+        return hashlib.sha256(json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
         try:
-            with open(kb_path_obj, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f):
-                    try:
-                        record = json.loads(line)
-                        # RAG knowledge base uses the "text" field (standard commands) for vectorization
-                        if "text" in record: 
-                            self.knowledge_base.append(record) # Store the full original record
-                            doc = Document(page_content=record["text"], metadata={"kb_index": i})
-                            self.documents_for_vectorstore.append(doc)
-                        else: 
-                            logger.warning(f"Skipping record in RAG knowledge base due to missing 'text' field (line {i+1}): {record}")
-                    except json.JSONDecodeError: 
-                        logger.warning(f"Skipping unparsable JSON line in RAG knowledge base (line {i+1}): {line.strip()}")
+            stat = self.knowledge_base_path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _read_knowledge_base(self) -> Optional[Tuple[List[Dict], List["Document"], str]]:
+        """
+        Reads the knowledge base JSONL file.
+
+        Returns:
+            (records, documents, sha256 of the file) or None if the file cannot be read.
+        """
+        if not self.knowledge_base_path.exists():
+            logger.error(f"RAG knowledge base file (e.g., rag_knowledge.jsonl) not found at: {self.knowledge_base_path}")
+            return None
+
+        records: List[Dict] = []
+        documents: List[Document] = []
+        try:
+            self._kb_file_signature = self._file_signature()
+            kb_bytes = self.knowledge_base_path.read_bytes()
+            kb_hash = hashlib.sha256(kb_bytes).hexdigest()
+            for i, line in enumerate(kb_bytes.decode('utf-8').splitlines()):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    # RAG knowledge base uses the "text" field (standard commands) for vectorization
+                    if "text" in record: 
+                        # kb_index points into the records list, not at the file line number
+                        doc = Document(page_content=record["text"], metadata={"kb_index": len(records)})
+                        records.append(record) # Store the full original record
+                        documents.append(doc)
+                    else: 
+                        logger.warning(f"Skipping record in RAG knowledge base due to missing 'text' field (line {i+1}): {record}")
+                except json.JSONDecodeError: 
+                    logger.warning(f"Skipping unparsable JSON line in RAG knowledge base (line {i+1}): {line.strip()}")
         except Exception as e:
-            logger.error(f"Failed to load RAG knowledge base file '{knowledge_base_path}': {e}", exc_info=True)
-            return # Critical failure
+            logger.error(f"Failed to load RAG knowledge base file '{self.knowledge_base_path}': {e}", exc_info=True)
+            return None
+        return records, documents, kb_hash
 
-        if not self.documents_for_vectorstore:
-            logger.warning("RAG knowledge base is empty or no valid entries found for vectorization.")
-            return # Critical failure if no documents to build upon
-            
-        self._build_vector_space()
+    def _index_manifest(self, kb_hash: str, num_documents: int) -> Dict:
+        """Manifest describing what the persisted index was built from."""
+        return {
+            "knowledge_base_sha256": kb_hash,
+            "embedding_model_id": self.embedding_model_id,
+            "num_documents": num_documents,
+        }
+
+    def _embeddings_file_name(self, kb_hash: str) -> str:
+        """
+        Content-addressed file name for a persisted embedding matrix. A new knowledge base
+        (or embedding model) gets a new file, so a matrix that is still memory-mapped by a
+        live snapshot is never overwritten.
+        """
+        index_id = hashlib.sha256(f"{kb_hash}:{self.embedding_model_id}".encode("utf-8")).hexdigest()[:16]
+        return f"embeddings-{index_id}.npy"
+
+    def _load_persisted_embeddings(self, kb_hash: str, num_documents: int) -> Optional[Tuple[np.ndarray, Path]]:
+        """
+        Memory-maps the persisted embedding matrix if its manifest matches the current
+        knowledge base hash and embedding model ID. Returns None if a rebuild is needed,
+        otherwise (embeddings, path of the mapped file).
+        """
+        manifest_path = self.index_dir / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            expected = self._index_manifest(kb_hash, num_documents)
+            if any(manifest.get(key) != value for key, value in expected.items()):
+                logger.info("Persisted RAG index is stale (knowledge base or embedding model changed), rebuilding.")
+                return None
+            embeddings_path = self.index_dir / manifest.get("embeddings_file", "embeddings.npy")
+            if not embeddings_path.exists():
+                return None
+            embeddings = np.load(embeddings_path, mmap_mode="r")
+            if embeddings.ndim != 2 or embeddings.shape[0] != num_documents:
+                logger.warning(f"Persisted RAG index has unexpected shape {embeddings.shape}, rebuilding.")
+                return None
+            return embeddings, embeddings_path
+        except Exception as e:
+            logger.warning(f"Failed to load persisted RAG index from '{self.index_dir}': {e}")
+            return None
+
+    def _persist_embeddings(self, embeddings: np.ndarray, kb_hash: str) -> Optional[Path]:
+        """
+        Writes the embedding matrix to a content-addressed file and points the manifest at it.
+
+        Returns:
+            Path of the persisted matrix, or None if persisting failed.
+        """
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            embeddings_path = self.index_dir / self._embeddings_file_name(kb_hash)
+            if not embeddings_path.exists():
+                tmp_embeddings_path = self.index_dir / f"{embeddings_path.name}.tmp"
+                with open(tmp_embeddings_path, 'wb') as f:
+                    np.save(f, embeddings)
+                os.replace(tmp_embeddings_path, embeddings_path)
+            # An existing file with this name holds the same matrix (and may be mapped), so it is left as is
+
+            manifest = self._index_manifest(kb_hash, int(embeddings.shape[0]))
+            manifest["embeddings_file"] = embeddings_path.name
+            manifest["dim"] = int(embeddings.shape[1])
+            manifest["dtype"] = str(embeddings.dtype)
+            manifest["created_at"] = time.time()
+            tmp_manifest_path = self.index_dir / "manifest.json.tmp"
+            with open(tmp_manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            # manifest is written last, so a crash never leaves a manifest pointing at a partial matrix
+            os.replace(tmp_manifest_path, self.index_dir / "manifest.json")
+            logger.info(f"Persisted RAG index to '{embeddings_path}'.")
+            return embeddings_path
+        except Exception as e:
+            logger.warning(f"Failed to persist RAG index to '{self.index_dir}': {e}")
+            return None
+
+    def _remove_unused_index_files(self) -> None:
+        """
+        Deletes persisted matrices that no live snapshot maps any more. Files that cannot be
+        removed yet (e.g. still mapped on Windows) are left for the next reload.
+        """
+        in_use = {snapshot.embeddings_path.name
+                  for snapshot in (self._index, self._retired_index)
+                  if snapshot is not None and snapshot.embeddings_path is not None}
+        for path in self.index_dir.glob("embeddings*.npy"):
+            if path.name in in_use:
+                continue
+            try:
+                path.unlink()
+                logger.info(f"Removed unused RAG index file '{path}'.")
+            except OSError as e:
+                logger.debug(f"Unused RAG index file '{path}' not removed yet: {e}")
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embeds texts with the embedding model into a contiguous float32 matrix."""
+        return np.asarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+
+    def _embed_incrementally(self, texts: List[str],
+                             previous: Optional[RAGIndexSnapshot]) -> Tuple[np.ndarray, int]:
+        """
+        Builds the embedding matrix for texts, reusing rows from the previous index for texts
+        it already contains and embedding only the new ones.
+
+        Returns:
+            (embedding matrix, number of texts that were actually embedded)
+        """
+        reusable: Dict[str, np.ndarray] = {}
+        if previous is not None:
+            for doc, row in zip(previous.documents, previous.embeddings):
+                reusable.setdefault(doc.page_content, row)
+        new_texts = list(dict.fromkeys(text for text in texts if text not in reusable))
+        if new_texts:
+            logger.info(f"Embedding {len(new_texts)} new standard commands ({len(texts) - len(new_texts)} reused)...")
+            for text, row in zip(new_texts, self._embed_texts(new_texts)):
+                reusable[text] = row
+        embeddings = np.ascontiguousarray(np.stack([np.asarray(reusable[text], dtype=np.float32) for text in texts]))
+        return embeddings, len(new_texts)
 
-    def _build_vector_space(self):
-        if not self.documents_for_vectorstore or not self.embedding_model:
+    def _build_vector_space(self, records: List[Dict], documents: List["Document"], kb_hash: str,
+                            previous: Optional[RAGIndexSnapshot] = None) -> Optional[RAGIndexSnapshot]:
+        """
+        Builds a complete index snapshot for the given records. Embeddings come from the
+        persisted index when it matches, otherwise from the previous snapshot plus new embeddings.
+        """
+        if not documents or not self.embedding_model:
             logger.warning("No documents or embedding model available, cannot build RAG vector space.")
-            self.vector_store = None
-            return
+            return None
+
+        texts = [doc.page_content for doc in documents]
+        embedded_count = 0
+        embeddings_path: Optional[Path] = None
+        persisted = self._load_persisted_embeddings(kb_hash, len(documents))
+        if persisted is not None:
+            embeddings, embeddings_path = persisted
+            logger.info(f"Loaded persisted RAG index for {embeddings.shape[0]} standard commands from '{embeddings_path}'.")
+        else:
+            try:
+                embeddings, embedded_count = self._embed_incrementally(texts, previous)
+            except Exception as e:
+                logger.error(f"Failed to embed RAG knowledge base: {e}", exc_info=True)
+                return None
+            embeddings_path = self._persist_embeddings(embeddings, kb_hash)
 
-        logger.info(f"Building vector space for {len(self.documents_for_vectorstore)} standard commands...")
         try:
-            self.vector_store = Chroma.from_documents(
-                documents=self.documents_for_vectorstore,
-                embedding=self.embedding_model
-            )
-            logger.info("RAG vector space built successfully (in-memory Chroma).")
+            backend = create_retrieval_backend(self.backend_name, self.embedding_model, self.backend_config)
+            backend.build(texts, embeddings)
+            logger.info(f"RAG vector space built successfully (backend: {self.backend_name}).")
         except Exception as e:
-            logger.error(f"Failed to build Chroma vector store: {e}", exc_info=True)
-            self.vector_store = None
+            logger.error(f"Failed to build RAG vector space with backend '{self.backend_name}': {e}", exc_info=True)
+            return None
+        return RAGIndexSnapshot(records, documents, embeddings, backend, kb_hash, embedded_count, embeddings_path)
+
+    def reload_knowledge_base(self, force: bool = False) -> Dict:
+        """
+        Re-reads the knowledge base file and swaps in a new index without interrupting queries.
+        Records are diffed by content hash; only texts not present in the current index are
+        embedded, and deleted records simply drop out of the new index.
+
+        Args:
+            force (bool): Rebuild even if the file content hash is unchanged.
+
+        Returns:
+            Dict: Reload summary (status, added, removed, unchanged, embedded, total, seconds).
+        """
+        with self._reload_lock:
+            started_at = time.perf_counter()
+            if self.embedding_model is None:
+                return {"status": "error", "error": "embedding model not loaded"}
+            loaded = self._read_knowledge_base()
+            if loaded is None:
+                return {"status": "error", "error": f"cannot read knowledge base '{self.knowledge_base_path}'"}
+            records, documents, kb_hash = loaded
+
+            previous = self._index
+            if previous is not None and kb_hash == previous.knowledge_base_hash and not force:
+                return {"status": "unchanged", "total": len(records)}
+            if not documents:
+                logger.warning("Reloaded RAG knowledge base is empty, keeping the current index.")
+                return {"status": "error", "error": "knowledge base is empty"}
+
+            old_hashes = set(previous.record_hashes) if previous else set()
+            new_hashes = {self.record_hash(record) for record in records}
+
+            snapshot = self._build_vector_space(records, documents, kb_hash, previous=previous)
+            if snapshot is None:
+                return {"status": "error", "error": "failed to build the new index, keeping the current one"}
+
+            self._index = snapshot
+            self.result_cache.clear() # Results computed against the previous index are no longer valid
+            # The replaced index may still be serving in-flight queries; release the one before it instead
+            retired, self._retired_index = self._retired_index, previous
+            if retired is not None:
+                if hasattr(retired.backend, "close"):
+                    retired.backend.close()
+                # Drop the last references to its memory-mapped matrix before deleting the file
+                del retired
+                self._remove_unused_index_files()
+
+            summary = {
+                "status": "reloaded",
+                "added": len(new_hashes - old_hashes),
+                "removed": len(old_hashes - new_hashes),
+                "unchanged": len(new_hashes & old_hashes),
+                "embedded": snapshot.embedded_count,
+                "total": len(records),
+                "seconds": round(time.perf_counter() - started_at, 3),
+            }
+            logger.info(f"RAG knowledge base reloaded: {summary}")
+            return summary
+
+    def start_watcher(self) -> None:
+        """Starts a daemon thread that reloads the knowledge base when the file changes."""
+        if self._watcher_thread is not None and self._watcher_thread.is_alive():
+            return
+        self._watcher_stop.clear()
+        self._watcher_thread = threading.Thread(target=self._watch_loop, name="rag-kb-watcher", daemon=True)
+        self._watcher_thread.start()
+        logger.info(f"Watching RAG knowledge base '{self.knowledge_base_path}' every {self.hot_reload_interval_seconds}s.")
+
+    def stop_watcher(self) -> None:
+        """Stops the knowledge base watcher thread."""
+        self._watcher_stop.set()
+        if self._watcher_thread is not None:
+            self._watcher_thread.join(timeout=5)
+            self._watcher_thread = None
+
+    def _watch_loop(self) -> None:
+        while not self._watcher_stop.wait(self.hot_reload_interval_seconds):
+            signature = self._file_signature()
+            if signature is None or signature == self._kb_file_signature:
+                continue
+            try:
+                self.reload_knowledge_base()
+            except Exception as e:
+                logger.error(f"RAG knowledge base hot reload failed: {e}", exc_info=True)
 
     def retrieve_similar_commands(self, query: str, top_k: int = 1) -> List[Tuple[str, float, Dict]]:
         """
@@ -190,37 +542,102 @@ class StandardCommandRetriever:
         Returns:
             List[Tuple[str, float, Dict]]: A list of tuples, where each tuple contains:
                 - standard_command_text (str): The retrieved standard command text.
-                - score (float): The similarity score (distance for Chroma, lower is better).
+                - score (float): The similarity score (squared L2 distance for both backends, lower is better).
                 - original_record_from_kb (Dict): The full original record from the knowledge base.
         """
-        if not self.vector_store:
+        return self.retrieve_similar_commands_batch([query], top_k=top_k)[0]
+
+    def retrieve_similar_commands_batch(self, queries: List[str], top_k: int = 1) -> List[List[Tuple[str, float, Dict]]]:
+        """
+        Batched variant of retrieve_similar_commands. Queries that miss both caches are
+        embedded together in a single embedding call; results keep the input order.
+
+        Args:
+            queries (List[str]): The user queries.
+            top_k (int): The number of most similar commands to retrieve per query.
+
+        Returns:
+            List[List[Tuple[str, float, Dict]]]: One result list per query, same format as retrieve_similar_commands.
+        """
+        index = self._index # One snapshot for the whole batch, even if a reload swaps it meanwhile
+        if index is None or not index.backend:
             logger.debug("RAG vector store not initialized, cannot retrieve.")
-            return []
-        if not self.knowledge_base: # Should not happen if vector_store is initialized
+            return [[] for _ in queries]
+        if not index.knowledge_base: # Should not happen if vector_store is initialized
             logger.debug("RAG knowledge base is empty, cannot retrieve original records.")
-            return []
+            return [[] for _ in queries]
+
+        results: List[Optional[List[Tuple[str, float, Dict]]]] = [None] * len(queries)
+        pending: List[Tuple[int, str, Tuple]] = [] # (position, normalized query, result cache key)
+        for position, query in enumerate(queries):
+            logger.debug(f"RAG retrieving similar standard commands for query: '{query}', top_k: {top_k}")
+            normalized_query = normalize_utterance(query) or query
+            result_key = (index.knowledge_base_hash, normalized_query, top_k)
+            cached_results = self.result_cache.get(result_key)
+            if cached_results is not None:
+                logger.debug(f"RAG result cache hit for query: '{query}'")
+                results[position] = list(cached_results)
+            else:
+                pending.append((position, normalized_query, result_key))
 
-        logger.debug(f"RAG retrieving similar standard commands for query: '{query}', top_k: {top_k}")
         try:
-            # similarity_search_with_score returns a list of (Document, score) tuples
-            retrieved_docs_with_scores: List[Tuple[Document, float]] = self.vector_store.similarity_search_with_score(query, k=top_k)
-            
-            results = []
-            for doc, score in retrieved_docs_with_scores:
-                standard_command_text = doc.page_content
-                kb_index = doc.metadata.get("kb_index")
-                original_record = {} # Default to empty dict if index is bad
-                if kb_index is not None and 0 <= kb_index < len(self.knowledge_base):
-                    original_record = self.knowledge_base[kb_index] # Get the full original record
+            query_embeddings: Dict[str, np.ndarray] = {}
+            to_embed: Dict[str, str] = {} # normalized query -> first raw query seen for it
+            for position, normalized_query, _ in pending:
+                if normalized_query in query_embeddings or normalized_query in to_embed:
+                    continue
+                cached_embedding = self.embedding_cache.get(normalized_query)
+                if cached_embedding is not None:
+                    query_embeddings[normalized_query] = cached_embedding
                 else:
-                    logger.warning(f"Could not find original record for kb_index '{kb_index}' from metadata: {doc.metadata} for command '{standard_command_text}'")
-                
-                results.append((standard_command_text, score, original_record))
-                logger.debug(f"RAG retrieved standard command: text='{standard_command_text}', score={score:.4f}")
-            return results
+                    to_embed[normalized_query] = queries[position]
+            if to_embed:
+                for normalized_query, embedding in zip(to_embed, self._embed_texts(list(to_embed.values()))):
+                    embedding = embedding.copy() # Own the row so the cache does not pin the whole batch matrix
+                    self.embedding_cache.put(normalized_query, embedding)
+                    query_embeddings[normalized_query] = embedding
+
+            for position, normalized_query, result_key in pending:
+                # backend.search returns a list of (kb_index, score) tuples, best first
+                hits = index.backend.search(query_embeddings[normalized_query], top_k)
+                query_results = []
+                for kb_index, score in hits:
+                    if 0 <= kb_index < len(index.knowledge_base):
+                        original_record = index.knowledge_base[kb_index] # Get the full original record
+                    else:
+                        logger.warning(f"Could not find original record for kb_index '{kb_index}'")
+                        continue
+                    standard_command_text = original_record["text"]
+                    query_results.append((standard_command_text, score, original_record))
+                    logger.debug(f"RAG retrieved standard command: text='{standard_command_text}', score={score:.4f}")
+                self.result_cache.put(result_key, tuple(query_results))
+                results[position] = query_results
         except Exception as e:
             logger.error(f"Error during RAG retrieval of similar commands: {e}", exc_info=True)
-            return []
+        return [result if result is not None else [] for result in results]
+
+    @staticmethod
+    def _estimate_result_bytes(results: Tuple) -> int:
+        """Rough size of a cached result list: UTF-8 text plus a fixed per-entry overhead."""
+        return sum(len(text.encode('utf-8')) + 64 for text, _, _ in results)
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit rate and memory usage of the query embedding and result caches."""
+        return {
+            "query_embedding": self.embedding_cache.stats(),
+            "query_result": self.result_cache.stats(),
+        }
+
+    async def aretrieve_similar_commands(self, query: str, top_k: int = 1) -> List[Tuple[str, float, Dict]]:
+        """
+        Async variant of retrieve_similar_commands. The query embedding and vector
+        search run on the shared inference executor instead of the event loop.
+        """
+        return await get_inference_executor().run("rag_retriever", self.retrieve_similar_commands, query, top_k)
+
+    async def aretrieve_similar_commands_batch(self, queries: List[str], top_k: int = 1) -> List[List[Tuple[str, float, Dict]]]:
+        """Async variant of retrieve_similar_commands_batch, run on the shared inference executor."""
+        return await get_inference_executor().run("rag_retriever", self.retrieve_similar_commands_batch, queries, top_k)
 
 # --- Example Usage (for testing this file directly) ---
 if __name__ == '__main__':
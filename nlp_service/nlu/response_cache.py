@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from runtime.lru_cache import LRUCache
+from nlu.text_utils import normalize_utterance
+
+logger = logging.getLogger(__name__)
+
+
+class NLUResponseCache:
+    """
+    NLU结果缓存：以原始语句（精确匹配）和归一化语句（去空白/标点）为键
+
+    支持TTL与LRU淘汰，可选持久化到JSON文件，重启后仍能命中。
+    在事件循环中调用时，序列化和写盘放到线程中执行，不阻塞事件循环。
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl_seconds: Optional[float] = 86400,
+                 persist_path: Optional[str] = None,
+                 persist_interval_seconds: float = 30.0):
+        """
+        初始化NLUResponseCache
+
+        Args:
+            max_entries: 最大缓存条目数
+            ttl_seconds: 条目存活时间（秒），None表示不过期
+            persist_path: 持久化文件路径，None表示只缓存在内存中
+            persist_interval_seconds: 两次写盘之间的最小间隔（秒）
+        """
+        self.cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="nlu_response")
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.persist_interval_seconds = persist_interval_seconds
+        self._last_persist = 0.0
+        self._persist_lock = threading.Lock()
+        # 快照序号：后台写盘可能乱序完成，旧快照不能覆盖新快照
+        self._snapshot_seq = 0
+        self._written_seq = 0
+        # 后台写盘任务：保留引用，避免任务在完成前被垃圾回收
+        self._persist_tasks: Set[asyncio.Future] = set()
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        if self.persist_path:
+            self._load()
+
+    @staticmethod
+    def _exact_key(text: str) -> str:
+        return "exact:" + text
+
+    @staticmethod
+    def _normalized_key(text: str) -> str:
+        return "norm:" + normalize_utterance(text)
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存结果，先精确匹配再匹配归一化键
+
+        Returns:
+            缓存结果的副本，未命中时返回None
+        """
+        result = self.cache.get(self._exact_key(text))
+        if result is not None:
+            self.exact_hits += 1
+            return dict(result)
+        result = self.cache.get(self._normalized_key(text))
+        if result is not None:
+            self.normalized_hits += 1
+            return dict(result)
+        self.misses += 1
+        return None
+
+    def put(self, text: str, result: Dict[str, Any]) -> None:
+        """
+        写入缓存结果（同时写入精确键和归一化键）
+        """
+        value = dict(result)
+        self.cache.put(self._exact_key(text), value)
+        if normalize_utterance(text):
+            self.cache.put(self._normalized_key(text), value)
+        self._maybe_persist()
+
+    def _load(self) -> None:
+        """
+        从持久化文件加载未过期的条目
+        """
+        if not self.persist_path or not self.persist_path.exists():
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            now = time.time()
+            loaded = 0
+            for entry in entries:
+                expires_at = entry.get("expires_at")
+                if expires_at is not None and expires_at <= now:
+                    continue
+                self.cache.put(entry["key"], entry["value"], expires_at=expires_at)
+                loaded += 1
+            logger.info(f"从 {self.persist_path} 加载了 {loaded} 条NLU缓存")
+        except Exception as e:
+            logger.warning(f"加载NLU缓存文件失败: {e}")
+
+    def _maybe_persist(self) -> None:
+        if not self.persist_path:
+            return
+        if time.time() - self._last_persist < self.persist_interval_seconds:
+            return
+        self._last_persist = time.time()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.persist()
+            return
+        task = asyncio.ensure_future(self.apersist())
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    def _snapshot(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        在调用线程中复制当前条目，返回 (快照序号, 条目列表)
+        """
+        self._snapshot_seq += 1
+        entries = [
+            {"key": key, "value": value, "expires_at": expires_at}
+            for key, value, expires_at in self.cache.entries()
+        ]
+        return self._snapshot_seq, entries
+
+    def _write(self, seq: int, entries: List[Dict[str, Any]]) -> None:
+        """
+        把条目快照经临时文件原子写入持久化文件
+        """
+        with self._persist_lock:
+            if seq <= self._written_seq:
+                return
+            try:
+                self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.persist_path.with_suffix(self.persist_path.suffix + ".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.persist_path)
+                self._written_seq = seq
+                self._last_persist = time.time()
+            except Exception as e:
+                logger.warning(f"写入NLU缓存文件失败: {e}")
+
+    def persist(self) -> None:
+        """
+        将当前缓存原子写入持久化文件（同步执行，用于没有事件循环的场景）
+        """
+        if not self.persist_path:
+            return
+        self._write(*self._snapshot())
+
+    async def apersist(self) -> None:
+        """
+        将当前缓存原子写入持久化文件：条目在事件循环中复制，JSON序列化与写盘在线程中执行
+        """
+        if not self.persist_path:
+            return
+        await asyncio.to_thread(self._write, *self._snapshot())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命中统计
+        """
+        cache_stats = self.cache.stats()
+        hits = self.exact_hits + self.normalized_hits
+        lookups = hits + self.misses
+        # 一次查询最多访问两个键，命中率按查询次数而不是按键访问次数计算
+        return {
+            "name": cache_stats["name"],
+            "size": cache_stats["size"],
+            "max_entries": cache_stats["max_entries"],
+            "evictions": cache_stats["evictions"],
+            "expirations": cache_stats["expirations"],
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "normalized_hits": self.normalized_hits,
+            "misses": self.misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,23 @@
+import unicodedata
+
+
+def normalize_utterance(text: str) -> str:
+    """
+    归一化用户语句，用作缓存键
+
+    全角转半角、去除空白和标点、英文转小写，
+    使 "打开客厅的灯。" 与 " 打开 客厅的灯 " 得到相同的键。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        归一化后的文本
+    """
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    return "".join(
+        char for char in normalized
+        if not char.isspace() and not unicodedata.category(char).startswith("P")
+    )
@@ -0,0 +1,3 @@
+"""
+推理运行时支持（批处理、执行器等）
+"""
\ No newline at end of file
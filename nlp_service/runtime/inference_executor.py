@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from runtime.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_metrics = get_metrics_registry()
+QUEUE_WAIT_SECONDS = _metrics.histogram("nlp_executor_queue_wait_seconds", "推理任务在执行器中的排队等待时间（秒）", ("engine",))
+RUN_SECONDS = _metrics.histogram("nlp_executor_run_seconds", "推理任务的执行时间（秒）", ("engine",))
+
+
+class _EngineSlot:
+    """
+    单个引擎的并发限制与排队统计
+    """
+
+    def __init__(self, max_concurrency: Optional[int]):
+        self.max_concurrency = max_concurrency
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_queue_depth = 0
+
+
+class InferenceExecutor:
+    """
+    专用推理执行器
+
+    阻塞的模型推理（PyTorch前向、Chroma检索等）提交到独立线程池执行，
+    避免占用FastAPI事件循环；可选的进程池用于不释放GIL的纯Python计算。
+    每个引擎可以单独限制并发数，并统计排队深度与等待时间。
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 process_workers: int = 0,
+                 engine_limits: Optional[Dict[str, int]] = None,
+                 default_engine_limit: Optional[int] = None):
+        """
+        初始化InferenceExecutor
+
+        Args:
+            max_workers: 推理线程池大小
+            process_workers: 进程池大小，0表示不启用
+            engine_limits: 各引擎的最大并发数，例如 {"whisper": 1, "bert_nlu": 2}
+            default_engine_limit: 未单独配置的引擎的最大并发数，None表示只受线程池大小限制
+        """
+        self.max_workers = max_workers
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self.process_pool: Optional[ProcessPoolExecutor] = (
+            ProcessPoolExecutor(max_workers=process_workers) if process_workers and process_workers > 0 else None
+        )
+        self.engine_limits = dict(engine_limits or {})
+        self.default_engine_limit = default_engine_limit
+        self._slots: Dict[str, _EngineSlot] = {}
+        self._lock = threading.Lock()
+        logger.info(
+            f"推理执行器已初始化，线程数: {max_workers}, 进程数: {process_workers or 0}, "
+            f"引擎并发限制: {self.engine_limits}"
+        )
+
+    def _get_slot(self, engine: str) -> _EngineSlot:
+        with self._lock:
+            slot = self._slots.get(engine)
+            if slot is None:
+                slot = _EngineSlot(self.engine_limits.get(engine, self.default_engine_limit))
+                self._slots[engine] = slot
+            if slot.max_concurrency and slot.semaphore is None:
+                slot.semaphore = asyncio.Semaphore(slot.max_concurrency)
+            return slot
+
+    async def _submit(self, engine: str, pool, fn: Callable, *args, **kwargs) -> Any:
+        slot = self._get_slot(engine)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+
+        enqueued_at = time.perf_counter()
+        slot.queued += 1
+        slot.max_queue_depth = max(slot.max_queue_depth, slot.queued)
+        acquired = False
+        try:
+            if slot.semaphore is not None:
+                await slot.semaphore.acquire()
+                acquired = True
+            slot.queued -= 1
+            started_at = time.perf_counter()
+            slot.total_wait_seconds += started_at - enqueued_at
+            QUEUE_WAIT_SECONDS.observe(started_at - enqueued_at, engine=engine)
+            slot.running += 1
+            try:
+                result = await loop.run_in_executor(pool, call)
+                slot.completed += 1
+                return result
+            except Exception:
+                slot.failed += 1
+                raise
+            finally:
+                slot.running -= 1
+                run_seconds = time.perf_counter() - started_at
+                slot.total_run_seconds += run_seconds
+                RUN_SECONDS.observe(run_seconds, engine=engine)
+        except asyncio.CancelledError:
+            if not acquired and slot.semaphore is not None:
+                slot.queued -= 1
+            raise
+        finally:
+            if acquired:
+                slot.semaphore.release()
+
+    async def run(self, engine: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        在推理线程池中执行阻塞函数
+
+        Args:
+            engine: 引擎名称，用于并发限制与统计
+            fn: 阻塞函数
+            *args, **kwargs: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        return await self._submit(engine, self.thread_pool, fn, *args, **kwargs)
+
+    async def run_in_process(self, engine: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        在进程池中执行函数（函数与参数必须可pickle）；未启用进程池时退回线程池
+        """
+        pool = self.process_pool if self.process_pool is not None else self.thread_pool
+        return await self._submit(engine, pool, fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各引擎的排队深度、运行数和耗时统计
+        """
+        with self._lock:
+            return {
+                engine: {
+                    "max_concurrency": slot.max_concurrency,
+                    "queue_depth": slot.queued,
+                    "max_queue_depth": slot.max_queue_depth,
+                    "running": slot.running,
+                    "completed": slot.completed,
+                    "failed": slot.failed,
+                    "avg_wait_seconds": (slot.total_wait_seconds / (slot.completed + slot.failed))
+                    if (slot.completed + slot.failed) else 0.0,
+                    "avg_run_seconds": (slot.total_run_seconds / (slot.completed + slot.failed))
+                    if (slot.completed + slot.failed) else 0.0,
+                }
+                for engine, slot in self._slots.items()
+            }
+
+    def shutdown(self) -> None:
+        """
+        关闭线程池和进程池
+        """
+        self.thread_pool.shutdown(wait=False)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False)
+
+
+# 全局执行器实例，首次使用时按默认参数创建
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def configure_inference_executor(config: Optional[Dict] = None) -> InferenceExecutor:
+    """
+    按配置（重新）创建全局推理执行器
+
+    Args:
+        config: inference_executor 配置段
+
+    Returns:
+        新的全局执行器
+    """
+    global _executor
+    config = config or {}
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = InferenceExecutor(
+            max_workers=config.get("max_workers", 4),
+            process_workers=config.get("process_workers", 0),
+            engine_limits=config.get("engine_limits"),
+            default_engine_limit=config.get("default_engine_limit"),
+        )
+        return _executor
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    获取全局推理执行器
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor()
+    return _executor
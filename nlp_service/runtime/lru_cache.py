@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    线程安全的LRU缓存，支持可选的TTL过期、命中统计和内存估算
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl_seconds: Optional[float] = None,
+                 name: str = "cache",
+                 size_fn: Optional[Callable[[Any], int]] = None,
+                 max_memory_bytes: Optional[int] = None):
+        """
+        初始化LRUCache
+
+        Args:
+            max_entries: 最大条目数，超出后淘汰最久未使用的条目
+            ttl_seconds: 条目存活时间（秒），None表示不过期
+            name: 缓存名称，用于日志和统计
+            size_fn: 估算单个值占用字节数的函数，用于内存统计
+            max_memory_bytes: 按size_fn估算的内存上限，超出后淘汰最久未使用的条目，None表示不限制
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.size_fn = size_fn
+        self.max_memory_bytes = max_memory_bytes
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._memory_bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        读取缓存，命中时将条目移动到最近使用位置
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            expires_at: 绝对过期时间戳，None时按ttl_seconds计算
+        """
+        if expires_at is None and self.ttl_seconds:
+            expires_at = time.time() + self.ttl_seconds
+        size = self.size_fn(value) if self.size_fn else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._memory_bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_memory_bytes is not None
+                    and self._memory_bytes > self.max_memory_bytes
+                    and len(self._data) > 1):
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        移除并返回条目
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self) -> None:
+        """
+        清空缓存（统计计数保留）
+        """
+        with self._lock:
+            self._data.clear()
+            self._memory_bytes = 0
+
+    def entries(self) -> Iterator[Tuple[Hashable, Any, Optional[float]]]:
+        """
+        按最久未使用到最近使用的顺序遍历未过期条目 (key, value, expires_at)
+        """
+        now = time.time()
+        with self._lock:
+            snapshot = list(self._data.items())
+        for key, (value, expires_at, _) in snapshot:
+            if expires_at is None or expires_at > now:
+                yield key, value, expires_at
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命中率、条目数和内存占用等统计信息
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+            }
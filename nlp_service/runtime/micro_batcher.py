@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from runtime.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_metrics = get_metrics_registry()
+BATCH_SIZE = _metrics.histogram("nlp_micro_batch_size", "微批处理的批大小", ("batcher",),
+                                buckets=(1, 2, 4, 8, 16, 32, 64))
+BATCH_WAIT_SECONDS = _metrics.histogram("nlp_micro_batch_wait_seconds", "请求等待凑批的时间（秒）", ("batcher",))
+
+
+class MicroBatcher:
+    """
+    asyncio动态微批处理器
+
+    在 max_wait_ms 毫秒内（或攒够 max_batch_size 条时）收集并发请求，
+    调用一次 batch_fn 处理整批数据，再把逐条结果分发回各自等待的future。
+    """
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0,
+                 name: str = "micro_batcher"):
+        """
+        初始化MicroBatcher
+
+        Args:
+            batch_fn: 异步批处理函数，接收输入列表并返回等长的结果列表
+            max_batch_size: 单批最大条数
+            max_wait_ms: 收集一批的最长等待时间（毫秒）
+            name: 批处理器名称，用于日志
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 运行中的批处理任务：保留引用，避免任务在完成前被垃圾回收
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        提交单条输入并等待其所在批次的结果
+
+        Args:
+            item: 单条输入
+
+        Returns:
+            该输入对应的结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """
+        取出当前等待的请求并启动批处理任务
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        """
+        执行一个批次并把结果或异常分发给对应的future
+        """
+        items = [item for item, _, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        started_at = time.perf_counter()
+        BATCH_SIZE.observe(len(items), batcher=self.name)
+        for _, _, enqueued_at in batch:
+            BATCH_WAIT_SECONDS.observe(started_at - enqueued_at, batcher=self.name)
+        logger.debug(f"{self.name}: 处理批次，大小 {len(items)}")
+        try:
+            results = await self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: 批处理结果数量 ({len(results)}) 与输入数量 ({len(items)}) 不一致")
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            logger.error(f"{self.name}: 批处理失败: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # 批处理任务被取消（CancelledError等BaseException）时，取消仍在等待的future后继续向上抛出，
+            # 避免调用方永远挂起
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> dict:
+        """
+        获取批处理统计信息
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "pending": len(self._pending),
+            "running_batches": len(self._batch_tasks),
+        }
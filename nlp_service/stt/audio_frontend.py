@@ -0,0 +1,263 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from stt.audio_io import SAMPLE_RATE, decode_audio_bytes
+
+try:
+    import torch
+except ImportError:
+    torch = None  # type: ignore
+
+try:
+    from whisper.audio import mel_filters as whisper_mel_filters
+except ImportError:
+    whisper_mel_filters = None  # type: ignore
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# Whisper的特征参数：25ms窗、10ms帧移、30秒输入窗口
+N_FFT = 400
+HOP_LENGTH = 160
+CHUNK_LENGTH = 30
+N_SAMPLES = CHUNK_LENGTH * SAMPLE_RATE
+
+AudioInput = Union[bytes, np.ndarray, "torch.Tensor"]
+
+
+def _hz_to_mel(frequencies: np.ndarray) -> np.ndarray:
+    """Slaney刻度的Hz到Mel转换（与librosa默认一致）"""
+    frequencies = np.asanyarray(frequencies, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = frequencies / f_sp
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_region = frequencies >= min_log_hz
+    mels[log_region] = min_log_mel + np.log(frequencies[log_region] / min_log_hz) / logstep
+    return mels
+
+
+def _mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    """Slaney刻度的Mel到Hz转换"""
+    mels = np.asanyarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    freqs = f_sp * mels
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_region = mels >= min_log_mel
+    freqs[log_region] = min_log_hz * np.exp(logstep * (mels[log_region] - min_log_mel))
+    return freqs
+
+
+def compute_mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """
+    计算Slaney归一化的三角Mel滤波器组（等价于 librosa.filters.mel 的默认参数）
+
+    Returns:
+        形状为 (n_mels, n_fft // 2 + 1) 的float32矩阵
+    """
+    fft_freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    mel_points = _mel_to_hz(np.linspace(_hz_to_mel(np.array([0.0]))[0],
+                                        _hz_to_mel(np.array([sample_rate / 2.0]))[0],
+                                        n_mels + 2))
+    fdiff = np.diff(mel_points)
+    ramps = mel_points[:, None] - fft_freqs[None, :]
+
+    weights = np.zeros((n_mels, len(fft_freqs)), dtype=np.float64)
+    for i in range(n_mels):
+        lower = -ramps[i] / fdiff[i]
+        upper = ramps[i + 2] / fdiff[i + 1]
+        weights[i] = np.maximum(0, np.minimum(lower, upper))
+
+    # Slaney归一化：每个滤波器面积近似相等
+    enorm = 2.0 / (mel_points[2: n_mels + 2] - mel_points[:n_mels])
+    weights *= enorm[:, None]
+    return weights.astype(np.float32)
+
+
+class AudioFrontend:
+    """
+    STT引擎共享的音频前端：计算Whisper格式的log-Mel特征
+
+    Mel滤波器组和窗函数按 (采样率, n_fft, n_mels, 设备) 缓存，只计算一次；
+    多段音频可以在一次调用中批量计算（torch可用时用batched STFT，否则用NumPy向量化实现）。
+    安装了whisper时使用其自带的滤波器组，保证特征与 whisper.log_mel_spectrogram 一致。
+    """
+
+    def __init__(self,
+                 sample_rate: int = SAMPLE_RATE,
+                 n_fft: int = N_FFT,
+                 hop_length: int = HOP_LENGTH,
+                 n_mels: int = 80,
+                 backend: str = "auto"):
+        """
+        初始化AudioFrontend
+
+        Args:
+            sample_rate: 采样率
+            n_fft: FFT窗长
+            hop_length: 帧移
+            n_mels: Mel通道数（Whisper large-v3为128，其余为80）
+            backend: "torch"、"numpy" 或 "auto"（torch可用时用torch）
+        """
+        if backend == "auto":
+            backend = "torch" if torch is not None else "numpy"
+        if backend == "torch" and torch is None:
+            raise ImportError("backend为'torch'，但未安装PyTorch")
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.backend = backend
+        self._filters: Dict[Tuple, object] = {}
+        self._windows: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def mel_filterbank_numpy(self) -> np.ndarray:
+        """
+        获取缓存的Mel滤波器组（NumPy）
+        """
+        key = ("numpy", None)
+        with self._lock:
+            filters = self._filters.get(key)
+            if filters is None:
+                filters = self._load_filterbank()
+                self._filters[key] = filters
+            return filters  # type: ignore[return-value]
+
+    def _load_filterbank(self) -> np.ndarray:
+        # whisper自带的滤波器组只针对16kHz、n_fft=400
+        if whisper_mel_filters is not None and self.sample_rate == SAMPLE_RATE and self.n_fft == N_FFT:
+            try:
+                return whisper_mel_filters("cpu", self.n_mels).numpy().astype(np.float32)
+            except Exception as e:
+                logger.debug(f"加载whisper滤波器组失败，改为本地计算: {str(e)}")
+        return compute_mel_filterbank(self.sample_rate, self.n_fft, self.n_mels)
+
+    def _torch_filterbank(self, device) -> "torch.Tensor":
+        key = ("torch", str(device))
+        with self._lock:
+            filters = self._filters.get(key)
+        if filters is None:
+            filters = torch.from_numpy(self.mel_filterbank_numpy()).to(device)
+            with self._lock:
+                self._filters[key] = filters
+        return filters  # type: ignore[return-value]
+
+    def _torch_window(self, device) -> "torch.Tensor":
+        key = ("torch", str(device))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = torch.hann_window(self.n_fft).to(device)
+                self._windows[key] = window
+            return window
+
+    def _numpy_window(self) -> np.ndarray:
+        key = ("numpy", None)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                # 周期Hann窗，与 torch.hann_window 默认一致
+                window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.n_fft) / self.n_fft)).astype(np.float32)
+                self._windows[key] = window
+            return window  # type: ignore[return-value]
+
+    def _to_numpy(self, audio: AudioInput) -> np.ndarray:
+        if isinstance(audio, (bytes, bytearray)):
+            return decode_audio_bytes(bytes(audio), self.sample_rate)
+        if torch is not None and isinstance(audio, torch.Tensor):
+            return audio.detach().cpu().numpy().astype(np.float32)
+        return np.asarray(audio, dtype=np.float32)
+
+    @staticmethod
+    def _fit_length(audio: np.ndarray, length: int) -> np.ndarray:
+        if len(audio) > length:
+            return audio[:length]
+        if len(audio) < length:
+            return np.pad(audio, (0, length - len(audio)))
+        return audio
+
+    def log_mel_batch(self,
+                      clips: Sequence[AudioInput],
+                      pad_to_samples: Optional[int] = N_SAMPLES,
+                      device=None):
+        """
+        批量计算log-Mel特征
+
+        Args:
+            clips: 音频列表，每项可以是编码后的音频字节、float32数组或torch张量
+            pad_to_samples: 每段填充/截断到的采样点数，默认30秒（Whisper输入窗口）；
+                            None表示填充到本批最长的一段
+            device: torch后端的计算设备，None表示CPU
+
+        Returns:
+            形状为 (B, n_mels, n_frames) 的特征，torch后端返回张量，numpy后端返回数组
+        """
+        arrays = [self._to_numpy(clip) for clip in clips]
+        length = pad_to_samples or max((len(a) for a in arrays), default=0)
+        batch = np.stack([self._fit_length(a, length) for a in arrays]) if arrays else np.zeros((0, length), np.float32)
+        if self.backend == "torch":
+            return self._log_mel_torch(batch, device)
+        return self._log_mel_numpy(batch)
+
+    def log_mel(self, audio: AudioInput, pad_to_samples: Optional[int] = N_SAMPLES, device=None):
+        """
+        计算单段音频的log-Mel特征，形状为 (n_mels, n_frames)
+        """
+        return self.log_mel_batch([audio], pad_to_samples=pad_to_samples, device=device)[0]
+
+    def _log_mel_torch(self, batch: np.ndarray, device) -> "torch.Tensor":
+        device = device or torch.device("cpu")
+        audio = torch.from_numpy(batch).to(device)
+        stft = torch.stft(audio, self.n_fft, self.hop_length, window=self._torch_window(device), return_complex=True)
+        magnitudes = stft[..., :-1].abs() ** 2
+        mel_spec = self._torch_filterbank(device) @ magnitudes
+        log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+        # 动态范围按每段音频单独压缩，与逐段计算的结果一致
+        clip_max = log_spec.amax(dim=(-2, -1), keepdim=True)
+        log_spec = torch.maximum(log_spec, clip_max - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+    def _log_mel_numpy(self, batch: np.ndarray) -> np.ndarray:
+        pad = self.n_fft // 2
+        padded = np.pad(batch, ((0, 0), (pad, pad)), mode="reflect")
+        n_frames = 1 + (padded.shape[1] - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.as_strided(
+            padded,
+            shape=(padded.shape[0], n_frames, self.n_fft),
+            strides=(padded.strides[0], padded.strides[1] * self.hop_length, padded.strides[1]),
+            writeable=False,
+        )
+        spectrum = np.fft.rfft(frames * self._numpy_window(), axis=-1)
+        magnitudes = (np.abs(spectrum[:, :-1, :]) ** 2).astype(np.float32)  # (B, n_frames - 1, n_fft // 2 + 1)
+        mel_spec = np.einsum("mf,btf->bmt", self.mel_filterbank_numpy(), magnitudes)
+        log_spec = np.log10(np.maximum(mel_spec, 1e-10))
+        clip_max = log_spec.max(axis=(-2, -1), keepdims=True)
+        log_spec = np.maximum(log_spec, clip_max - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+# 按参数缓存的前端实例
+_frontends: Dict[Tuple, AudioFrontend] = {}
+_frontends_lock = threading.Lock()
+
+
+def get_audio_frontend(n_mels: int = 80,
+                       sample_rate: int = SAMPLE_RATE,
+                       backend: str = "auto") -> AudioFrontend:
+    """
+    获取共享的AudioFrontend实例（滤波器组和窗函数在实例内缓存）
+    """
+    key = (n_mels, sample_rate, backend)
+    with _frontends_lock:
+        frontend = _frontends.get(key)
+        if frontend is None:
+            frontend = AudioFrontend(sample_rate=sample_rate, n_mels=n_mels, backend=backend)
+            _frontends[key] = frontend
+        return frontend
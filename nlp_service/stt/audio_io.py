@@ -0,0 +1,191 @@
+import io
+import logging
+import subprocess
+import wave
+
+import numpy as np
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None  # type: ignore
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# STT模型统一使用的采样率
+SAMPLE_RATE = 16000
+
+
+def is_wav(audio_data: bytes) -> bool:
+    """
+    判断字节流是否为RIFF/WAVE格式
+    """
+    return len(audio_data) >= 12 and audio_data[:4] == b"RIFF" and audio_data[8:12] == b"WAVE"
+
+
+def pcm16_to_float32(pcm_data: bytes) -> np.ndarray:
+    """
+    将16位小端PCM字节流转换为[-1, 1]范围的float32数组
+    """
+    usable = len(pcm_data) - (len(pcm_data) % 2)
+    return np.frombuffer(pcm_data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _pcm_to_float32(frames: bytes, sample_width: int) -> np.ndarray:
+    """
+    按采样宽度将整型PCM帧转换为float32
+    """
+    if sample_width == 1:
+        # 8位WAV为无符号整数
+        return (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        as_int32 = (raw[:, 0].astype(np.int32)
+                    | (raw[:, 1].astype(np.int32) << 8)
+                    | (raw[:, 2].astype(np.int32) << 16))
+        as_int32 = np.where(as_int32 & 0x800000, as_int32 - 0x1000000, as_int32)
+        return as_int32.astype(np.float32) / 8388608.0
+    if sample_width == 4:
+        return np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise ValueError(f"不支持的采样宽度: {sample_width}")
+
+
+def _decode_wav(audio_data: bytes, sample_rate: int) -> np.ndarray:
+    """
+    直接在内存中解析PCM WAV，必要时进行声道合并与重采样
+    """
+    with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        source_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    audio = _pcm_to_float32(frames, sample_width)
+    if channels > 1:
+        audio = audio[: len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+
+    return resample_audio(audio, source_rate, sample_rate)
+
+
+def resample_audio(audio: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    将float32波形从source_rate重采样到target_rate（多相滤波，需要scipy）
+    """
+    if source_rate != target_rate:
+        if resample_poly is None:
+            raise ValueError(f"采样率 {source_rate}Hz 需要重采样，但未安装scipy")
+        gcd = np.gcd(source_rate, target_rate)
+        audio = resample_poly(audio, target_rate // gcd, source_rate // gcd)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+class StreamingResampler:
+    """
+    分块输入的流式重采样器（多相滤波，需要scipy）
+
+    逐块调用 resample_poly 会在每块边界按零填充处理，产生边缘伪影。这里保留滤波器
+    半长度的输入历史，只输出右侧上下文已经完整的样本，拼接结果与整段重采样一致。
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = SAMPLE_RATE):
+        if resample_poly is None:
+            raise ValueError(f"采样率 {source_rate}Hz 需要重采样，但未安装scipy")
+        gcd = int(np.gcd(source_rate, target_rate))
+        self.up = target_rate // gcd
+        self.down = source_rate // gcd
+        # resample_poly 默认滤波器半长度为 10*max(up, down)（上采样域），换算为输入样本数并留出余量
+        self.context = 10 * max(self.up, self.down) // self.up + 2
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # 缓冲区首个样本的全局输入序号，始终是 down 的整数倍
+        self._output_pos = 0    # 下一个待输出样本的全局输出序号
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """
+        输入一块波形，返回目前可以确定的重采样输出
+        """
+        self._buffer = np.concatenate([self._buffer, np.asarray(audio, dtype=np.float32)])
+        total = self._buffer_start + len(self._buffer)
+        if total <= self.context:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit((total - self.context) * self.up // self.down + 1)
+
+    def flush(self) -> np.ndarray:
+        """
+        输入结束：按整段重采样的方式（末尾零填充）输出剩余样本
+        """
+        total = self._buffer_start + len(self._buffer)
+        return self._emit(-(-total * self.up // self.down))
+
+    def _emit(self, output_end: int) -> np.ndarray:
+        if output_end <= self._output_pos:
+            return np.zeros(0, dtype=np.float32)
+        # 丢弃不再影响后续输出的历史样本
+        keep_from = max(0, self._output_pos * self.down // self.up - self.context)
+        keep_from = keep_from // self.down * self.down
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+
+        resampled = resample_poly(self._buffer, self.up, self.down)
+        offset = self._buffer_start * self.up // self.down
+        output = resampled[self._output_pos - offset: output_end - offset]
+        self._output_pos = output_end
+        return np.ascontiguousarray(output, dtype=np.float32)
+
+
+def float32_to_wav_bytes(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    将float32波形编码为16位单声道PCM WAV字节流
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _decode_with_ffmpeg(audio_data: bytes, sample_rate: int) -> np.ndarray:
+    """
+    通过管道交给ffmpeg解码压缩格式（webm/ogg/mp3等），不经过文件系统
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        completed = subprocess.run(cmd, input=audio_data, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise RuntimeError("未找到ffmpeg，无法解码压缩音频格式") from e
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg解码音频失败: {e.stderr.decode(errors='ignore')}") from e
+    return pcm16_to_float32(completed.stdout)
+
+
+def decode_audio_bytes(audio_data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    将上传的音频字节流解码为单声道float32 PCM数组
+
+    PCM WAV在内存中直接解析；其他压缩格式通过管道交给ffmpeg。
+
+    Args:
+        audio_data: 音频数据的字节流
+        sample_rate: 目标采样率
+
+    Returns:
+        形状为 (n_samples,) 的float32数组，取值范围[-1, 1]
+    """
+    if is_wav(audio_data):
+        try:
+            return _decode_wav(audio_data, sample_rate)
+        except (wave.Error, ValueError, EOFError) as e:
+            # 例如IEEE浮点WAV，wave模块无法解析，交给ffmpeg处理
+            logger.debug(f"WAV快速路径解析失败，改用ffmpeg: {str(e)}")
+    return _decode_with_ffmpeg(audio_data, sample_rate)
@@ -3,6 +3,8 @@ import os
 import sys
 from pathlib import Path
 from typing import Dict, Any, List
+import time
+import numpy as np
 import torch
 import dolphin
 import re
@@ -12,6 +14,9 @@ from zhconv import convert
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from interfaces.stt_interface import STTInterface, STTError
+from stt.model_registry import get_model_registry
+from stt.audio_io import decode_audio_bytes, SAMPLE_RATE
+from runtime.inference_executor import get_inference_executor
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -21,6 +26,9 @@ class DolphinSTTEngine(STTInterface):
     使用Dolphin模型的STT引擎
     """
     
+    # 用于去除识别结果中的语言/时间戳标记
+    TAG_PATTERN = re.compile(r"<[^>]*>")
+    
     def __init__(self, config: Dict):
         """
         初始化DolphinSTTEngine
@@ -45,6 +53,9 @@ class DolphinSTTEngine(STTInterface):
             "models", 
             "dolphin"
         ))
+        # 模型常驻于引擎生命周期内，首次使用或预热时加载
+        self.model_key = ("dolphin", self.model_size, self.device_name)
+        self.model = None
         logger.info(f"DolphinSTTEngine初始化完成，模型大小: {self.model_size}, 设备: {self.device_name}")
     
     async def transcribe(self, audio_data: bytes) -> str:
@@ -64,33 +75,94 @@ class DolphinSTTEngine(STTInterface):
             raise STTError("Dolphin引擎不可用")
         
         try:
-            # 保存音频数据到临时文件
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_filename = temp_file.name
-                temp_file.write(audio_data)
-            
-            logger.info(f"音频数据已保存到临时文件: {temp_filename}")
-            
-            # 加载音频和模型
-            waveform = dolphin.load_audio(temp_filename)
-            model = dolphin.load_model(self.model_size, self.models_dir,self.device_name)
-            
-            # 执行转录
-            result = model(waveform)
-            
-            # 清理临时文件
-            os.unlink(temp_filename)
+            # 解码与推理都在推理执行器中进行，不阻塞事件循环
+            return await get_inference_executor().run("dolphin", self._transcribe_bytes, audio_data)
+        except Exception as e:
+            logger.error(f"音频转文本失败: {str(e)}")
+            raise STTError(f"音频转文本失败: {str(e)}")
+    
+    async def transcribe_waveform(self, waveform) -> str:
+        """
+        将已解码的16kHz波形转换为文本（流式识别和VAD裁剪后的音频走这里）
+        
+        Args:
+            waveform: float32波形数组
             
-            pattern = re.compile(r"<[^>]*>")
-            result_text = pattern.sub("", result.text)
-            converted_text = convert(result_text, 'zh-cn')
-            return converted_text
+        Returns:
+            转换后的文本
             
+        Raises:
+            STTError: 如果转换失败
+        """
+        if not self.available():
+            raise STTError("Dolphin引擎不可用")
+        
+        try:
+            return await get_inference_executor().run("dolphin", self._transcribe_waveform, waveform)
         except Exception as e:
             logger.error(f"音频转文本失败: {str(e)}")
             raise STTError(f"音频转文本失败: {str(e)}")
     
+    def _transcribe_bytes(self, audio_data: bytes) -> str:
+        """
+        在内存中解码音频并执行识别（阻塞调用，在推理执行器中运行）
+        
+        Args:
+            audio_data: 音频数据的字节流
+            
+        Returns:
+            转换后的文本
+        """
+        # 在内存中解码为16kHz float32 PCM，不经过临时文件
+        waveform = decode_audio_bytes(audio_data)
+        logger.info(f"音频已在内存中解码，时长: {len(waveform) / SAMPLE_RATE:.2f}s")
+        return self._transcribe_waveform(waveform)
+    
+    def _transcribe_waveform(self, waveform: np.ndarray) -> str:
+        """
+        对已解码的16kHz波形执行识别
+        
+        Args:
+            waveform: float32波形数组
+            
+        Returns:
+            转换后的文本
+        """
+        model = self._get_model()
+        
+        # 执行转录
+        result = model(waveform)
+        
+        result_text = self.TAG_PATTERN.sub("", result.text)
+        converted_text = convert(result_text, 'zh-cn')
+        return converted_text
+    
+    def _get_model(self):
+        """
+        获取常驻内存的Dolphin模型，首次调用时加载
+        
+        Returns:
+            Dolphin模型实例
+        """
+        if self.model is None:
+            self.model = get_model_registry().get_or_load(
+                self.model_key,
+                lambda: dolphin.load_model(self.model_size, self.models_dir, self.device_name)
+            )
+        return self.model
+    
+    def warmup(self) -> None:
+        """
+        预加载模型并对一段短静音执行一次推理，避免首个请求承担加载开销
+        """
+        if not self.available():
+            return
+        start = time.perf_counter()
+        model = self._get_model()
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        model(silence)
+        logger.info(f"Dolphin模型预热完成，耗时: {time.perf_counter() - start:.2f}s")
+    
     def get_supported_formats(self) -> list:
         """
         获取此STT引擎支持的音频格式列表
@@ -1,18 +1,22 @@
 import logging
-import os
 import sys
 import torch
 import whisper
 from pathlib import Path
-from typing import Dict, Any, List
-import tempfile
+from typing import Dict, Any, List, Optional
 import time
+from dataclasses import replace
 from zhconv import convert  
 
 # 将项目根目录添加到系统路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from interfaces.stt_interface import STTInterface, STTError
+from stt.model_registry import get_model_registry
+from stt.audio_io import decode_audio_bytes, SAMPLE_RATE
+from stt.audio_frontend import get_audio_frontend
+from runtime.inference_executor import get_inference_executor
+from runtime.micro_batcher import MicroBatcher
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -22,15 +26,34 @@ class WhisperSTTEngine(STTInterface):
     使用Whisper模型的STT引擎
     """
     
+    # 解码配置档：greedy延迟最低，beam准确率更高
+    DECODE_PROFILES = ("greedy", "beam")
+    
     def __init__(self, config: Dict):
         """
         初始化WhisperSTTEngine
         
         Args:
-            config: 引擎配置
+            config: 引擎配置，可包含:
+                model_size (str): 模型大小，默认 "small"
+                device (str): "auto"、"cuda" 或 "cpu"
+                language (str, optional): 固定识别语言（例如 "zh"），设置后跳过语言检测；
+                                          为空时每次识别前检测语言
+                decode_profile (str, optional): "greedy"（默认）或 "beam"
+                beam_size (int, optional): beam解码的束宽，默认 5
+                without_timestamps (bool, optional): 不预测时间戳token，默认 False
+                batching (dict, optional): 并发请求合并解码配置:
+                    enabled (bool): 是否把短时间内到达的请求合并为一个 [B, n_mels, 3000] 批次，默认 False
+                    max_batch_size (int): 单批最大条数，默认 8
+                    max_wait_ms (float): 收集一批的最长等待时间（毫秒），默认 20
         """
         super().__init__(config)
         self.model_size = self.config.get("model_size", "small")
+        self.language = self.config.get("language") or None
+        self.decode_profile = self.config.get("decode_profile", "greedy")
+        if self.decode_profile not in self.DECODE_PROFILES:
+            logger.warning(f"未知的解码配置档 '{self.decode_profile}'，使用greedy")
+            self.decode_profile = "greedy"
         
         # 检测可用设备并处理配置
         self.device_name = self.config.get("device", "auto")
@@ -40,7 +63,43 @@ class WhisperSTTEngine(STTInterface):
         else:
             self.device = torch.device(self.device_name)
         
-        logger.info(f"WhisperSTTEngine初始化完成，模型大小: {self.model_size}, 设备: {self.device_name}")
+        # 模型在进程内按 (模型大小, 设备) 只加载一次
+        self.model_key = ("whisper", self.model_size, self.device_name)
+        self.decoding_options = self._build_decoding_options()
+        
+        # 请求合并：并发请求的梅尔频谱堆叠为一批，编码器与解码器各执行一次
+        batching_config = self.config.get("batching") or {}
+        self.batcher: Optional[MicroBatcher] = None
+        if batching_config.get("enabled", False):
+            self.batcher = MicroBatcher(
+                self._transcribe_batch_async,
+                max_batch_size=batching_config.get("max_batch_size", 8),
+                max_wait_ms=batching_config.get("max_wait_ms", 20.0),
+                name="whisper_batcher"
+            )
+            logger.info(f"已启用Whisper请求合并解码: {batching_config}")
+        
+        logger.info(
+            f"WhisperSTTEngine初始化完成，模型大小: {self.model_size}, 设备: {self.device_name}, "
+            f"语言: {self.language or '自动检测'}, 解码配置档: {self.decode_profile}"
+        )
+    
+    def _build_decoding_options(self):
+        """
+        根据配置构建解码参数
+        
+        Returns:
+            whisper.DecodingOptions
+        """
+        options = {
+            "fp16": self.device_name != "cpu",
+            "language": self.language,
+            "without_timestamps": self.config.get("without_timestamps", False),
+            "temperature": 0.0,
+        }
+        if self.decode_profile == "beam":
+            options["beam_size"] = self.config.get("beam_size", 5)
+        return whisper.DecodingOptions(**options)
     
     async def transcribe(self, audio_data: bytes) -> str:
         """
@@ -59,48 +118,164 @@ class WhisperSTTEngine(STTInterface):
             raise STTError("Whisper引擎不可用")
         
         try:
-            # 保存音频数据到临时文件
-            temp_filename = self.save_audio_temp(audio_data)
-            
-            logger.info(f"音频数据已保存到临时文件: {temp_filename}")
-            
-            # 加载模型并明确指定设备
-            model = whisper.load_model(self.model_size).to(self.device)
-            logger.info(f"Whisper模型已加载到设备: {self.device}")
-            
-            # 加载音频并进行处理
-            audio = whisper.load_audio(temp_filename)
-            audio = whisper.pad_or_trim(audio)
+            if self.batcher is not None:
+                # 音频解码单独执行，只有模型推理进入合并批次
+                waveform = await get_inference_executor().run("audio_decode", decode_audio_bytes, audio_data)
+                return await self.batcher.submit(waveform)
+            # 解码与推理都在推理执行器中进行，不阻塞事件循环
+            return await get_inference_executor().run("whisper", self._transcribe_bytes, audio_data)
+        except Exception as e:
+            logger.error(f"音频转文本失败: {str(e)}")
+            raise STTError(f"音频转文本失败: {str(e)}")
+    
+    async def transcribe_waveform(self, waveform) -> str:
+        """
+        将已解码的16kHz波形转换为文本（流式识别和VAD裁剪后的音频走这里）
+        
+        Args:
+            waveform: float32波形数组
             
-            # 生成梅尔频谱图并移动到相同设备
-            mel = whisper.log_mel_spectrogram(audio).to(self.device)
+        Returns:
+            转换后的文本
             
-            # 检测语言
-            _, probs = model.detect_language(mel)
-            detected_lang = max(probs, key=probs.get)
-            logger.info(f"检测到的语言: {detected_lang}")
+        Raises:
+            STTError: 如果转换失败
+        """
+        if not self.available():
+            raise STTError("Whisper引擎不可用")
+        
+        try:
+            if self.batcher is not None:
+                return await self.batcher.submit(waveform)
+            return await get_inference_executor().run("whisper", self._transcribe_waveform, waveform)
+        except Exception as e:
+            logger.error(f"音频转文本失败: {str(e)}")
+            raise STTError(f"音频转文本失败: {str(e)}")
+    
+    def _transcribe_bytes(self, audio_data: bytes) -> str:
+        """
+        在内存中解码音频并执行识别（阻塞调用，在推理执行器中运行）
+        
+        Args:
+            audio_data: 音频数据的字节流
             
-            # 解码音频
-            options = whisper.DecodingOptions(fp16=False if self.device_name == "cpu" else True)
-            result = whisper.decode(model, mel, options)
+        Returns:
+            转换后的文本
+        """
+        # 在内存中解码为16kHz float32 PCM，不经过临时文件
+        audio = decode_audio_bytes(audio_data)
+        logger.info(f"音频已在内存中解码，时长: {len(audio) / SAMPLE_RATE:.2f}s")
+        return self._transcribe_waveform(audio)
+    
+    def _transcribe_waveform(self, audio) -> str:
+        """
+        对已解码的16kHz波形执行识别
+        
+        Args:
+            audio: float32波形数组
             
-            # 清理临时文件
-            try:
-                os.unlink(temp_filename)
-                logger.info(f"临时文件已删除: {temp_filename}")
-            except Exception as e:
-                logger.warning(f"临时文件删除失败: {str(e)}")
+        Returns:
+            转换后的文本
+        """
+        return self._transcribe_waveforms([audio])[0]
+    
+    async def _transcribe_batch_async(self, waveforms: List) -> List[str]:
+        """
+        合并批次的异步入口：整批推理提交到推理执行器
+        """
+        return await get_inference_executor().run("whisper", self._transcribe_waveforms, waveforms)
+    
+    def _transcribe_waveforms(self, waveforms: List) -> List[str]:
+        """
+        对一批16kHz波形执行一次批量识别
+        
+        Args:
+            waveforms: float32波形数组列表
             
+        Returns:
+            与输入等长的文本列表
+        """
+        # 从注册表获取常驻模型
+        model = self._get_model()
+        
+        # 共享音频前端：滤波器组与窗函数已缓存，直接在目标设备上计算30秒窗口的梅尔频谱 [B, n_mels, 3000]
+        mel = self._frontend(model).log_mel_batch(waveforms, device=self.device)
+        
+        if self.language is None:
+            results = self._decode_with_detected_language(model, mel)
+        else:
+            # 整批解码
+            results = whisper.decode(model, mel, self.decoding_options)
+        if len(waveforms) > 1:
+            logger.info(f"Whisper批量解码完成，批大小: {len(waveforms)}")
+        
+        texts = []
+        for result in results:
             # 将文本从繁体转换为简体中文
             converted_text = convert(result.text, 'zh-cn')
             logger.info(f"原始文本: {result.text}")
             logger.info(f"转换后文本: {converted_text}")
+            texts.append(converted_text)
+        return texts
+    
+    def _decode_with_detected_language(self, model, mel) -> List:
+        """
+        未配置语言时：检测一次语言，再把检测结果传给解码，避免decode内部重复检测
+        
+        Args:
+            model: Whisper模型
+            mel: 梅尔频谱批次 [B, n_mels, 3000]
             
-            return converted_text
-            
-        except Exception as e:
-            logger.error(f"音频转文本失败: {str(e)}")
-            raise STTError(f"音频转文本失败: {str(e)}")
+        Returns:
+            与批次等长的解码结果列表
+        """
+        _, probs_batch = model.detect_language(mel)
+        
+        # 按检测到的语言分组，同一语言的请求一起解码
+        groups: Dict[str, List[int]] = {}
+        for index, probs in enumerate(probs_batch):
+            language = max(probs, key=probs.get)
+            logger.info(f"检测到的语言: {language}")
+            groups.setdefault(language, []).append(index)
+        
+        results: List = [None] * len(probs_batch)
+        for language, indices in groups.items():
+            options = replace(self.decoding_options, language=language)
+            group_mel = mel[torch.tensor(indices, device=mel.device)]
+            for index, result in zip(indices, whisper.decode(model, group_mel, options)):
+                results[index] = result
+        return results
+    
+    def _get_model(self):
+        """
+        获取常驻内存的Whisper模型，首次调用时加载
+        
+        Returns:
+            Whisper模型实例
+        """
+        return get_model_registry().get_or_load(
+            self.model_key,
+            lambda: whisper.load_model(self.model_size, device=self.device)
+        )
+    
+    def _frontend(self, model):
+        """
+        获取与模型Mel通道数匹配的共享音频前端
+        """
+        return get_audio_frontend(n_mels=model.dims.n_mels, backend="torch")
+    
+    def warmup(self) -> None:
+        """
+        预加载模型并对一段静音执行一次解码，避免首个请求承担加载开销
+        """
+        if not self.available():
+            return
+        start = time.perf_counter()
+        model = self._get_model()
+        silence = torch.zeros(SAMPLE_RATE)
+        mel = self._frontend(model).log_mel(silence, device=self.device)
+        whisper.decode(model, mel, self.decoding_options)
+        logger.info(f"Whisper模型预热完成，耗时: {time.perf_counter() - start:.2f}s")
     
     def get_supported_formats(self) -> list:
         """
@@ -133,15 +308,3 @@ class WhisperSTTEngine(STTInterface):
         except ImportError:
             logger.warning("Whisper未安装，请使用: pip install -U openai-whisper")
             return False
-
-    def save_audio_temp(self, audio_data):
-        # 获取当前文件的上上级目录（即项目根目录）
-        project_root = Path(__file__).resolve().parent.parent.parent
-        tmp_dir = project_root / "data" / "tmp_audio"
-        tmp_dir.mkdir(parents=True, exist_ok=True)
-        fd, temp_filename = tempfile.mkstemp(suffix='.wav', dir=str(tmp_dir))
-        with os.fdopen(fd, 'wb') as tmp_file:
-            tmp_file.write(audio_data)
-        logger.info(f"写入后文件存在: {os.path.exists(temp_filename)}, 路径: {temp_filename}")
-        logger.info(f"文件大小: {os.path.getsize(temp_filename) if os.path.exists(temp_filename) else '不存在'}")
-        return temp_filename 
\ No newline at end of file
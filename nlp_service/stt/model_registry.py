@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from runtime.metrics import MODEL_LOAD_SECONDS
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_memory(model: Any) -> int:
+    """
+    估算模型参数与缓冲区占用的内存字节数
+
+    Args:
+        model: 模型对象，通常为torch.nn.Module
+
+    Returns:
+        估算的字节数，无法估算时返回0
+    """
+    if model is None:
+        return 0
+    # 部分第三方模型把torch模块包在属性里（例如 model.model）
+    if not hasattr(model, "parameters") and hasattr(model, "model"):
+        return estimate_model_memory(model.model)
+    total = 0
+    try:
+        for tensor in model.parameters():
+            total += tensor.numel() * tensor.element_size()
+        if hasattr(model, "buffers"):
+            for tensor in model.buffers():
+                total += tensor.numel() * tensor.element_size()
+    except Exception as e:
+        logger.debug(f"无法估算模型内存占用: {str(e)}")
+        return 0
+    return total
+
+
+class STTModelRegistry:
+    """
+    进程级的STT模型注册表
+
+    每个键（例如 (引擎, 模型大小, 设备)）只加载一次并常驻内存，
+    同时记录加载耗时与内存占用，供预热和监控使用。
+    """
+
+    def __init__(self):
+        self._models: Dict[Hashable, Any] = {}
+        self._stats: Dict[Hashable, Dict[str, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        获取已加载的模型，若未加载则调用loader加载并缓存
+
+        Args:
+            key: 模型键
+            loader: 无参加载函数，返回模型对象
+
+        Returns:
+            常驻内存的模型对象
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一个键只允许一个线程加载，其余线程等待结果
+        with key_lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            logger.info(f"正在加载STT模型: {key}")
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            memory_bytes = estimate_model_memory(model)
+            MODEL_LOAD_SECONDS.set(load_seconds, model="/".join(str(part) for part in key) if isinstance(key, tuple) else str(key))
+
+            self._models[key] = model
+            self._stats[key] = {
+                "load_seconds": load_seconds,
+                "memory_bytes": memory_bytes,
+                "loaded_at": time.time(),
+            }
+            logger.info(
+                f"STT模型加载完成: {key}, 耗时: {load_seconds:.2f}s, "
+                f"内存占用: {memory_bytes / (1024 * 1024):.1f}MB"
+            )
+            return model
+
+    def is_loaded(self, key: Hashable) -> bool:
+        """
+        检查模型是否已加载
+        """
+        return key in self._models
+
+    def memory_bytes(self, key: Hashable) -> int:
+        """
+        获取已加载模型的估算内存占用，未加载时返回0
+        """
+        stat = self._stats.get(key)
+        return stat["memory_bytes"] if stat else 0
+
+    def unload(self, key: Hashable) -> Optional[Any]:
+        """
+        从注册表中移除模型
+
+        Returns:
+            被移除的模型对象，若不存在则为None
+        """
+        with self._lock:
+            self._stats.pop(key, None)
+            return self._models.pop(key, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有已加载模型的加载耗时和内存占用
+
+        Returns:
+            以模型键字符串为键的统计信息字典
+        """
+        return {"/".join(str(part) for part in key) if isinstance(key, tuple) else str(key): dict(stat)
+                for key, stat in self._stats.items()}
+
+
+# 全局注册表实例
+_registry = STTModelRegistry()
+
+
+def get_model_registry() -> STTModelRegistry:
+    """
+    获取进程级的STT模型注册表
+    """
+    return _registry
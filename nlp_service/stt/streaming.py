@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import numpy as np
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from interfaces.stt_interface import STTInterface
+from stt.audio_io import SAMPLE_RATE, StreamingResampler, pcm16_to_float32
+from stt.vad import EnergyVAD
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+FinalCallback = Callable[[str, int], Awaitable[None]]
+
+
+class StreamingTranscriber:
+    """
+    流式语音识别会话
+
+    按块接收单声道PCM16音频，用能量VAD把音频流切分为语音段：
+    语音进行中每隔 partial_interval_ms 对当前段识别一次并推送 partial 结果；
+    检测到段尾静音（或段长超过上限）时立即对整段做最终识别，推送 final 结果，
+    并在后台调用 on_final（通常执行NLU），不等待客户端结束录音。
+    """
+
+    def __init__(self,
+                 engine: STTInterface,
+                 config: Optional[Dict] = None,
+                 on_event: Optional[EventCallback] = None,
+                 on_final: Optional[FinalCallback] = None,
+                 on_close: Optional[Callable[[], None]] = None,
+                 sample_rate: int = SAMPLE_RATE):
+        """
+        初始化StreamingTranscriber
+
+        Args:
+            engine: 用于识别的STT引擎
+            config: stt_streaming 配置段:
+                energy_threshold_db (float): 语音帧能量门限（dBFS），默认 -40
+                frame_ms (float): VAD帧长（毫秒），默认 30
+                partial_interval_ms (float): 推送中间结果的间隔（毫秒），默认 800
+                end_silence_ms (float): 判定一段语音结束的静音时长（毫秒），默认 600
+                min_speech_ms (float): 短于该时长的语音段视为噪声丢弃（毫秒），默认 200
+                max_segment_seconds (float): 单段最长时长（秒），超过后强制结束，默认 15
+                pre_roll_ms (float): 语音起点前保留的音频（毫秒），避免切掉首字，默认 200
+            on_event: 推送事件的回调，事件为 partial / final / error 字典
+            on_final: 每段最终识别文本的回调 (text, segment_index)
+            on_close: 会话关闭时调用一次（例如归还租用的引擎）
+            sample_rate: 输入PCM的采样率，非16kHz时跨块连续重采样
+        """
+        config = config or {}
+        self.engine = engine
+        self.on_event = on_event
+        self.on_final = on_final
+        self.on_close = on_close
+        self.input_sample_rate = sample_rate
+        # 重采样器跨块保留滤波器上下文，避免每块边界产生伪影
+        self._resampler = StreamingResampler(sample_rate, SAMPLE_RATE) if sample_rate != SAMPLE_RATE else None
+
+        self.vad = EnergyVAD(
+            threshold_db=config.get("energy_threshold_db", -40.0),
+            frame_ms=config.get("frame_ms", 30.0),
+        )
+        frame_ms = self.vad.frame_ms
+        self.partial_interval_frames = max(1, int(config.get("partial_interval_ms", 800) / frame_ms))
+        self.end_silence_frames = max(1, int(config.get("end_silence_ms", 600) / frame_ms))
+        self.min_speech_frames = max(1, int(config.get("min_speech_ms", 200) / frame_ms))
+        self.max_segment_frames = max(1, int(config.get("max_segment_seconds", 15) * 1000 / frame_ms))
+        # 段尾保留少量静音，其余静音不送入模型
+        self.tail_keep_frames = max(1, int(150 / frame_ms))
+
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._pre_roll: Deque[np.ndarray] = deque(maxlen=max(0, int(config.get("pre_roll_ms", 200) / frame_ms)))
+        self._segment_frames: List[np.ndarray] = []
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+        self._frame_index = 0
+        self._segment_start_frame = 0
+        self._partial_task: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        self.segment_index = 0
+        self.final_texts: List[str] = []
+
+    @property
+    def transcript(self) -> str:
+        """
+        目前为止所有语音段的最终识别文本
+        """
+        return "".join(self.final_texts)
+
+    async def feed(self, pcm_chunk: bytes) -> None:
+        """
+        接收一块PCM16音频并推进VAD状态机
+
+        Args:
+            pcm_chunk: 16位小端单声道PCM字节
+        """
+        audio = pcm16_to_float32(pcm_chunk)
+        if self._resampler is not None:
+            audio = self._resampler.process(audio)
+        await self._process_audio(audio)
+
+    async def _process_audio(self, audio: np.ndarray) -> None:
+        """
+        按VAD帧长切分16kHz波形并推进状态机，不足一帧的样本留到下一块
+        """
+        if len(self._remainder):
+            audio = np.concatenate([self._remainder, audio])
+
+        frame_length = self.vad.frame_length
+        n_frames = len(audio) // frame_length
+        self._remainder = audio[n_frames * frame_length:]
+        if n_frames == 0:
+            return
+
+        frames = audio[: n_frames * frame_length].reshape(n_frames, frame_length)
+        for frame, is_speech in zip(frames, self.vad.speech_frames(frames.ravel())):
+            self._frame_index += 1
+            if not self._in_speech:
+                if is_speech:
+                    self._start_segment(frame)
+                else:
+                    self._pre_roll.append(frame)
+                continue
+
+            self._segment_frames.append(frame)
+            if is_speech:
+                self._speech_frames += 1
+                self._silence_frames = 0
+            else:
+                self._silence_frames += 1
+            self._frames_since_partial += 1
+
+            if self._silence_frames >= self.end_silence_frames or len(self._segment_frames) >= self.max_segment_frames:
+                await self._finalize_segment()
+            elif self._frames_since_partial >= self.partial_interval_frames:
+                self._schedule_partial()
+
+    async def finish(self) -> None:
+        """
+        音频流结束：对未结束的语音段做最终识别，并等待所有后台回调完成
+        """
+        if self._resampler is not None:
+            await self._process_audio(self._resampler.flush())
+        if self._in_speech:
+            await self._finalize_segment()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """
+        取消仍在进行的中间识别和后台回调（例如客户端断开连接）
+        """
+        tasks = list(self._background_tasks)
+        if self._partial_task is not None:
+            tasks.append(self._partial_task)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        try:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            on_close, self.on_close = self.on_close, None
+            if on_close is not None:
+                on_close()
+
+    def _start_segment(self, frame: np.ndarray) -> None:
+        self._segment_frames = list(self._pre_roll) + [frame]
+        self._segment_start_frame = self._frame_index - len(self._segment_frames)
+        self._pre_roll.clear()
+        self._in_speech = True
+        self._speech_frames = 1
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+
+    def _schedule_partial(self) -> None:
+        """
+        在后台对当前段做一次中间识别；上一次中间识别未完成时跳过，避免积压
+        """
+        self._frames_since_partial = 0
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        waveform = np.concatenate(self._segment_frames)
+        self._partial_task = asyncio.create_task(self._run_partial(waveform, self.segment_index))
+
+    async def _run_partial(self, waveform: np.ndarray, segment: int) -> None:
+        try:
+            text = await self.engine.transcribe_waveform(waveform)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"中间识别失败: {str(e)}")
+            return
+        # 该段已经结束时丢弃过期的中间结果
+        if segment == self.segment_index and self._in_speech and text:
+            await self._emit({"type": "partial", "segment": segment, "text": text})
+
+    async def _finalize_segment(self) -> None:
+        frames = self._segment_frames
+        speech_frames = self._speech_frames
+        trailing_silence = self._silence_frames
+        start_frame = self._segment_start_frame
+
+        self._segment_frames = []
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+
+        # 该段的中间识别已无意义
+        if self._partial_task is not None and not self._partial_task.done():
+            self._partial_task.cancel()
+        self._partial_task = None
+
+        if speech_frames < self.min_speech_frames:
+            logger.debug(f"丢弃过短的语音段（{speech_frames}帧）")
+            return
+
+        drop = max(0, trailing_silence - self.tail_keep_frames)
+        frames = frames[: len(frames) - drop] if drop else frames
+        waveform = np.concatenate(frames)
+        segment = self.segment_index
+        self.segment_index += 1
+
+        frame_seconds = self.vad.frame_ms / 1000.0
+        try:
+            text = await self.engine.transcribe_waveform(waveform)
+        except Exception as e:
+            logger.error(f"语音段 {segment} 识别失败: {str(e)}")
+            await self._emit({"type": "error", "segment": segment, "error_message": str(e)})
+            return
+
+        logger.info(f"语音段 {segment} 最终识别结果: {text}")
+        self.final_texts.append(text)
+        await self._emit({
+            "type": "final",
+            "segment": segment,
+            "text": text,
+            "start": round(start_frame * frame_seconds, 3),
+            "end": round((start_frame + len(frames)) * frame_seconds, 3),
+        })
+        if self.on_final is not None and text and text.strip():
+            # NLU在后台执行，继续接收后续音频
+            task = asyncio.create_task(self._run_on_final(text, segment))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _run_on_final(self, text: str, segment: int) -> None:
+        try:
+            await self.on_final(text, segment)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"处理语音段 {segment} 的识别结果失败: {str(e)}")
+            await self._emit({"type": "error", "segment": segment, "error_message": str(e)})
+
+    async def _emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event is None:
+            return
+        try:
+            await self.on_event(event)
+        except Exception as e:
+            logger.warning(f"推送流式识别事件失败: {str(e)}")
+
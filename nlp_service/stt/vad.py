@@ -0,0 +1,146 @@
+import logging
+
+import numpy as np
+
+from stt.audio_io import SAMPLE_RATE
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def frame_energy_db(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    按不重叠的帧计算RMS能量（dBFS），不足一帧的尾部被忽略
+
+    Args:
+        audio: float32波形
+        frame_length: 每帧采样点数
+
+    Returns:
+        形状为 (n_frames,) 的能量数组
+    """
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(audio[: n_frames * frame_length], dtype=np.float32).reshape(n_frames, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+class EnergyVAD:
+    """
+    基于帧能量的语音活动检测
+
+    能量高于 threshold_db 的帧判为语音。家居场景的录音以近讲为主，
+    简单的能量门限即可区分命令与前后静音，不需要额外的模型。
+
+    裁剪整段录音（trim）时门限相对于该录音的噪声底计算，
+    录音电平较低但有效的命令不会因为固定的dBFS门限被整段判为静音。
+    """
+
+    def __init__(self,
+                 threshold_db: float = -40.0,
+                 frame_ms: float = 30.0,
+                 sample_rate: int = SAMPLE_RATE,
+                 noise_margin_db: float = 12.0,
+                 noise_percentile: float = 10.0,
+                 min_threshold_db: float = -65.0):
+        """
+        初始化EnergyVAD
+
+        Args:
+            threshold_db: 逐块判断（流式识别）时语音帧的能量门限（dBFS）
+            frame_ms: 帧长（毫秒）
+            sample_rate: 采样率
+            noise_margin_db: trim时语音帧需高出噪声底的分贝数
+            noise_percentile: trim时以帧能量的该百分位数作为噪声底
+            min_threshold_db: trim时门限的下限（dBFS），避免把数字静音中的微弱噪声当作语音
+        """
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.noise_percentile = noise_percentile
+        self.min_threshold_db = min_threshold_db
+        self.frame_ms = frame_ms
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+
+    def speech_frames(self, audio: np.ndarray) -> np.ndarray:
+        """
+        逐帧判断是否为语音
+
+        Args:
+            audio: float32波形
+
+        Returns:
+            形状为 (n_frames,) 的布尔数组
+        """
+        return frame_energy_db(audio, self.frame_length) > self.threshold_db
+
+    def relative_threshold_db(self, energies: np.ndarray) -> float:
+        """
+        根据一段录音的帧能量计算相对于噪声底的门限（dBFS）
+        """
+        if len(energies) == 0:
+            return self.min_threshold_db
+        noise_floor = float(np.percentile(energies, self.noise_percentile))
+        return max(noise_floor + self.noise_margin_db, self.min_threshold_db)
+
+    def trim(self, audio: np.ndarray, padding_ms: float = 200.0, min_speech_ms: float = 200.0) -> "TrimResult":
+        """
+        裁剪首尾静音
+
+        Args:
+            audio: float32波形
+            padding_ms: 在首个/最后一个语音帧之外保留的音频（毫秒），避免切掉首尾字
+            min_speech_ms: 语音帧总时长低于该值时视为没有语音
+
+        Returns:
+            TrimResult
+        """
+        original_duration = len(audio) / self.sample_rate
+        energies = frame_energy_db(audio, self.frame_length)
+        speech = energies > self.relative_threshold_db(energies)
+        min_speech_frames = max(1, int(min_speech_ms / self.frame_ms))
+        if int(speech.sum()) < min_speech_frames:
+            return TrimResult(audio[:0], original_duration, 0.0, 0.0, has_speech=False)
+
+        speech_indices = np.flatnonzero(speech)
+        padding = int(self.sample_rate * padding_ms / 1000)
+        start = max(0, int(speech_indices[0]) * self.frame_length - padding)
+        end = min(len(audio), (int(speech_indices[-1]) + 1) * self.frame_length + padding)
+        return TrimResult(
+            audio[start:end],
+            original_duration,
+            (end - start) / self.sample_rate,
+            start / self.sample_rate,
+            has_speech=True,
+        )
+
+
+class TrimResult:
+    """
+    静音裁剪结果
+
+    Attributes:
+        audio: 裁剪后的波形（没有语音时为空数组）
+        original_duration: 原始时长（秒）
+        trimmed_duration: 裁剪后时长（秒）
+        offset: 裁剪后音频在原始音频中的起点（秒）
+        has_speech: 是否检测到语音
+    """
+
+    def __init__(self, audio: np.ndarray, original_duration: float, trimmed_duration: float,
+                 offset: float, has_speech: bool):
+        self.audio = audio
+        self.original_duration = original_duration
+        self.trimmed_duration = trimmed_duration
+        self.offset = offset
+        self.has_speech = has_speech
+
+    def to_dict(self):
+        return {
+            "has_speech": self.has_speech,
+            "audio_duration": round(self.original_duration, 3),
+            "speech_duration": round(self.trimmed_duration, 3),
+            "speech_offset": round(self.offset, 3),
+        }
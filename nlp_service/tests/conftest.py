@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 与服务代码一致：把 nlp_service 目录加入系统路径，按顶层包名导入
+sys.path.insert(0, str(Path(__file__).parent.parent))
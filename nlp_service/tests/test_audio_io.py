@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+signal = pytest.importorskip("scipy.signal")
+
+from stt.audio_io import StreamingResampler
+
+
+@pytest.mark.parametrize("source_rate", [8000, 22050, 44100, 48000])
+def test_chunked_resampling_matches_whole_signal(source_rate):
+    rng = np.random.default_rng(0)
+    audio = (rng.normal(size=source_rate) * 0.1).astype(np.float32)
+    resampler = StreamingResampler(source_rate)
+
+    chunks = []
+    offset = 0
+    while offset < len(audio):
+        size = int(rng.integers(1, 3000))
+        chunks.append(resampler.process(audio[offset: offset + size]))
+        offset += size
+    chunks.append(resampler.flush())
+
+    expected = signal.resample_poly(audio, resampler.up, resampler.down)
+    np.testing.assert_allclose(np.concatenate(chunks), expected, atol=1e-5)
@@ -0,0 +1,73 @@
+import asyncio
+
+from tts.audio_store import TTSAudioStore, encode_base64_reference, guess_media_type
+
+WAV_HEADER = b"RIFF\x24\x00\x00\x00WAVEfmt "
+
+
+def test_put_get_and_pop():
+    store = TTSAudioStore(max_entries=4, max_memory_mb=None, ttl_seconds=None)
+    audio_id = store.put(WAV_HEADER)
+
+    assert store.get(audio_id) == WAV_HEADER
+    assert store.pop(audio_id) == WAV_HEADER
+    assert store.get(audio_id) is None
+
+
+def test_reserve_then_resolve_wakes_waiters():
+    async def main():
+        store = TTSAudioStore()
+        audio_id = store.reserve()
+        assert store.is_pending(audio_id)
+        assert store.get(audio_id) is None
+
+        waiters = [asyncio.ensure_future(store.wait_for(audio_id, timeout=1.0)) for _ in range(2)]
+        await asyncio.sleep(0)
+        store.resolve(audio_id, b"audio")
+        return await asyncio.gather(*waiters), store.is_pending(audio_id), store.stats()["pending"]
+
+    results, pending, pending_count = asyncio.run(main())
+    assert results == [b"audio", b"audio"]
+    assert not pending
+    assert pending_count == 0
+
+
+def test_reserve_then_fail_reports_error():
+    async def main():
+        store = TTSAudioStore()
+        audio_id = store.reserve()
+        waiter = asyncio.ensure_future(store.wait_for(audio_id, timeout=1.0))
+        await asyncio.sleep(0)
+        store.fail(audio_id, "engine crashed")
+        return await waiter, store.error(audio_id), store.is_pending(audio_id)
+
+    assert asyncio.run(main()) == (None, "engine crashed", False)
+
+
+def test_wait_for_timeout_does_not_cancel_other_waiters():
+    async def main():
+        store = TTSAudioStore()
+        audio_id = store.reserve()
+        impatient = await store.wait_for(audio_id, timeout=0.01)
+        patient = asyncio.ensure_future(store.wait_for(audio_id, timeout=1.0))
+        await asyncio.sleep(0)
+        store.resolve(audio_id, b"late audio")
+        return impatient, await patient
+
+    assert asyncio.run(main()) == (None, b"late audio")
+
+
+def test_unknown_id_returns_none_immediately():
+    store = TTSAudioStore()
+    assert asyncio.run(store.wait_for("missing", timeout=0.01)) is None
+    assert store.error("missing") is None
+
+
+def test_iter_chunks_and_helpers():
+    audio = bytes(range(256)) * 5
+    assert b"".join(TTSAudioStore.iter_chunks(audio, chunk_size=100)) == audio
+    assert len(list(TTSAudioStore.iter_chunks(audio, chunk_size=100))) == 13
+    assert guess_media_type(WAV_HEADER) == "audio/wav"
+    assert guess_media_type(b"OggS....") == "audio/ogg"
+    assert guess_media_type(b"\x00\x01") == "application/octet-stream"
+    assert encode_base64_reference(b"hi") == "base64://aGk="
@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import threading
+
+from app.engine_pool import EnginePool
+from stt.model_registry import get_model_registry
+
+_model_ids = itertools.count()
+
+
+class FakeEngine:
+    """
+    模拟把模型放在STT模型注册表中的引擎
+    """
+
+    def __init__(self, config, model_bytes=0):
+        self.config = config
+        self.closed = False
+        self.model_key = ("fake", config["engine"], next(_model_ids))
+        if model_bytes:
+            get_model_registry().get_or_load(self.model_key, object)
+            get_model_registry()._stats[self.model_key]["memory_bytes"] = model_bytes
+
+    def close(self):
+        self.closed = True
+
+
+def test_concurrent_misses_share_one_creation():
+    calls = []
+
+    def creator(config):
+        calls.append(threading.current_thread().name)
+        return FakeEngine(config)
+
+    async def main():
+        pool = EnginePool(max_engines=2)
+        engines = await asyncio.gather(*(pool.get_or_create("stt", {"engine": "a"}, creator) for _ in range(3)))
+        return pool, engines
+
+    pool, engines = asyncio.run(main())
+    assert len(calls) == 1
+    assert calls[0] != threading.main_thread().name
+    assert all(engine is engines[0] for engine in engines)
+    assert pool.stats()["misses"] == 1
+    assert pool.stats()["hits"] == 2
+
+
+def test_engine_larger_than_memory_limit_is_not_evicted_on_creation():
+    async def main():
+        pool = EnginePool(max_engines=4, max_memory_mb=1)
+        engine = await pool.get_or_create("stt", {"engine": "huge"},
+                                          lambda config: FakeEngine(config, model_bytes=4 * 1024 * 1024))
+        return pool, engine
+
+    pool, engine = asyncio.run(main())
+    assert not engine.closed
+    assert get_model_registry().is_loaded(engine.model_key)
+    assert pool.engines("stt") == [engine]
+    assert pool.stats()["evictions"] == 0
+
+
+def test_memory_limit_evicts_older_engines_and_unloads_their_models():
+    async def main():
+        pool = EnginePool(max_engines=4, max_memory_mb=1)
+        first = await pool.get_or_create("stt", {"engine": "a"}, lambda c: FakeEngine(c, model_bytes=768 * 1024))
+        pool.release(first)
+        second = await pool.get_or_create("stt", {"engine": "b"}, lambda c: FakeEngine(c, model_bytes=768 * 1024))
+        return pool, first, second
+
+    pool, first, second = asyncio.run(main())
+    assert first.closed
+    assert not get_model_registry().is_loaded(first.model_key)
+    assert not second.closed
+    assert pool.engines("stt") == [second]
+    assert pool.memory_bytes() == 768 * 1024
+
+
+def test_leased_engine_is_closed_only_after_release():
+    async def main():
+        pool = EnginePool(max_engines=1)
+        first = await pool.get_or_create("tts", {"engine": "a"}, FakeEngine)
+        second = await pool.get_or_create("tts", {"engine": "b"}, FakeEngine)
+        return pool, first, second
+
+    pool, first, second = asyncio.run(main())
+    # first 仍被租用：移出池但不关闭
+    assert pool.engines("tts") == [second]
+    assert not first.closed
+    assert pool.stats()["draining"] == 1
+
+    pool.release(first)
+    assert first.closed
+    assert pool.stats()["draining"] == 0
+    assert not second.closed
+
+
+def test_pinned_engines_are_never_evicted():
+    pool = EnginePool(max_engines=1)
+    default = FakeEngine({"engine": "default"})
+    pool.put("nlu", {"engine": "default"}, default, pinned=True)
+
+    async def main():
+        first = await pool.get_or_create("nlu", {"engine": "a"}, FakeEngine)
+        pool.release(first)
+        second = await pool.get_or_create("nlu", {"engine": "b"}, FakeEngine)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.closed
+    assert not default.closed
+    assert pool.engines("nlu") == [default, second]
+
+
+class AsyncClosingEngine:
+    def __init__(self, config):
+        self.config = config
+        self.closed = False
+
+    async def aclose(self):
+        await asyncio.sleep(0)
+        self.closed = True
+
+
+def test_async_close_runs_on_eviction_and_shutdown():
+    async def main():
+        pool = EnginePool(max_engines=1)
+        first = await pool.get_or_create("nlu", {"engine": "a"}, AsyncClosingEngine)
+        pool.release(first)
+        second = await pool.get_or_create("nlu", {"engine": "b"}, AsyncClosingEngine)
+        await pool.aclose()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.closed
+    assert second.closed
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from runtime.micro_batcher import MicroBatcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_flushes_when_batch_is_full():
+    batches = []
+
+    async def batch_fn(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        # 等待时间足够长：只有攒满一批才会触发处理
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=10_000)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+
+    assert run(main()) == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+def test_flushes_partial_batch_after_max_wait():
+    batches = []
+
+    async def batch_fn(items):
+        batches.append(list(items))
+        return items
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=5)
+        return await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b")), timeout=1.0)
+
+    assert run(main()) == ["a", "b"]
+    assert batches == [["a", "b"]]
+
+
+def test_splits_into_batches_of_max_size_and_keeps_order():
+    sizes = []
+
+    async def batch_fn(items):
+        sizes.append(len(items))
+        await asyncio.sleep(0)
+        return [f"r{item}" for item in items]
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        return results, batcher.stats()
+
+    results, stats = run(main())
+    assert results == [f"r{i}" for i in range(10)]
+    assert sizes == [4, 4, 2]
+    assert stats["batches"] == 3
+    assert stats["items"] == 10
+    assert stats["pending"] == 0
+    assert stats["running_batches"] == 0
+
+
+def test_batch_exception_propagates_to_every_caller():
+    async def batch_fn(items):
+        raise ValueError("boom")
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=5)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_result_count_mismatch_is_an_error():
+    async def batch_fn(items):
+        return items[:1]
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=5)
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    with pytest.raises(RuntimeError):
+        run(main())
+
+
+def test_running_batch_tasks_are_referenced_until_done():
+    release = None
+
+    async def batch_fn(items):
+        await release.wait()
+        return items
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=5)
+        future = asyncio.ensure_future(batcher.submit("x"))
+        await asyncio.sleep(0.01)
+        running = batcher.stats()["running_batches"]
+        release.set()
+        result = await future
+        await asyncio.sleep(0)
+        return running, result, batcher.stats()["running_batches"]
+
+    assert run(main()) == (1, "x", 0)
+
+
+def test_cancelled_batch_cancels_waiters():
+    started = asyncio.Event()
+
+    async def batch_fn(items):
+        started.set()
+        await asyncio.Event().wait()
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=10_000)
+        waiters = [asyncio.ensure_future(batcher.submit(i)) for i in range(2)]
+        await started.wait()
+        for task in list(batcher._batch_tasks):
+            task.cancel()
+        # 等待方不能挂起：必须在超时前以取消结束
+        return await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1.0)
+
+    results = run(main())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
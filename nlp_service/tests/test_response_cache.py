@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from nlu.response_cache import NLUResponseCache
+
+RESULT = {"ACTION": "打开", "DEVICE_TYPE": "灯", "DEVICE_ID": "0", "LOCATION": "客厅", "PARAMETER": None}
+
+
+def test_exact_and_normalized_hits():
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=None)
+    cache.put("打开客厅的灯。", RESULT)
+
+    assert cache.get("打开客厅的灯。") == RESULT
+    # 空白、标点和全角差异命中归一化键
+    assert cache.get(" 打开 客厅的灯！") == RESULT
+    assert cache.get("关闭客厅的灯") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["normalized_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 2 / 3
+
+
+def test_returns_copies():
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=None)
+    cache.put("打开客厅的灯", RESULT)
+    cache.get("打开客厅的灯")["ACTION"] = "关闭"
+    assert cache.get("打开客厅的灯")["ACTION"] == "打开"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=60)
+    cache.put("打开客厅的灯", RESULT)
+
+    now[0] += 59
+    assert cache.get("打开客厅的灯") == RESULT
+    now[0] += 2
+    assert cache.get("打开客厅的灯") is None
+    assert cache.get("打开 客厅的灯") is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    # 每条语句占用精确键和归一化键两个条目
+    cache = NLUResponseCache(max_entries=4, ttl_seconds=None)
+    cache.put("打开客厅的灯", RESULT)
+    cache.put("关闭卧室的灯", dict(RESULT, ACTION="关闭"))
+    cache.put("打开空调", dict(RESULT, DEVICE_TYPE="空调"))
+
+    assert cache.get("打开客厅的灯") is None
+    assert cache.get("关闭卧室的灯")["ACTION"] == "关闭"
+    assert cache.get("打开空调")["DEVICE_TYPE"] == "空调"
+    assert cache.stats()["evictions"] == 2
+
+
+def test_recently_read_entry_survives_eviction():
+    cache = NLUResponseCache(max_entries=4, ttl_seconds=None)
+    cache.put("打开客厅的灯", RESULT)
+    cache.put("关闭卧室的灯", dict(RESULT, ACTION="关闭"))
+    assert cache.get("打开客厅的灯") == RESULT
+
+    cache.put("打开空调", dict(RESULT, DEVICE_TYPE="空调"))
+
+    assert cache.get("打开客厅的灯") == RESULT
+    assert cache.stats()["size"] == 4
+
+
+def test_persist_and_reload(tmp_path):
+    path = tmp_path / "nlu_cache.json"
+    # 写盘间隔很长：put不会写盘，需要显式persist（服务退出时由引擎aclose调用）
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path),
+                             persist_interval_seconds=3600)
+    cache._last_persist = time.time()
+    cache.put("打开客厅的灯", RESULT)
+    assert not path.exists()
+
+    cache.persist()
+    reloaded = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path))
+    assert reloaded.get("打开客厅的灯。") == RESULT
+
+
+def test_put_persists_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "nlu_cache.json"
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path),
+                             persist_interval_seconds=0)
+    loop_thread = threading.get_ident()
+    write_threads = []
+    write = cache._write
+    monkeypatch.setattr(cache, "_write", lambda *args: (write_threads.append(threading.get_ident()), write(*args)))
+
+    async def main():
+        cache.put("打开客厅的灯", RESULT)
+        # put只调度写盘，不在事件循环中写文件
+        assert not path.exists()
+        await asyncio.gather(*cache._persist_tasks)
+
+    asyncio.run(main())
+    assert write_threads and loop_thread not in write_threads
+    reloaded = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path))
+    assert reloaded.get("打开客厅的灯") == RESULT
+
+
+def test_older_snapshot_does_not_overwrite_newer_one(tmp_path):
+    path = tmp_path / "nlu_cache.json"
+    cache = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path),
+                             persist_interval_seconds=3600)
+    cache._last_persist = time.time()
+    cache.put("打开客厅的灯", RESULT)
+    old_snapshot = cache._snapshot()
+    cache.put("打开空调", dict(RESULT, DEVICE_TYPE="空调"))
+
+    cache.persist()
+    cache._write(*old_snapshot)
+    reloaded = NLUResponseCache(max_entries=16, ttl_seconds=3600, persist_path=str(path))
+    assert reloaded.get("打开空调") is not None
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from nlu.processors.retrieval_backends import NumpyRetrievalBackend, create_retrieval_backend
+
+
+def brute_force_l2(embeddings, query, top_k):
+    distances = ((embeddings - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind="stable")[:top_k]
+    return order, distances[order]
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 32)).astype(np.float32) * rng.uniform(0.5, 2.0, size=(200, 1))
+    queries = rng.normal(size=(10, 32)).astype(np.float32)
+    return embeddings, queries
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 200, 500])
+def test_float32_matches_brute_force_l2(corpus, top_k):
+    embeddings, queries = corpus
+    backend = NumpyRetrievalBackend("float32")
+    backend.build([f"cmd{i}" for i in range(len(embeddings))], embeddings)
+
+    for query in queries:
+        expected_ids, expected_scores = brute_force_l2(embeddings, query, top_k)
+        results = backend.search(query, top_k)
+        assert [kb_index for kb_index, _ in results] == expected_ids.tolist()
+        np.testing.assert_allclose([score for _, score in results], expected_scores, rtol=1e-4, atol=1e-3)
+
+
+def test_float16_keeps_the_nearest_neighbour(corpus):
+    embeddings, queries = corpus
+    backend = NumpyRetrievalBackend("float16")
+    backend.build([f"cmd{i}" for i in range(len(embeddings))], embeddings)
+
+    for query in queries:
+        expected_ids, expected_scores = brute_force_l2(embeddings, query, 1)
+        (kb_index, score), = backend.search(query, 1)
+        assert kb_index == expected_ids[0]
+        np.testing.assert_allclose(score, expected_scores[0], rtol=1e-2)
+    assert backend.memory_bytes() == embeddings.size * 2 + len(embeddings) * 4
+
+
+def test_query_equal_to_a_row_scores_zero(corpus):
+    embeddings, _ = corpus
+    backend = NumpyRetrievalBackend()
+    backend.build([f"cmd{i}" for i in range(len(embeddings))], embeddings)
+
+    kb_index, score = backend.search(embeddings[42], 1)[0]
+    assert kb_index == 42
+    assert score == pytest.approx(0.0, abs=1e-3)
+
+
+def test_empty_and_closed_backend_return_nothing(corpus):
+    embeddings, queries = corpus
+    backend = NumpyRetrievalBackend()
+    assert backend.search(queries[0], 3) == []
+
+    backend.build([f"cmd{i}" for i in range(len(embeddings))], embeddings)
+    assert backend.search(queries[0], 0) == []
+    backend.close()
+    assert backend.search(queries[0], 3) == []
+    assert backend.memory_bytes() == 0
+
+
+def test_factory_validates_names_and_dtypes():
+    assert isinstance(create_retrieval_backend("numpy", None, {"numpy_dtype": "float16"}), NumpyRetrievalBackend)
+    with pytest.raises(ValueError):
+        create_retrieval_backend("faiss", None)
+    with pytest.raises(ValueError):
+        NumpyRetrievalBackend("float64")
+
+
+def test_float32_uses_memory_mapped_matrix_without_copying(corpus, tmp_path):
+    embeddings, queries = corpus
+    path = tmp_path / "embeddings.npy"
+    np.save(path, embeddings.astype(np.float32))
+    mapped = np.load(path, mmap_mode="r")
+
+    backend = NumpyRetrievalBackend("float32")
+    backend.build([f"cmd{i}" for i in range(len(embeddings))], mapped)
+
+    assert np.shares_memory(backend.matrix, mapped)
+    expected_ids, _ = brute_force_l2(embeddings, queries[0], 5)
+    assert [kb_index for kb_index, _ in backend.search(queries[0], 5)] == expected_ids.tolist()
@@ -0,0 +1,31 @@
+import numpy as np
+
+from stt.audio_io import SAMPLE_RATE
+from stt.vad import EnergyVAD
+
+rng = np.random.default_rng(0)
+
+
+def noise(seconds, level_db):
+    return rng.normal(size=int(SAMPLE_RATE * seconds)).astype(np.float32) * 10 ** (level_db / 20)
+
+
+def tone(seconds, level_db):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * np.sqrt(2) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def test_quiet_speech_is_detected_relative_to_noise_floor():
+    # -50 dBFS 的命令低于旧的固定门限 -40 dBFS，但明显高于 -75 dB 的噪声底
+    audio = np.concatenate([noise(0.5, -75), tone(1.0, -50) + noise(1.0, -75), noise(0.5, -75)])
+    result = EnergyVAD().trim(audio, padding_ms=100)
+
+    assert result.has_speech
+    assert 0.3 < result.offset < 0.5
+    assert 1.0 <= result.trimmed_duration < 1.3
+
+
+def test_noise_only_and_digital_silence_have_no_speech():
+    vad = EnergyVAD()
+    assert not vad.trim(noise(1.0, -75)).has_speech
+    assert not vad.trim(np.zeros(SAMPLE_RATE, dtype=np.float32)).has_speech
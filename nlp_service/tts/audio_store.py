@@ -0,0 +1,173 @@
+import asyncio
+import base64
+import logging
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from runtime.lru_cache import LRUCache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def guess_media_type(audio_bytes: bytes) -> str:
+    """
+    根据文件头判断音频的MIME类型
+    """
+    if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+        return "audio/wav"
+    if audio_bytes[:3] == b"ID3" or audio_bytes[:2] == b"\xff\xfb":
+        return "audio/mpeg"
+    if audio_bytes[:4] == b"OggS":
+        return "audio/ogg"
+    return "application/octet-stream"
+
+
+def encode_base64_reference(audio_bytes: bytes) -> str:
+    """
+    编码为兼容旧接口的音频引用格式 "base64://DATA"
+    """
+    return "base64://" + base64.b64encode(audio_bytes).decode("utf-8")
+
+
+class TTSAudioStore:
+    """
+    TTS音频的内存暂存区
+
+    合成结果以原始字节保存在内存中，按ID通过 GET /tts/{id} 流式下载，
+    不写入磁盘，也不做base64编码。条目超过存活时间或超出容量后被淘汰。
+    流水线模式下可以先预留ID、在后台合成完成后再填入音频，下载方可以等待音频就绪。
+    """
+
+    def __init__(self,
+                 max_entries: int = 256,
+                 max_memory_mb: Optional[float] = 64,
+                 ttl_seconds: Optional[float] = 300):
+        """
+        初始化TTSAudioStore
+
+        Args:
+            max_entries: 最多暂存的音频条数
+            max_memory_mb: 暂存音频的总大小上限（MB），None表示只按条目数限制
+            ttl_seconds: 音频的存活时间（秒），None表示不过期
+        """
+        self._audio = LRUCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            name="tts_audio_store",
+            size_fn=len,
+            max_memory_bytes=int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        )
+        # 已预留、尚未合成完成的音频ID
+        self._pending: Dict[str, asyncio.Future] = {}
+        # 合成失败的音频ID及错误信息
+        self._errors = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds, name="tts_audio_errors")
+
+    def put(self, audio_bytes: bytes) -> str:
+        """
+        暂存一段音频
+
+        Args:
+            audio_bytes: 原始音频字节
+
+        Returns:
+            音频ID
+        """
+        audio_id = uuid.uuid4().hex
+        self._audio.put(audio_id, audio_bytes)
+        return audio_id
+
+    def reserve(self) -> str:
+        """
+        预留一个音频ID，音频稍后通过 resolve / fail 填入（需在事件循环中调用）
+
+        Returns:
+            音频ID
+        """
+        audio_id = uuid.uuid4().hex
+        self._pending[audio_id] = asyncio.get_running_loop().create_future()
+        return audio_id
+
+    def resolve(self, audio_id: str, audio_bytes: bytes) -> None:
+        """
+        填入预留ID的音频，并唤醒等待中的下载方
+        """
+        self._audio.put(audio_id, audio_bytes)
+        future = self._pending.pop(audio_id, None)
+        if future is not None and not future.done():
+            future.set_result(True)
+
+    def fail(self, audio_id: str, error: str) -> None:
+        """
+        标记预留ID的合成失败，并唤醒等待中的下载方
+        """
+        self._errors.put(audio_id, error)
+        future = self._pending.pop(audio_id, None)
+        if future is not None and not future.done():
+            future.set_result(False)
+
+    def is_pending(self, audio_id: str) -> bool:
+        """
+        判断音频是否仍在合成中
+        """
+        return audio_id in self._pending
+
+    def error(self, audio_id: str) -> Optional[str]:
+        """
+        获取预留ID的合成错误信息，没有失败时返回None
+        """
+        return self._errors.get(audio_id)
+
+    async def wait_for(self, audio_id: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        读取音频；仍在合成中时等待合成完成
+
+        Args:
+            audio_id: 音频ID
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            音频字节；不存在、已过期、合成失败或等待超时时返回None
+        """
+        future = self._pending.get(audio_id)
+        if future is not None:
+            try:
+                # shield: 单个下载方超时不影响其他等待者
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._audio.get(audio_id)
+
+    def get(self, audio_id: str) -> Optional[bytes]:
+        """
+        按ID读取音频，不存在或已过期时返回None
+        """
+        return self._audio.get(audio_id)
+
+    def pop(self, audio_id: str) -> Optional[bytes]:
+        """
+        按ID取出音频并从暂存区删除（一次性交付，例如multipart响应）
+        """
+        return self._audio.pop(audio_id)
+
+    @staticmethod
+    def iter_chunks(audio_bytes: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        把音频按块切分，用于流式响应（memoryview切片不复制整段音频）
+        """
+        view = memoryview(audio_bytes)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset: offset + chunk_size])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取暂存区的条目数与内存占用
+        """
+        stats = self._audio.stats()
+        stats["pending"] = len(self._pending)
+        return stats
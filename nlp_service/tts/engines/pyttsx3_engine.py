@@ -1,7 +1,11 @@
 import logging
 import os
-import time
-from typing import Dict, Union
+import threading
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Union
 import sys
 from pathlib import Path
 import pyttsx3
@@ -15,43 +19,95 @@ from interfaces.tts_interface import TTSInterface
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 合成工作进程内常驻的pyttsx3驱动（每个进程一个）
+_worker_driver = None
+_worker_temp_dir: Optional[str] = None
+
+
+def _create_driver(config: Dict):
+    """
+    创建pyttsx3驱动并按配置设置音色、语速和音量
+    """
+    driver = pyttsx3.init()
+
+    # 设置语音属性
+    if 'voice' in config:
+        voices = driver.getProperty('voices')
+        # 根据配置选择男声或女声
+        voice_index = 0  # 默认女声
+        if config.get('voice') == 'male' and len(voices) > 1:
+            voice_index = 1
+        driver.setProperty('voice', voices[voice_index].id)
+
+    # 设置语速
+    if 'speed' in config:
+        # pyttsx3的rate是words per minute, 默认是200
+        default_rate = 200
+        rate = int(default_rate * config.get('speed', 1.0))
+        driver.setProperty('rate', rate)
+
+    # 设置音量
+    if 'volume' in config:
+        driver.setProperty('volume', config.get('volume', 1.0))
+
+    return driver
+
+
+def _render_to_bytes(driver, text: str, temp_dir: str) -> bytes:
+    """
+    用指定驱动合成一段文本并返回WAV字节
+
+    pyttsx3只能输出到文件：每次使用唯一的临时文件名，读回内存后立即删除
+    """
+    file_path = os.path.join(temp_dir, f"tts_{os.getpid()}_{uuid.uuid4().hex}.wav")
+    try:
+        driver.save_to_file(text, file_path)
+        driver.runAndWait()
+        with open(file_path, 'rb') as f:
+            return f.read()
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def _init_synthesis_worker(config: Dict, temp_dir: str) -> None:
+    """
+    合成工作进程的初始化函数：进程启动时创建一次pyttsx3驱动
+    """
+    global _worker_driver, _worker_temp_dir
+    _worker_driver = _create_driver(config)
+    _worker_temp_dir = temp_dir
+
+
+def _synthesize_in_worker(text: str) -> bytes:
+    """
+    在工作进程中合成语音（每个进程同一时间只处理一个任务，驱动不会被并发访问）
+    """
+    return _render_to_bytes(_worker_driver, text, _worker_temp_dir)
+
+
 class Pyttsx3TTSEngine(TTSInterface):
     """
     基于pyttsx3的TTS引擎实现
+
+    pyttsx3驱动不是线程安全的：默认启动一组常驻的合成工作进程，每个进程持有自己的驱动，
+    请求通过进程池的任务队列分发给空闲进程，多个请求可以并行合成。
     """
-    
+
     def __init__(self, config: Dict):
         """
         初始化Pyttsx3TTSEngine
-        
+
         Args:
-            config: 引擎配置
+            config: 引擎配置，可包含:
+                voice (str): female 或 male
+                speed (float): 语速倍率
+                volume (float): 音量 (0.0-1.0)
+                workers (int): 合成工作进程数，默认 2；0表示在当前进程内串行合成
         """
         self.config = config
-        
-        # 初始化pyttsx3引擎
-        self.engine = pyttsx3.init()
-        
-        # 设置语音属性
-        if 'voice' in config:
-            voices = self.engine.getProperty('voices')
-            # 根据配置选择男声或女声
-            voice_index = 0  # 默认女声
-            if config.get('voice') == 'male' and len(voices) > 1:
-                voice_index = 1
-            self.engine.setProperty('voice', voices[voice_index].id)
-        
-        # 设置语速
-        if 'speed' in config:
-            # pyttsx3的rate是words per minute, 默认是200
-            default_rate = 200
-            rate = int(default_rate * config.get('speed', 1.0))
-            self.engine.setProperty('rate', rate)
-            
-        # 设置音量
-        if 'volume' in config:
-            self.engine.setProperty('volume', config.get('volume', 1.0))
-        
+        self.workers = int(config.get('workers', 2) or 0)
+
         # 创建临时音频文件目录
         self.temp_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
@@ -59,39 +115,79 @@ class Pyttsx3TTSEngine(TTSInterface):
             'temp_audio'
         )
         os.makedirs(self.temp_dir, exist_ok=True)
-        
-        logger.info(f"Pyttsx3TTSEngine 已初始化，临时目录: {self.temp_dir}")
-    
+
+        self.engine = None
+        self._engine_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        if self.workers > 0:
+            self._pool = self._create_pool()
+        else:
+            # 进程内模式：单个驱动，合成请求串行执行
+            self.engine = _create_driver(config)
+
+        logger.info(f"Pyttsx3TTSEngine 已初始化，合成进程数: {self.workers}，临时目录: {self.temp_dir}")
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # 使用spawn启动工作进程，不继承父进程中的模型和线程状态
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_synthesis_worker,
+            initargs=(dict(self.config), self.temp_dir)
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        获取合成进程池；已被close关闭时重新创建（例如引擎被引擎池淘汰后仍有请求持有它）
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = self._create_pool()
+            return self._pool
+
+    def _synthesize_locally(self, text: str) -> bytes:
+        with self._engine_lock:
+            return _render_to_bytes(self.engine, text, self.temp_dir)
+
     async def synthesize(self, text: str) -> Union[str, bytes, None]:
         """
         将文本转换为语音
-        
+
         Args:
             text: 要转换为语音的文本
-            
+
         Returns:
-            生成的音频文件路径
+            WAV音频字节
         """
         logger.info(f"Pyttsx3TTSEngine.synthesize 被调用，文本: '{text}'")
-        
-        # 创建一个唯一的文件名
-        timestamp = int(time.time())
-        file_path = os.path.join(self.temp_dir, f"tts_response_{timestamp}.wav")
-        
-        # 异步运行pyttsx3的语音合成
-        def _synthesize():
-            self.engine.save_to_file(text, file_path)
-            self.engine.runAndWait()
-        
-        # 在线程池中运行pyttsx3，因为它会阻塞主线程
-        await asyncio.to_thread(_synthesize)
-        
-        logger.info(f"生成的音频文件: {file_path}")
-        
-        # 返回相对于项目根目录的路径
-        relative_path = os.path.relpath(
-            file_path, 
-            os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        )
-        
-        return relative_path 
\ No newline at end of file
+
+        if self.workers <= 0:
+            # 在线程池中运行pyttsx3，因为它会阻塞主线程
+            audio_bytes = await asyncio.to_thread(self._synthesize_locally, text)
+        else:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            try:
+                audio_bytes = await loop.run_in_executor(pool, _synthesize_in_worker, text)
+            except BrokenProcessPool:
+                # 工作进程异常退出（例如语音驱动崩溃）：重建进程池后重试一次
+                logger.warning("TTS合成进程池已损坏，正在重建")
+                with self._pool_lock:
+                    if self._pool is pool:
+                        self._pool = self._create_pool()
+                audio_bytes = await loop.run_in_executor(self._get_pool(), _synthesize_in_worker, text)
+
+        logger.info(f"语音合成完成，音频大小: {len(audio_bytes)} 字节")
+        return audio_bytes
+
+    def close(self) -> None:
+        """
+        关闭合成工作进程
+
+        已提交的合成任务仍会完成；之后再调用synthesize时按需重建进程池。
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
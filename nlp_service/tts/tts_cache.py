@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 将项目根目录添加到系统路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from runtime.lru_cache import LRUCache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    TTS音频缓存
+
+    以 (文本, 引擎, 音色, 语速, 音调, 音量) 的哈希为键（内容寻址）：
+    内存层按LRU保存原始音频字节（交付时再按需编码），
+    磁盘层保存原始音频文件，总大小超过上限时删除最久未使用的文件，重启后仍能命中。
+    """
+
+    # 参与缓存键计算的TTS配置项
+    KEY_FIELDS = ("engine", "voice", "speed", "pitch", "volume")
+
+    def __init__(self,
+                 max_entries: int = 512,
+                 max_memory_mb: Optional[float] = 64,
+                 disk_dir: Optional[str] = None,
+                 max_disk_mb: Optional[float] = 256):
+        """
+        初始化TTSCache
+
+        Args:
+            max_entries: 内存层最大条目数
+            max_memory_mb: 内存层大小上限（MB），None表示只按条目数限制
+            disk_dir: 磁盘层目录，None表示不启用磁盘层
+            max_disk_mb: 磁盘层大小上限（MB），None表示不限制
+        """
+        self.memory = LRUCache(
+            max_entries=max_entries,
+            name="tts_audio",
+            size_fn=len,
+            max_memory_bytes=int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        )
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024) if max_disk_mb else None
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(path.stat().st_size for path in self.disk_dir.glob("*.wav"))
+            logger.info(f"TTS磁盘缓存目录: {self.disk_dir}，现有 {self._disk_bytes / (1024 * 1024):.1f}MB")
+
+    @classmethod
+    def make_key(cls, text: str, tts_config: Dict[str, Any]) -> str:
+        """
+        计算缓存键
+
+        Args:
+            text: 要合成的文本
+            tts_config: TTS引擎配置
+
+        Returns:
+            SHA-256十六进制字符串
+        """
+        payload = {field: tts_config.get(field) for field in cls.KEY_FIELDS}
+        payload["text"] = text
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.wav"
+
+    def contains(self, key: str) -> bool:
+        """
+        判断是否已缓存（不计入命中统计，也不改变淘汰顺序）
+        """
+        if key in self.memory:
+            return True
+        return bool(self.disk_dir) and self._disk_path(key).exists()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        查找缓存的音频，先查内存层再查磁盘层（磁盘命中会提升到内存层）
+
+        Returns:
+            原始音频字节，未命中时返回None
+        """
+        audio_bytes = self.memory.get(key)
+        if audio_bytes is not None:
+            self.memory_hits += 1
+            return audio_bytes
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                audio_bytes = path.read_bytes()
+                os.utime(path)  # 更新时间戳，磁盘层按最近使用淘汰
+                self.memory.put(key, audio_bytes)
+                self.disk_hits += 1
+                return audio_bytes
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"读取TTS磁盘缓存失败: {str(e)}")
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, audio_bytes: bytes) -> None:
+        """
+        写入合成结果
+
+        Args:
+            key: 缓存键
+            audio_bytes: 原始音频字节
+        """
+        self.memory.put(key, audio_bytes)
+        if self.disk_dir:
+            self._write_disk(key, audio_bytes)
+
+    def _write_disk(self, key: str, audio_bytes: bytes) -> None:
+        path = self._disk_path(key)
+        with self._disk_lock:
+            try:
+                previous_size = path.stat().st_size if path.exists() else 0
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(audio_bytes)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(audio_bytes) - previous_size
+                self._evict_disk()
+            except OSError as e:
+                logger.warning(f"写入TTS磁盘缓存失败: {str(e)}")
+
+    def _evict_disk(self) -> None:
+        """
+        磁盘层超过上限时按最近使用时间删除最旧的文件
+        """
+        if self.max_disk_bytes is None or self._disk_bytes <= self.max_disk_bytes:
+            return
+        files = sorted(self.disk_dir.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self._disk_bytes -= size
+                self.disk_evictions += 1
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命中率与内存/磁盘占用
+        """
+        memory_stats = self.memory.stats()
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "size": memory_stats["size"],
+            "memory_bytes": memory_stats["memory_bytes"],
+            "memory_evictions": memory_stats["evictions"],
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
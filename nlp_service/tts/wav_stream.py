@@ -0,0 +1,62 @@
+import io
+import logging
+import struct
+import wave
+from typing import Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 流式WAV头中的长度字段：总长度未知时填最大值，播放器会一直读到连接关闭
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def streaming_wav_header(channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """
+    构造长度未知的WAV文件头（用于分块传输）
+    """
+    byte_rate = sample_rate * channels * sample_width
+    block_align = channels * sample_width
+    return (
+        b"RIFF" + struct.pack("<I", _UNKNOWN_SIZE) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, sample_width * 8)
+        + b"data" + struct.pack("<I", _UNKNOWN_SIZE)
+    )
+
+
+class WavStreamMerger:
+    """
+    把逐句合成的多段WAV拼接为一条连续的音频流
+
+    第一段输出一个长度未知的WAV头和PCM数据，后续各段只输出PCM数据；
+    某段格式与第一段不一致（或不是PCM WAV）时原样透传该段。
+    """
+
+    def __init__(self):
+        self._format: Optional[Tuple[int, int, int]] = None
+
+    def feed(self, audio_bytes: bytes) -> bytes:
+        """
+        处理一段音频
+
+        Args:
+            audio_bytes: 一句的完整音频文件字节
+
+        Returns:
+            应写入响应流的字节
+        """
+        try:
+            with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+                fmt = (wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate())
+                frames = wav_file.readframes(wav_file.getnframes())
+        except (wave.Error, EOFError) as e:
+            logger.debug(f"音频片段不是PCM WAV，原样透传: {str(e)}")
+            return audio_bytes
+
+        if self._format is None:
+            self._format = fmt
+            return streaming_wav_header(*fmt) + frames
+        if fmt != self._format:
+            logger.warning(f"音频片段格式 {fmt} 与首段 {self._format} 不一致，原样透传")
+            return audio_bytes
+        return frames